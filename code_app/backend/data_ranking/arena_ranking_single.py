@@ -21,19 +21,48 @@ import sys
 import json
 import pandas as pd
 import numpy as np
-import subprocess
 import argparse
 import logging
 from datetime import datetime
 from typing import Tuple, Dict, List
 import tempfile
 import shutil
-import itertools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Ensure the project root is in the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from code_app.backend.r_pool import get_r_pool, ranking_cli_args
+from code_app.backend.result_cache import engine_version, input_hash
+from code_app.backend.ranking_engines import DEFAULT_RANKING_ENGINE, RANKING_ENGINES, blas_thread_env, resolve_engine
+from code_app.backend.spectral_ranking import (
+    SOLVERS,
+    gray_code_subsets,
+    rank,
+    rank_batch,
+    row_statistics,
+    save_row_statistics,
+    score_columns,
+    warm_start,
+    write_results,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Combinations per warm-started chain: the solver's warm start restarts at every
+# block, so results do not depend on how blocks are spread over --workers. Only
+# the iterative solvers (power, arpack, lobpcg) use the warm start; svd, the
+# default, solves every combination from scratch.
+WARM_START_BLOCK = 8
+# Per-combination record of the input hash and parameters its results were computed with
+MANIFEST_FILE = 'manifest.json'
+
 class ArenaAllCombinationsRankingUpdater:
     """Updates ranking data for all possible combinations of Arena benchmarks"""
 
@@ -52,6 +81,9 @@ class ArenaAllCombinationsRankingUpdater:
         # Ensure ranking directory exists
         os.makedirs(self.data_ranking_dir, exist_ok=True)
 
+        # pi of the last Python-engine ranking, used to warm-start the next solve
+        self.warm_start_pi = None
+
     def load_full_data(self) -> pd.DataFrame:
         """Load the full Arena ranking data"""
         if not os.path.exists(self.input_file):
@@ -70,13 +102,11 @@ class ArenaAllCombinationsRankingUpdater:
 
     def generate_all_combinations(self, benchmarks: List[str]) -> List[List[str]]:
         """Generate all possible combinations of 2 to n-1 benchmarks (excluding full n-benchmark combination)"""
-        all_combinations = []
         n = len(benchmarks)
 
-        # Generate combinations for sizes 2 to n-1 (excluding full n-benchmark combination)
-        for k in range(2, n):
-            combinations_k = list(itertools.combinations(benchmarks, k))
-            all_combinations.extend(combinations_k)
+        # Gray-code order: consecutive combinations differ by about one benchmark,
+        # so each ranking can warm-start from the previous one (iterative solvers only)
+        all_combinations = gray_code_subsets(benchmarks, min_size=2, max_size=n - 1)
 
         logger.info(f"Generated {len(all_combinations)} combinations from {n} benchmarks (excluding full {n}-benchmark combination)")
         return all_combinations
@@ -109,6 +139,17 @@ class ArenaAllCombinationsRankingUpdater:
 
         return temp_path
 
+    def save_row_statistics(self, df: pd.DataFrame, bigbetter: int = 1) -> str:
+        """Persist the per-benchmark sufficient statistics (win-count matrices) of the full data"""
+        output_dir = os.path.join(self.data_ranking_dir, 'current')
+        os.makedirs(output_dir, exist_ok=True)
+        stats_file = os.path.join(output_dir, 'arena_row_statistics.npz')
+
+        stats = row_statistics(df.set_index(df.columns[0]), bigbetter=bool(bigbetter))
+        save_row_statistics(stats, stats_file)
+        logger.info(f"Saved row statistics for {len(stats.rows)} benchmarks, {len(stats.methods)} models: {stats_file}")
+        return stats_file
+
     def create_combination_data(self, df: pd.DataFrame, benchmark_combination: List[str]) -> str:
         """Create a CSV file for a combination of benchmarks for spectral ranking"""
         # Extract data for each benchmark in the combination
@@ -146,8 +187,15 @@ class ArenaAllCombinationsRankingUpdater:
 
         return temp_path
 
-    def run_spectral_ranking(self, input_file: str, combination: List[str], bigbetter: int = 1, B: int = 2000, seed: int = 42) -> Tuple[str, str]:
-        """Run spectral ranking algorithm on a benchmark combination"""
+    def run_spectral_ranking(self, input_file: str, combination: List[str], bigbetter: int = 1, B: int = 2000, seed: int = 42,
+                             engine: str = DEFAULT_RANKING_ENGINE, solver: str = 'svd', force: bool = False) -> Tuple[str, str]:
+        """
+        Run spectral ranking algorithm on a benchmark combination
+
+        Skipped when the combination's manifest shows the same input and
+        parameters as the last completed run (unless force), so an interrupted
+        or repeated refresh only recomputes what changed.
+        """
         combination_name = "_".join(combination)
         logger.info(f"Running spectral ranking for combination: {combination}")
 
@@ -155,31 +203,99 @@ class ArenaAllCombinationsRankingUpdater:
         combination_output_dir = os.path.join(self.data_ranking_dir, 'current', 'all_combinations', combination_name)
         os.makedirs(combination_output_dir, exist_ok=True)
 
-        # R script command
-        cmd = [
-            'Rscript', self.ranking_script,
-            '--csv', input_file,
-            '--bigbetter', str(bigbetter),
-            '--B', str(B),
-            '--seed', str(seed),
-            '--out', combination_output_dir
-        ]
+        results_file = os.path.join(combination_output_dir, 'ranking_results.json')
+        resolved_engine = resolve_engine(engine, input_file)
+        manifest = self.combination_manifest(input_file, resolved_engine, bigbetter=bigbetter, B=B, seed=seed, solver=solver)
+        if not force and self.is_up_to_date(combination_output_dir, manifest):
+            logger.info(f"Combination {combination} unchanged since its last run, reusing {results_file}")
+            if resolved_engine == 'python' and solver != 'svd':
+                # Continue the warm-start chain as if the combination had been ranked again
+                with open(results_file, 'r') as f:
+                    self.warm_start_pi = np.exp([m['theta_hat'] for m in json.load(f)['methods']])
+            return results_file, combination_output_dir
+
+        # A failed rerun must not leave the old manifest vouching for new inputs
+        manifest_file = os.path.join(combination_output_dir, MANIFEST_FILE)
+        if os.path.exists(manifest_file):
+            os.unlink(manifest_file)
+
+        if resolved_engine == 'python':
+            self.run_python_ranking(input_file, combination_output_dir, bigbetter=bigbetter, B=B, seed=seed, solver=solver)
+        else:
+            # ranking_cli.R arguments, run on a warm R worker
+            args = ranking_cli_args(
+                os.path.abspath(input_file),
+                bigbetter=bigbetter,
+                B=B,
+                seed=seed,
+                out_dir=combination_output_dir
+            )
 
-        logger.info(f"Running command: {' '.join(cmd)}")
+            logger.info(f"Running R ranking: {' '.join(args)}")
 
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_root)
-        if result.returncode != 0:
-            logger.error(f"Spectral ranking failed for combination {combination}: {result.stderr}")
-            raise RuntimeError(f"Spectral ranking failed for combination {combination}: {result.stderr}")
+            succeeded, error_message = get_r_pool().run(args)
+            if not succeeded:
+                logger.error(f"Spectral ranking failed for combination {combination}: {error_message}")
+                raise RuntimeError(f"Spectral ranking failed for combination {combination}: {error_message}")
 
         # Check if results were generated
-        results_file = os.path.join(combination_output_dir, 'ranking_results.json')
         if not os.path.exists(results_file):
             raise FileNotFoundError(f"Ranking results not found for combination {combination}: {results_file}")
 
+        manifest['completed_at'] = datetime.now().isoformat()
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
         logger.info(f"Spectral ranking completed for combination {combination}: {results_file}")
         return results_file, combination_output_dir
 
+    def combination_manifest(self, input_file: str, engine: str, bigbetter: int, B: int, seed: int, solver: str,
+                             bootstrap: str = 'multiplier') -> Dict:
+        """Input hash and everything else that determines a combination's results"""
+        return {
+            'input_hash': input_hash(input_file),
+            'params': {
+                'bigbetter': int(bigbetter),
+                'B': int(B),
+                'seed': int(seed),
+                'engine': engine,
+                'engine_version': engine_version(engine),
+                'solver': solver if engine == 'python' else None,
+                'bootstrap': bootstrap if engine == 'python' else None
+            }
+        }
+
+    def is_up_to_date(self, output_dir: str, manifest: Dict) -> bool:
+        """Whether output_dir holds completed results for exactly this manifest"""
+        manifest_file = os.path.join(output_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_file) or not os.path.exists(os.path.join(output_dir, 'ranking_results.json')):
+            return False
+        try:
+            with open(manifest_file, 'r') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return previous.get('input_hash') == manifest['input_hash'] and previous.get('params') == manifest['params']
+
+    def run_python_ranking(self, input_file: str, output_dir: str, bigbetter: int, B: int, seed: int, solver: str):
+        """Rank in-process with the Python engine, warm-starting from the previous combination"""
+        result = rank(
+            score_columns(pd.read_csv(input_file)),
+            bigbetter=bool(bigbetter),
+            B=B,
+            seed=seed,
+            compress=True,
+            solver=solver,
+            pi0=self.warm_start_pi
+        )
+        # Same job_id as ranking_cli.R derives from --out
+        write_results(result, output_dir, job_id=os.path.basename(os.path.dirname(output_dir)))
+        self.warm_start_pi = warm_start(result)
+
+        solver_info = result.metadata['solver']
+        logger.info(f"Solver {solver_info['solver']}: {solver_info['iterations']} iterations, "
+                    f"residual {solver_info['residual']:.2e}, warm start {solver_info['warm_start']}")
+
     def process_combination_results(self, results_file: str, combination: List[str], df: pd.DataFrame) -> Dict:
         """Process ranking results for a benchmark combination using spectral ranking results"""
         combination_name = "_".join(combination)
@@ -230,7 +346,9 @@ class ArenaAllCombinationsRankingUpdater:
         logger.info(f"Spectral ranking used {spectral_results['metadata']['n_samples']} samples, {spectral_results['metadata']['k_methods']} methods")
         return combination_results
 
-    def run_all_combinations(self, bigbetter: int = 1, B: int = 2000, seed: int = 42, max_combinations: int = None) -> Dict[str, Dict]:
+    def run_all_combinations(self, bigbetter: int = 1, B: int = 2000, seed: int = 42, max_combinations: int = None,
+                             engine: str = DEFAULT_RANKING_ENGINE, solver: str = 'svd', workers: int = 1,
+                             blas_threads: int = None, force: bool = False, batch: bool = False) -> Dict[str, Dict]:
         """Run spectral ranking on all possible combinations of benchmarks"""
         logger.info("Starting all-combinations ranking for Arena benchmarks...")
 
@@ -238,6 +356,9 @@ class ArenaAllCombinationsRankingUpdater:
         df = self.load_full_data()
         benchmarks = self.get_benchmarks(df)
 
+        # Per-benchmark win counts, so any benchmark subset can be ranked on demand
+        self.save_row_statistics(df, bigbetter)
+
         # Generate all combinations
         all_combinations = self.generate_all_combinations(benchmarks)
 
@@ -255,12 +376,20 @@ class ArenaAllCombinationsRankingUpdater:
         print(f"⏱️  Estimated total runtime: ~{total_combinations * 3:.0f}-{total_combinations * 8:.0f} seconds (3-8s per combination)")
         print("=" * 80)
 
+        if batch:
+            return self.run_combinations_batch(df, all_combinations, bigbetter=bigbetter, B=B, seed=seed, force=force)
+
+        if workers > 1:
+            return self.run_combinations_parallel(
+                all_combinations, workers, blas_threads,
+                bigbetter=bigbetter, B=B, seed=seed, engine=engine, solver=solver, force=force
+            )
+
         # Results for all combinations
         all_results = {}
         temp_files = []
 
         try:
-            import time
             start_time = time.time()
             completed_combinations = 0
 
@@ -283,6 +412,9 @@ class ArenaAllCombinationsRankingUpdater:
                 print(f"🎯 Current combination: {combination_name}")
                 print("-" * 50)
 
+                if (i - 1) % WARM_START_BLOCK == 0:
+                    self.warm_start_pi = None
+
                 # Create combination data for spectral ranking
                 temp_file = self.create_combination_data(df, combination)
                 temp_files.append(temp_file)
@@ -293,7 +425,10 @@ class ArenaAllCombinationsRankingUpdater:
                     combination=combination,
                     bigbetter=bigbetter,
                     B=B,
-                    seed=seed
+                    seed=seed,
+                    engine=engine,
+                    solver=solver,
+                    force=force
                 )
 
                 # Process spectral ranking results
@@ -329,6 +464,139 @@ class ArenaAllCombinationsRankingUpdater:
         logger.info(f"Completed all-combinations ranking for {len(all_combinations)} combinations")
         return all_results
 
+    def run_combinations_parallel(self, all_combinations: List[Tuple[str, ...]], workers: int, blas_threads: int = None,
+                                  **ranking_params) -> Dict[str, Dict]:
+        """
+        Rank combinations concurrently on a pool of worker processes
+
+        Each worker loads the data once and ranks one WARM_START_BLOCK of
+        consecutive combinations per task, with its BLAS limited to
+        blas_threads (default: CPUs / workers) and a single warm R worker.
+        Results come back in the order of all_combinations.
+        """
+        total_combinations = len(all_combinations)
+        if blas_threads is None:
+            blas_threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"🧵 Running on {workers} worker processes, {blas_threads} BLAS thread(s) each")
+
+        # Workers are spawned fresh, so the limits apply before numpy or R start
+        worker_env = dict(blas_thread_env(blas_threads), R_POOL_SIZE='1')
+        saved_env = {name: os.environ.get(name) for name in worker_env}
+        os.environ.update(worker_env)
+
+        results_by_name = {}
+        start_time = time.time()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_combination_worker,
+                                     initargs=(self.input_file, self.data_ranking_dir)) as pool:
+                futures = [
+                    pool.submit(_rank_combinations_in_worker, all_combinations[start:start + WARM_START_BLOCK],
+                                ranking_params)
+                    for start in range(0, total_combinations, WARM_START_BLOCK)
+                ]
+                try:
+                    for future in as_completed(futures):
+                        for combination_results in future.result():
+                            combination_name = combination_results['combination_name']
+                            results_by_name[combination_name] = combination_results
+
+                            completed = len(results_by_name)
+                            elapsed_time = time.time() - start_time
+                            estimated_remaining = elapsed_time / completed * (total_combinations - completed)
+                            top_model = combination_results['methods'][0]['name'] if combination_results['methods'] else 'N/A'
+                            print(f"✅ Completed: {combination_name} ({completed}/{total_combinations} - "
+                                  f"{completed / total_combinations * 100:.1f}%) | top: {top_model} | "
+                                  f"elapsed {elapsed_time:.1f}s | ETA {estimated_remaining:.1f}s", flush=True)
+                except BaseException:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+        finally:
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+        total_runtime = time.time() - start_time
+        print(f"\n🎉 COMPLETED ALL {total_combinations} COMBINATIONS!")
+        print(f"⏱️  Total runtime: {total_runtime:.1f} seconds ({workers} workers)")
+        print(f"💾 Results saved to: {os.path.join(self.data_ranking_dir, 'current', 'all_combinations')}")
+        print("=" * 80)
+
+        logger.info(f"Completed all-combinations ranking for {total_combinations} combinations")
+        return {"_".join(combination): results_by_name["_".join(combination)] for combination in all_combinations}
+
+    def run_combinations_batch(self, df: pd.DataFrame, all_combinations: List[Tuple[str, ...]], bigbetter: int = 1,
+                               B: int = 2000, seed: int = 42, force: bool = False) -> Dict[str, Dict]:
+        """
+        Rank combinations with one batched Python engine call (rank_batch)
+
+        Combinations whose manifest is up to date are reused as in
+        run_spectral_ranking; the others are ranked together on the stacked
+        per-benchmark win counts, with the svd solver and the covariance
+        bootstrap sharing one set of random multipliers.
+        """
+        total_combinations = len(all_combinations)
+        start_time = time.time()
+        stats = row_statistics(df.set_index(df.columns[0]), bigbetter=bool(bigbetter))
+
+        pending = []
+        for combination in all_combinations:
+            combination_output_dir = os.path.join(self.data_ranking_dir, 'current', 'all_combinations',
+                                                  "_".join(combination))
+            os.makedirs(combination_output_dir, exist_ok=True)
+            temp_file = self.create_combination_data(df, combination)
+            try:
+                manifest = self.combination_manifest(temp_file, 'python', bigbetter=bigbetter, B=B, seed=seed,
+                                                     solver='svd', bootstrap='covariance')
+            finally:
+                os.unlink(temp_file)
+            if not force and self.is_up_to_date(combination_output_dir, manifest):
+                logger.info(f"Combination {combination} unchanged since its last run")
+                continue
+            manifest_file = os.path.join(combination_output_dir, MANIFEST_FILE)
+            if os.path.exists(manifest_file):
+                os.unlink(manifest_file)
+            pending.append((combination, combination_output_dir, manifest))
+
+        print(f"🧮 Batch ranking {len(pending)} combinations ({total_combinations - len(pending)} unchanged)")
+        errors = {}
+        results = rank_batch(stats, [combination for combination, _, _ in pending], B=B, seed=seed, errors=errors)
+        failed_names = set()
+        for index, ((combination, combination_output_dir, manifest), result) in enumerate(zip(pending, results)):
+            if result is None:
+                # No manifest, so the next run retries it
+                failed_names.add("_".join(combination))
+                logger.error(f"Spectral ranking failed for combination {combination}: {errors[index]}")
+                print(f"❌ Failed: {'_'.join(combination)}: {errors[index]}")
+                continue
+            # Same job_id as ranking_cli.R derives from --out
+            write_results(result, combination_output_dir, job_id=os.path.basename(os.path.dirname(combination_output_dir)))
+            manifest['completed_at'] = datetime.now().isoformat()
+            with open(os.path.join(combination_output_dir, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+        all_results = {}
+        for combination in all_combinations:
+            combination_name = "_".join(combination)
+            if combination_name in failed_names:
+                continue
+            results_file = os.path.join(self.data_ranking_dir, 'current', 'all_combinations', combination_name,
+                                        'ranking_results.json')
+            all_results[combination_name] = self.process_combination_results(results_file, combination, df)
+
+        total_runtime = time.time() - start_time
+        print(f"\n🎉 COMPLETED ALL {total_combinations} COMBINATIONS!")
+        if failed_names:
+            print(f"❌ {len(failed_names)} combinations failed and were left out: {', '.join(sorted(failed_names))}")
+        print(f"⏱️  Total runtime: {total_runtime:.1f} seconds (batched)")
+        print(f"💾 Results saved to: {os.path.join(self.data_ranking_dir, 'current', 'all_combinations')}")
+        print("=" * 80)
+
+        logger.info(f"Completed all-combinations ranking for {total_combinations} combinations")
+        return all_results
+
     def save_combined_results(self, all_results: Dict[str, Dict]):
         """Save combined results for all combinations"""
         # Create output directory
@@ -433,7 +701,9 @@ class ArenaAllCombinationsRankingUpdater:
             for i, method in enumerate(results['methods'][:3], 1):
                 print("2d")
 
-    def update_ranking(self, bigbetter: int = 1, B: int = 2000, seed: int = 42, max_combinations: int = None):
+    def update_ranking(self, bigbetter: int = 1, B: int = 2000, seed: int = 42, max_combinations: int = None,
+                       engine: str = DEFAULT_RANKING_ENGINE, solver: str = 'svd', workers: int = 1,
+                       blas_threads: int = None, force: bool = False, batch: bool = False):
         """Main method to update all-combinations ranking data"""
         logger.info("="*80)
         logger.info("STARTING ARENA ALL-COMBINATIONS SPECTRAL RANKING")
@@ -445,7 +715,13 @@ class ArenaAllCombinationsRankingUpdater:
                 bigbetter=bigbetter,
                 B=B,
                 seed=seed,
-                max_combinations=max_combinations
+                max_combinations=max_combinations,
+                engine=engine,
+                solver=solver,
+                workers=workers,
+                blas_threads=blas_threads,
+                force=force,
+                batch=batch
             )
 
             # Step 2: Save results
@@ -462,6 +738,38 @@ class ArenaAllCombinationsRankingUpdater:
             raise
 
 
+# Per-process state of the --workers pool
+_worker_updater = None
+_worker_df = None
+
+
+def _init_combination_worker(input_file: str, data_ranking_dir: str):
+    """Pool initializer: load the full data once per worker process, with the parent's paths"""
+    global _worker_updater, _worker_df
+    # Per-combination logs of concurrent workers would interleave; the parent reports progress
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_updater = ArenaAllCombinationsRankingUpdater()
+    _worker_updater.input_file = input_file
+    _worker_updater.data_ranking_dir = data_ranking_dir
+    _worker_df = _worker_updater.load_full_data()
+
+
+def _rank_combinations_in_worker(combinations: List[Tuple[str, ...]], ranking_params: dict) -> List[Dict]:
+    """Rank a block of combinations as one warm-started chain in a pool worker"""
+    _worker_updater.warm_start_pi = None
+    block_results = []
+    for combination in combinations:
+        temp_file = _worker_updater.create_combination_data(_worker_df, combination)
+        try:
+            results_file, _ = _worker_updater.run_spectral_ranking(input_file=temp_file, combination=combination,
+                                                                   **ranking_params)
+            block_results.append(_worker_updater.process_combination_results(results_file, combination, _worker_df))
+        finally:
+            if os.path.exists(temp_file):
+                os.unlink(temp_file)
+    return block_results
+
+
 def main():
     parser = argparse.ArgumentParser(description="Update Arena ranking data with all-combinations spectral ranking")
     parser.add_argument('--bigbetter', type=int, default=1,
@@ -472,6 +780,22 @@ def main():
                        help='Random seed for reproducibility (default: 42)')
     parser.add_argument('--max-combinations', type=int, default=None,
                        help='Maximum number of combinations to process (for testing)')
+    parser.add_argument('--engine', choices=RANKING_ENGINES, default=DEFAULT_RANKING_ENGINE,
+                       help=f'Ranking engine: r, python or auto (default: {DEFAULT_RANKING_ENGINE})')
+    parser.add_argument('--solver', choices=SOLVERS, default='svd',
+                       help='Stationary distribution solver of the Python engine (default: svd, which '
+                            'solves every combination from scratch). Only the iterative solvers power, '
+                            'arpack and lobpcg warm-start from the previous combination in Gray-code order, '
+                            'which makes results depend on the neighbouring combinations within solver tolerance')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Number of worker processes ranking combinations concurrently (default: 1)')
+    parser.add_argument('--blas-threads', type=int, default=None,
+                       help='BLAS/OpenMP threads per worker process (default: CPUs / workers)')
+    parser.add_argument('--force', action='store_true',
+                       help='Recompute every combination, even those whose inputs and parameters are unchanged')
+    parser.add_argument('--batch', action='store_true',
+                       help='Rank all combinations in one batched Python engine call from the per-benchmark '
+                            'win counts (svd solver, covariance bootstrap); ignores --engine, --solver and --workers')
 
     args = parser.parse_args()
 
@@ -480,6 +804,10 @@ def main():
         parser.error("B must be positive")
     if args.bigbetter not in [0, 1]:
         parser.error("bigbetter must be 0 or 1")
+    if args.workers < 1:
+        parser.error("workers must be at least 1")
+    if args.blas_threads is not None and args.blas_threads < 1:
+        parser.error("blas-threads must be at least 1")
 
     # Run update
     updater = ArenaAllCombinationsRankingUpdater()
@@ -487,7 +815,13 @@ def main():
         bigbetter=args.bigbetter,
         B=args.B,
         seed=args.seed,
-        max_combinations=args.max_combinations
+        max_combinations=args.max_combinations,
+        engine=args.engine,
+        solver=args.solver,
+        workers=args.workers,
+        blas_threads=args.blas_threads,
+        force=args.force,
+        batch=args.batch
     )
 
 
@@ -8,13 +8,17 @@ import os
 import sys
 import json
 import pandas as pd
-import subprocess
 import asyncio
 import uuid
 import shutil
 import logging
 from typing import Dict, Any
 
+from code_app.backend.job_events import publish_job_event
+from code_app.backend.job_limits import JobGuard, get_job_guard, job_limits
+from code_app.backend.job_registry import get_job_registry
+from code_app.backend.r_pool import get_r_pool, ranking_cli_args
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -146,13 +150,12 @@ async def run_custom_ranking_background(job_id: str, model_name: str, scores: Di
     Updates job status and saves results.
     """
     job_dir = os.path.join(DATA_DIR, 'temp_ranking_jobs', job_id)
-    status_path = os.path.join(job_dir, 'status.json')
     results_path = os.path.join(job_dir, 'results.json')
+    registry = get_job_registry()
 
     try:
         # Update status to running
-        with open(status_path, 'w') as f:
-            json.dump({'status': 'running', 'message': 'Processing custom model ranking...'}, f)
+        registry.start(job_id, message='Processing custom model ranking...')
 
         # 1. Prepare data by adding the user's model to the base top 100 data
         base_data_path = os.path.join(PROJECT_ROOT, 'data_llm', 'data_huggingface', 'data_processing', 'huggingface_processed_top100.csv')
@@ -188,50 +191,45 @@ async def run_custom_ranking_background(job_id: str, model_name: str, scores: Di
         temp_csv_path = os.path.join(job_dir, 'custom_ranking_input.csv')
         df.to_csv(temp_csv_path, index=False)
 
-        # 3. Run the spectral ranking R script as a subprocess
+        # 3. Run the spectral ranking R script on a warm R worker
         if not shutil.which('Rscript'):
             raise FileNotFoundError("Rscript executable not found. Ensure R is installed in the running environment.")
-        ranking_script = os.path.join(PROJECT_ROOT, 'demo_r', 'ranking_cli.R')
-        if not os.path.exists(ranking_script):
-            raise FileNotFoundError(f"R script not found at {ranking_script}")
-        cmd = [
-            'Rscript', ranking_script,
-            '--csv', temp_csv_path,
-            '--bigbetter', '1',
-            '--B', '2000',  # Using the standard number of iterations for accuracy
-            '--seed', '42',
-            '--out', job_dir
-        ]
-
-        logger.info(f"Executing R script for custom ranking job {job_id}: {' '.join(cmd)}")
-
-        # Run the subprocess in a separate thread to avoid blocking the event loop
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+        # Using the standard number of iterations for accuracy
+        args = ranking_cli_args(temp_csv_path, bigbetter=1, B=2000, seed=42, out_dir=job_dir)
+
+        logger.info(f"Running R ranking for custom ranking job {job_id}: {' '.join(args)}")
+        registry.set_message(job_id, 'Running spectral ranking...')
+
+        # Cancel flag and limits of the job; the R worker is killed on either
+        guard = get_job_guard(job_id) or JobGuard(job_id)
+        limits = job_limits(len(df), df.select_dtypes(include='number').shape[1], 2000, engine='r')
+        guard.start(limits['wall_limit_sec'], limits['rss_limit_mb'])
+
+        # Run the job in a separate thread to avoid blocking the event loop
+        succeeded, error_message = await asyncio.to_thread(
+            get_r_pool().run, args, None, guard,
+            lambda stage, done, total: publish_job_event(
+                job_id, 'progress', {'stage': stage, 'done': done, 'total': total}),
         )
-        stdout, stderr = await proc.communicate()
 
-        if proc.returncode != 0:
-            error_message = stderr.decode() or stdout.decode()
+        if not succeeded:
             logger.error(f"Spectral ranking script failed for job {job_id}: {error_message}")
-            with open(status_path, 'w') as f:
-                json.dump({'status': 'failed', 'message': f"Spectral ranking failed: {error_message}"}, f)
+            registry.finish(job_id, 'failed', message=f"Spectral ranking failed: {error_message}", error=error_message)
             return
 
         # 4. Process the results JSON
         results_file = os.path.join(job_dir, 'ranking_results.json')
         if not os.path.exists(results_file):
             logger.error(f"Ranking script did not produce an output file for job {job_id}")
-            with open(status_path, 'w') as f:
-                json.dump({'status': 'failed', 'message': "Ranking script did not produce an output file"}, f)
+            registry.finish(job_id, 'failed', message="Ranking script did not produce an output file",
+                            error="Ranking script did not produce an output file")
             return
 
         with open(results_file, 'r') as f:
             ranking_data = json.load(f)
 
         # 5. Enrich results with full benchmark data from the combined dataframe
+        registry.set_message(job_id, 'Enriching ranking results...')
         enriched_results = await _enrich_ranking_results(
             ranking_data,
             sanitized_model_name,
@@ -245,16 +243,14 @@ async def run_custom_ranking_background(job_id: str, model_name: str, scores: Di
             json.dump(enriched_results, f)
 
         # 7. Update status to succeeded
-        with open(status_path, 'w') as f:
-            json.dump({'status': 'succeeded', 'message': 'Custom model ranking completed successfully'}, f)
+        registry.finish(job_id, 'succeeded', message='Custom model ranking completed successfully')
 
         logger.info(f"Custom ranking job {job_id} completed successfully")
 
     except Exception as e:
         error_message = str(e)
         logger.error(f"Custom ranking job {job_id} failed with exception: {error_message}")
-        with open(status_path, 'w') as f:
-            json.dump({'status': 'failed', 'message': f"Custom ranking failed: {error_message}"}, f)
+        registry.finish(job_id, 'failed', message=f"Custom ranking failed: {error_message}", error=error_message)
 
 
 async def run_custom_ranking(model_name: str, scores: Dict[str, float]) -> Dict[str, Any]:
@@ -300,33 +296,18 @@ async def run_custom_ranking(model_name: str, scores: Dict[str, float]) -> Dict[
     df.to_csv(temp_csv_path, index=False)
 
     try:
-        # 3. Run the spectral ranking R script as a subprocess
+        # 3. Run the spectral ranking R script on a warm R worker
         if not shutil.which('Rscript'):
             raise FileNotFoundError("Rscript executable not found. Ensure R is installed in the running environment.")
-        ranking_script = os.path.join(PROJECT_ROOT, 'demo_r', 'ranking_cli.R')
-        if not os.path.exists(ranking_script):
-            raise FileNotFoundError(f"R script not found at {ranking_script}")
-        cmd = [
-            'Rscript', ranking_script,
-            '--csv', temp_csv_path,
-            '--bigbetter', '1',
-            '--B', '2000',  # Using the standard number of iterations for accuracy
-            '--seed', '42',
-            '--out', temp_dir
-        ]
-
-        logger.info(f"Executing R script for job {job_id}: {' '.join(cmd)}")
-
-        # Run the subprocess in a separate thread to avoid blocking the event loop
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
+        # Using the standard number of iterations for accuracy
+        args = ranking_cli_args(temp_csv_path, bigbetter=1, B=2000, seed=42, out_dir=temp_dir)
+
+        logger.info(f"Running R ranking for job {job_id}: {' '.join(args)}")
+
+        # Run the job in a separate thread to avoid blocking the event loop
+        succeeded, error_message = await asyncio.to_thread(get_r_pool().run, args)
 
-        if proc.returncode != 0:
-            error_message = stderr.decode() or stdout.decode()
+        if not succeeded:
             logger.error(f"Spectral ranking script failed for job {job_id}: {error_message}")
             raise RuntimeError(f"Spectral ranking failed: {error_message}")
 
@@ -0,0 +1,89 @@
+"""
+In-process event bus for ranking job progress
+
+Job threads (scheduler slots, engine progress relays) publish events with
+publish_job_event(); the SSE endpoint subscribes per job and receives them on
+its asyncio loop without polling. Events:
+
+    state     the job's registry row changed (started, message, finished)
+    queue     the job moved up the scheduler queue ({'position': n})
+    progress  engine progress ({'stage': ..., 'done': ..., 'total': ...})
+
+The latest progress event of each unfinished job is kept, so a late
+subscriber or a status poll sees where the job is.
+"""
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JobEventBus:
+    """Fan-out of job events from any thread to asyncio subscribers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._progress: Dict[str, dict] = {}
+
+    def publish(self, job_id: str, event: str, data: Optional[dict] = None):
+        """Deliver an event to the job's subscribers (safe to call from any thread)"""
+        data = dict(data or {})
+        with self._lock:
+            if event == 'progress':
+                self._progress[job_id] = data
+            elif event == 'state' and data.get('status') in ('succeeded', 'failed'):
+                self._progress.pop(job_id, None)
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+            except RuntimeError:
+                # The subscriber's loop has closed; it unsubscribes on its own
+                pass
+
+    def last_progress(self, job_id: str) -> Optional[dict]:
+        """Latest progress event of an unfinished job"""
+        with self._lock:
+            progress = self._progress.get(job_id)
+            return dict(progress) if progress is not None else None
+
+    @contextmanager
+    def subscribe(self, job_id: str):
+        """Queue of (event, data) for the job; must be entered on the consuming event loop"""
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id, [])
+                if entry in subscribers:
+                    subscribers.remove(entry)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'jobs_watched': len(self._subscribers),
+                'subscribers': sum(len(s) for s in self._subscribers.values()),
+                'jobs_with_progress': len(self._progress),
+            }
+
+
+_bus = JobEventBus()
+
+
+def get_job_events() -> JobEventBus:
+    """Process-wide job event bus"""
+    return _bus
+
+
+def publish_job_event(job_id: str, event: str, data: Optional[dict] = None):
+    """Publish on the process-wide bus"""
+    _bus.publish(job_id, event, data)
@@ -0,0 +1,190 @@
+"""
+Cancellation and hard resource limits of ranking jobs
+
+Every queued or running job has a JobGuard, registered when the job is
+submitted and released when it finishes. The guard carries the cancel flag
+set by DELETE /api/ranking/jobs/{id} and the job's limits:
+
+    wall_limit_sec  wall-clock seconds from the start of the engine run
+    rss_limit_mb    resident memory of the engine's process group
+
+Both are derived from the runtime cost model (estimate_runtime_seconds, also
+behind the agent's runtime estimate) and the size of the input, with
+env-configurable factors, floors and caps. The engines run in their own
+process group (the Python worker process, a warm R worker) and poll
+guard.violation() while they wait for the job; on a cancel or a limit breach
+the whole group is killed with SIGKILL and the job fails with the reason.
+"""
+import logging
+import math
+import os
+import signal
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Wall-clock limit: JOB_WALL_LIMIT_FACTOR x the cost model estimate, clamped
+JOB_WALL_LIMIT_FACTOR = float(os.getenv("JOB_WALL_LIMIT_FACTOR", "10"))
+JOB_MIN_WALL_LIMIT_SEC = float(os.getenv("JOB_MIN_WALL_LIMIT_SEC", "300"))
+JOB_MAX_WALL_LIMIT_SEC = float(os.getenv("JOB_MAX_WALL_LIMIT_SEC", "14400"))
+# RSS limit: interpreter baseline + bootstrap buffers + per-comparison data, capped
+JOB_RSS_BASE_MB = float(os.getenv("JOB_RSS_BASE_MB", "512"))
+JOB_RSS_BYTES_PER_COMPARISON = float(os.getenv("JOB_RSS_BYTES_PER_COMPARISON", "64"))
+# The R engine also holds dense comparisons x k matrices of doubles (AA, WW,
+# Vmatrix2), i.e. this many bytes per comparison and method on top
+JOB_RSS_R_BYTES_PER_COMPARISON_METHOD = float(os.getenv("JOB_RSS_R_BYTES_PER_COMPARISON_METHOD", "24"))
+JOB_MAX_RSS_MB = float(os.getenv("JOB_MAX_RSS_MB", "8192"))
+# Seconds between limit checks of a running engine
+JOB_LIMIT_POLL_SEC = float(os.getenv("JOB_LIMIT_POLL_SEC", "1.0"))
+
+JOB_CANCELLED_MESSAGE = "Cancelled by user"
+
+
+class JobLimitError(RuntimeError):
+    """A job was cancelled or exceeded one of its limits; the message says which"""
+
+
+def estimate_runtime_seconds(n_samples: int, k_methods: int, B: int) -> float:
+    """
+    Cost model of a ranking run in seconds
+
+    A fixed base for data loading and preprocessing plus a term scaling with
+    samples x methods x log2(B), with extra overhead for large datasets.
+    """
+    base_time = 2.0
+    compute_factor = float(n_samples) * float(k_methods) * math.log2(max(2, B))
+    overhead_factor = 1.0 + (n_samples / 100000) * 0.1
+    return (base_time + 0.0008 * compute_factor) * overhead_factor
+
+
+def job_limits(n_samples: int, k_methods: int, B: int, max_bootstrap_mem_mb: Optional[float] = None,
+               engine: str = 'python') -> dict:
+    """
+    Wall-clock and RSS limits of a ranking job on n_samples rows of k_methods scores
+
+    Without max_bootstrap_mem_mb the bootstrap holds its full normal matrix
+    (comparisons x B doubles), so that is what the memory budget allows for.
+    engine is the resolved engine ('r' or 'python'): the R engine's dense
+    comparisons x k matrices grow with k as well, the Python engine's sparse
+    data does not.
+
+    Returns:
+        dict with 'wall_limit_sec' and 'rss_limit_mb'
+    """
+    estimate = estimate_runtime_seconds(n_samples, k_methods, B)
+    wall_limit_sec = min(JOB_MAX_WALL_LIMIT_SEC, max(JOB_MIN_WALL_LIMIT_SEC, JOB_WALL_LIMIT_FACTOR * estimate))
+
+    n_comparisons = n_samples * k_methods * (k_methods - 1) / 2
+    bootstrap_mb = n_comparisons * B * 8 / 2 ** 20
+    if max_bootstrap_mem_mb:
+        bootstrap_mb = min(bootstrap_mb, max_bootstrap_mem_mb)
+    bytes_per_comparison = JOB_RSS_BYTES_PER_COMPARISON
+    if engine == 'r':
+        bytes_per_comparison += JOB_RSS_R_BYTES_PER_COMPARISON_METHOD * k_methods
+    # Two bootstrap passes, plus the temporaries of the matrix products
+    rss_limit_mb = JOB_RSS_BASE_MB + 2 * bootstrap_mb + n_comparisons * bytes_per_comparison / 2 ** 20
+    return {
+        'wall_limit_sec': round(wall_limit_sec),
+        'rss_limit_mb': round(min(JOB_MAX_RSS_MB, rss_limit_mb)),
+    }
+
+
+def process_group_rss_mb(pgid: int) -> Optional[float]:
+    """Total resident memory of the processes in a process group in MB (None without /proc)"""
+    if not os.path.isdir('/proc'):
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total_pages = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue  # exited meanwhile
+        # Fields after the parenthesized command name: state ppid pgrp ... (rss is the 22nd)
+        fields = stat.rsplit(b')', 1)[-1].split()
+        if len(fields) > 21 and int(fields[2]) == pgid:
+            total_pages += int(fields[21])
+    return total_pages * page_size / 2 ** 20
+
+
+def kill_process_group(pid: int):
+    """
+    SIGKILL the process group led by pid, or just pid if it leads none
+
+    Only a group whose id is pid is signalled, so a worker that has not made
+    itself a group leader yet never takes its parent's group down with it.
+    """
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(pid, signal.SIGKILL)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class JobGuard:
+    """Cancel flag and limits of one job; violation() is safe to call from any thread"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.wall_limit_sec = None
+        self.rss_limit_mb = None
+        self.started = None
+        self._cancelled = threading.Event()
+
+    def start(self, wall_limit_sec: Optional[float] = None, rss_limit_mb: Optional[float] = None):
+        """Set the limits and start the wall clock (at the start of the engine run)"""
+        self.wall_limit_sec = wall_limit_sec
+        self.rss_limit_mb = rss_limit_mb
+        self.started = time.monotonic()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def violation(self, pgid: Optional[int] = None) -> Optional[str]:
+        """Why the job must stop now (cancelled or over a limit), or None; pgid: the engine's group"""
+        if self.cancelled:
+            return JOB_CANCELLED_MESSAGE
+        if self.wall_limit_sec and self.started is not None:
+            if time.monotonic() - self.started > self.wall_limit_sec:
+                return f"Exceeded wall-clock limit of {self.wall_limit_sec:.0f} s"
+        if self.rss_limit_mb and pgid is not None:
+            rss_mb = process_group_rss_mb(pgid)
+            if rss_mb is not None and rss_mb > self.rss_limit_mb:
+                return f"Exceeded memory limit of {self.rss_limit_mb:.0f} MB ({rss_mb:.0f} MB resident)"
+        return None
+
+
+_guards: Dict[str, JobGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def register_job_guard(job_id: str) -> JobGuard:
+    """Create the guard of a newly submitted job"""
+    with _guards_lock:
+        guard = _guards[job_id] = JobGuard(job_id)
+    return guard
+
+
+def get_job_guard(job_id: str) -> Optional[JobGuard]:
+    """Guard of a queued or running job (None once it has finished)"""
+    with _guards_lock:
+        return _guards.get(job_id)
+
+
+def release_job_guard(job_id: str):
+    with _guards_lock:
+        _guards.pop(job_id, None)
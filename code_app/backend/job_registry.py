@@ -0,0 +1,231 @@
+"""
+SQLite registry of ranking jobs
+
+One row per job replaces the per-job status.json files under data/jobs/ and
+data/temp_ranking_jobs/. Each row records the job's kind, status, message,
+error, a hash of its parameters, and its created/started/finished timestamps
+and runtime. The status endpoints then read a row by primary key. Listing and
+per-status counts use indexes instead of scanning job directories, and every
+state change is a single transaction instead of a non-atomic file rewrite.
+
+The database runs in WAL mode, so status reads never wait for the writes of
+running jobs. Each thread uses its own connection. State changes are also
+published as 'state' events on the job event bus (job_events).
+
+    status      meaning
+    running     accepted and not finished (queued while started_at is NULL)
+    succeeded   results are in the job's output directory
+    failed      message holds the reason
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from code_app.backend.job_events import publish_job_event
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+# Next to the job directories it tracks (DATA_DIR, as in main.py) unless set
+JOB_REGISTRY_PATH = os.getenv(
+    "JOB_REGISTRY_PATH",
+    os.path.join(os.getenv("DATA_DIR", os.path.join(_PROJECT_ROOT, 'data')), 'jobs.sqlite3'),
+)
+JOB_KINDS = ('ranking', 'custom')
+JOB_STATUSES = ('running', 'succeeded', 'failed')
+FINISHED_STATUSES = ('succeeded', 'failed')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    message TEXT,
+    error TEXT,
+    params_hash TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    runtime_sec REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_kind_created ON jobs (kind, created_at);
+CREATE INDEX IF NOT EXISTS jobs_kind_status ON jobs (kind, status);
+"""
+_COLUMNS = ('job_id', 'kind', 'status', 'message', 'error', 'params_hash', 'created_at', 'started_at',
+            'finished_at', 'runtime_sec')
+
+
+def params_hash(params: dict) -> str:
+    """sha256 of the JSON-encoded job parameters (key order does not matter)"""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class JobRegistry:
+    """Job states in one SQLite file; all methods are safe to call from many threads"""
+
+    def __init__(self, path: str = JOB_REGISTRY_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id: str, kind: str, params: Optional[dict] = None, status: str = 'running',
+               message: Optional[str] = None):
+        """Register a new job; status may already be final (e.g. a result cache hit)"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}. Expected one of {', '.join(JOB_KINDS)}")
+        if status not in JOB_STATUSES:
+            raise ValueError(f"Unknown job status: {status}")
+        now = time.time()
+        finished_at = now if status in FINISHED_STATUSES else None
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, message, params_hash, created_at, finished_at, runtime_sec) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, status, message, params_hash(params) if params is not None else None, now,
+                 finished_at, 0.0 if finished_at is not None else None)
+            )
+
+    def start(self, job_id: str, message: Optional[str] = None):
+        """Mark a job as picked up by a worker (sets started_at)"""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET started_at = ?, message = COALESCE(?, message) WHERE job_id = ?",
+                (time.time(), message, job_id)
+            )
+        publish_job_event(job_id, 'state', {'status': 'running', 'started': True, 'message': message})
+
+    def set_message(self, job_id: str, message: str):
+        """Update the progress message of a running job"""
+        with self._connection() as conn:
+            conn.execute("UPDATE jobs SET message = ? WHERE job_id = ?", (message, job_id))
+        publish_job_event(job_id, 'state', {'status': 'running', 'message': message})
+
+    def finish(self, job_id: str, status: str, message: Optional[str] = None, error: Optional[str] = None):
+        """Record the final status; runtime_sec counts from started_at (or created_at)"""
+        if status not in FINISHED_STATUSES:
+            raise ValueError(f"Final job status must be one of {', '.join(FINISHED_STATUSES)}, got {status}")
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, error = ?, finished_at = ?, "
+                "runtime_sec = ? - COALESCE(started_at, created_at) WHERE job_id = ?",
+                (status, message, error, now, now, job_id)
+            )
+        publish_job_event(job_id, 'state', {'status': status, 'message': message})
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """The job's row as a dict, or None for an unknown job"""
+        row = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def list_jobs(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50,
+                  offset: int = 0) -> List[Dict]:
+        """Jobs, newest first, optionally filtered by kind and status"""
+        conditions, values = [], []
+        if kind is not None:
+            conditions.append("kind = ?")
+            values.append(kind)
+        if status is not None:
+            conditions.append("status = ?")
+            values.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            values + [int(limit), int(offset)]
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict:
+        """Job counts per kind and status, plus runtime aggregates of finished jobs"""
+        conn = self._connection()
+        counts = {kind: {status: 0 for status in JOB_STATUSES} for kind in JOB_KINDS}
+        for row in conn.execute("SELECT kind, status, COUNT(*) AS n FROM jobs GROUP BY kind, status"):
+            counts.setdefault(row['kind'], {})[row['status']] = row['n']
+        runtimes = {}
+        for row in conn.execute(
+            "SELECT kind, COUNT(*) AS n, AVG(runtime_sec) AS mean, MAX(runtime_sec) AS max FROM jobs "
+            "WHERE status = 'succeeded' GROUP BY kind"
+        ):
+            runtimes[row['kind']] = {'succeeded': row['n'], 'mean_sec': row['mean'], 'max_sec': row['max']}
+        queued = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'running' AND started_at IS NULL"
+        ).fetchone()[0]
+        return {'counts': counts, 'queued': queued, 'runtime': runtimes}
+
+    def import_status_files(self, jobs_dir: str, kind: str) -> int:
+        """
+        Register jobs that only have a legacy <jobs_dir>/<id>/status.json
+
+        Jobs already in the registry are left alone. Returns the number imported.
+        """
+        if not os.path.isdir(jobs_dir):
+            return 0
+        imported = 0
+        with self._connection() as conn:
+            for job_id in os.listdir(jobs_dir):
+                status_path = os.path.join(jobs_dir, job_id, 'status.json')
+                if not os.path.isfile(status_path):
+                    continue
+                try:
+                    with open(status_path, 'r') as f:
+                        status = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable legacy status file {status_path}: {e}")
+                    continue
+                state = status.get('status')
+                if state not in FINISHED_STATUSES:
+                    # Unfinished legacy jobs died with the process that ran them
+                    state, status['message'] = 'failed', 'Interrupted by a server restart'
+                mtime = os.path.getmtime(status_path)
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO jobs (job_id, kind, status, message, error, created_at, finished_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, state, status.get('message'),
+                     status.get('message') if state == 'failed' else None, mtime, mtime)
+                )
+                imported += cursor.rowcount
+        if imported:
+            logger.info(f"Imported {imported} legacy {kind} jobs from {jobs_dir}")
+        return imported
+
+    def fail_unfinished(self, message: str = 'Interrupted by a server restart') -> int:
+        """Mark every job still 'running' as failed (call once at startup: nothing is running yet)"""
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'failed', message = ?, error = ?, finished_at = ? WHERE status = 'running'",
+                (message, message, now)
+            )
+        return cursor.rowcount
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_job_registry() -> JobRegistry:
+    """Process-wide job registry (database at JOB_REGISTRY_PATH)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = JobRegistry()
+        return _registry
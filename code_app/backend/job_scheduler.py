@@ -0,0 +1,231 @@
+"""
+Bounded scheduler for ranking jobs
+
+Ranking jobs used to run on FastAPI BackgroundTasks, i.e. on the server's
+shared threadpool with no limit on how many engine processes run at once. The
+scheduler owns a fixed number of worker threads (slots) instead, each running
+one job at a time, and queues the rest FIFO in priority lanes:
+
+    interactive  short jobs a user is waiting on (custom-model rankings)
+    bulk         uploaded datasets of any size
+
+A free slot always takes the oldest interactive job first. The first
+JOB_SCHEDULER_RESERVED_SLOTS slots only run interactive jobs, so a burst of
+large uploads can never occupy every slot while an interactive job waits.
+None are reserved by default: with few slots a reserved one leaves all
+uploads sharing the rest, so reserving is for hosts with slots to spare.
+Whenever a job starts or a queued job is cancelled, the jobs still queued get
+a 'queue' event with their new position (see job_events).
+"""
+import atexit
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from code_app.backend.job_events import publish_job_event
+
+logger = logging.getLogger(__name__)
+
+JOB_LANES = ('interactive', 'bulk')
+JOB_SCHEDULER_SLOTS = int(os.getenv("JOB_SCHEDULER_SLOTS", "2"))
+# Slots (out of JOB_SCHEDULER_SLOTS) that never run bulk jobs
+JOB_SCHEDULER_RESERVED_SLOTS = int(os.getenv("JOB_SCHEDULER_RESERVED_SLOTS", "0"))
+
+
+class QueuedJob:
+    """A submitted job and its scheduling timestamps"""
+
+    def __init__(self, job_id: str, lane: str, target: Callable, args: tuple, sequence: int):
+        self.job_id = job_id
+        self.lane = lane
+        self.target = target
+        self.args = args
+        self.sequence = sequence
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.slot = None
+
+
+class JobScheduler:
+    """Fixed pool of worker slots fed from FIFO priority lanes; submit() is thread-safe"""
+
+    def __init__(self, slots: int = JOB_SCHEDULER_SLOTS, reserved_slots: int = JOB_SCHEDULER_RESERVED_SLOTS):
+        if slots < 1:
+            raise ValueError(f"Job scheduler needs at least 1 slot, got {slots}")
+        if not 0 <= reserved_slots < slots:
+            raise ValueError(f"Reserved interactive slots must be between 0 and {slots - 1}, got {reserved_slots}")
+        self.slots = slots
+        self.reserved_slots = reserved_slots
+        self._queues: Dict[str, deque] = {lane: deque() for lane in JOB_LANES}
+        self._running: Dict[str, QueuedJob] = {}
+        self._queued: Dict[str, QueuedJob] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self._threads = [
+            threading.Thread(target=self._work, args=(slot,), name=f"ranking-job-slot-{slot}", daemon=True)
+            for slot in range(slots)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job_id: str, target: Callable, *args, lane: str = 'bulk') -> int:
+        """
+        Queue target(*args) as job job_id in the given lane
+
+        Returns:
+            the job's queue position (0: next to start)
+        """
+        if lane not in JOB_LANES:
+            raise ValueError(f"Unknown job lane: {lane}. Expected one of {', '.join(JOB_LANES)}")
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Job scheduler is shut down")
+            job = QueuedJob(job_id, lane, target, args, next(self._sequence))
+            self._queues[lane].append(job)
+            self._queued[job_id] = job
+            self._condition.notify_all()
+            position = self._position(job)
+        logger.info(f"Queued job {job_id} in the {lane} lane at position {position}")
+        return position
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Drop a queued job before it starts
+
+        Returns:
+            True if the job was queued; False if it is running, finished or unknown
+        """
+        with self._condition:
+            job = self._queued.pop(job_id, None)
+            if job is None:
+                return False
+            self._queues[job.lane].remove(job)
+            self.cancelled += 1
+            positions = self._queue_positions()
+        self._publish_positions(positions)
+        logger.info(f"Cancelled queued job {job_id} ({job.lane})")
+        return True
+
+    def _queue_positions(self) -> Dict[str, int]:
+        return {job_id: self._position(queued) for job_id, queued in self._queued.items()}
+
+    @staticmethod
+    def _publish_positions(positions: Dict[str, int]):
+        for job_id, position in positions.items():
+            publish_job_event(job_id, 'queue', {'position': position})
+
+    def _position(self, job: QueuedJob) -> int:
+        # Interactive jobs run first, so a bulk job also waits for all of them
+        position = 0
+        for lane in JOB_LANES:
+            if lane == job.lane:
+                return position + self._queues[lane].index(job)
+            position += len(self._queues[lane])
+        return position
+
+    def _next_job(self, slot: int) -> Optional[QueuedJob]:
+        for lane in JOB_LANES:
+            if lane == 'bulk' and slot < self.reserved_slots:
+                continue
+            if self._queues[lane]:
+                return self._queues[lane].popleft()
+        return None
+
+    def _work(self, slot: int):
+        while True:
+            with self._condition:
+                job = self._next_job(slot)
+                while job is None:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                    job = self._next_job(slot)
+                del self._queued[job.job_id]
+                job.started_at = time.time()
+                job.slot = slot
+                self._running[job.job_id] = job
+                positions = self._queue_positions()
+
+            self._publish_positions(positions)
+
+            logger.info(f"Starting job {job.job_id} ({job.lane}) on slot {slot} after "
+                        f"{job.started_at - job.submitted_at:.1f} s in the queue")
+            failed = False
+            try:
+                job.target(*job.args)
+            except Exception as e:
+                # The job functions record their own failures; this only guards the slot
+                failed = True
+                logger.error(f"Job {job.job_id} raised in the scheduler: {e}")
+            finally:
+                with self._condition:
+                    del self._running[job.job_id]
+                    self.completed += 1
+                    self.failed += failed
+                    self._condition.notify_all()
+
+    def job_info(self, job_id: str) -> Optional[dict]:
+        """Scheduling state of a queued or running job (None once it has finished)"""
+        with self._condition:
+            job = self._queued.get(job_id)
+            if job is not None:
+                return {
+                    'state': 'queued',
+                    'lane': job.lane,
+                    'position': self._position(job),
+                    'queued_sec': time.time() - job.submitted_at,
+                }
+            job = self._running.get(job_id)
+            if job is not None:
+                return {
+                    'state': 'running',
+                    'lane': job.lane,
+                    'slot': job.slot,
+                    'queued_sec': job.started_at - job.submitted_at,
+                    'running_sec': time.time() - job.started_at,
+                }
+        return None
+
+    def stats(self) -> dict:
+        """Slot usage and queue lengths per lane"""
+        with self._condition:
+            return {
+                'slots': self.slots,
+                'reserved_interactive_slots': self.reserved_slots,
+                'running': len(self._running),
+                'queued': {lane: len(self._queues[lane]) for lane in JOB_LANES},
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+            }
+
+    def shutdown(self):
+        """Stop taking jobs; slots exit after their current job and queued jobs are dropped"""
+        with self._condition:
+            self._closed = True
+            for lane in JOB_LANES:
+                self._queues[lane].clear()
+            self._queued.clear()
+            self._condition.notify_all()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler() -> JobScheduler:
+    """Process-wide job scheduler (sizes from JOB_SCHEDULER_SLOTS / JOB_SCHEDULER_RESERVED_SLOTS)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+            atexit.register(_scheduler.shutdown)
+        return _scheduler
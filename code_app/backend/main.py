@@ -1,16 +1,16 @@
 import uuid
 import os
 import json
-import subprocess
 import asyncio
-import math
 import csv
 import re
 import shutil
+import threading
+import time
 from typing import Any, Dict, List, Optional
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import aiohttp
 import logging
@@ -29,6 +29,33 @@ except ImportError as e:
     logger.error(f"Failed to import custom ranking function: {e}")
     CUSTOM_RANKING_AVAILABLE = False
 
+from code_app.backend.job_events import get_job_events, publish_job_event
+from code_app.backend.job_limits import (
+    JOB_CANCELLED_MESSAGE,
+    estimate_runtime_seconds,
+    get_job_guard,
+    job_limits,
+    register_job_guard,
+    release_job_guard,
+)
+from code_app.backend.job_registry import FINISHED_STATUSES, JOB_KINDS, JOB_STATUSES, get_job_registry
+from code_app.backend.job_scheduler import get_job_scheduler
+from code_app.backend.r_pool import get_r_pool, ranking_cli_args
+from code_app.backend.result_cache import RESULT_CACHE_MAX_MB, ResultCache, result_cache_key
+from code_app.backend.ranking_engines import (
+    DEFAULT_RANKING_ENGINE,
+    RANKING_ENGINES,
+    csv_dimensions,
+    resolve_engine,
+    run_python_ranking,
+)
+from code_app.backend.subset_rankings import (
+    RANKING_SOURCES,
+    UnknownBenchmarksError,
+    rank_benchmark_subset,
+    subset_cache_stats,
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -45,14 +72,40 @@ app.add_middleware(
 )
 
 # Base directory for jobs and uploads (shared disk on Render)
-DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data'))
+DATA_DIR = os.getenv("DATA_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data')))
 JOBS_DIR = os.path.join(DATA_DIR, 'jobs')
 AGENT_UPLOADS_DIR = os.path.join(DATA_DIR, 'agent_uploads')
 R_SCRIPT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../demo_r/ranking_cli.R'))
+# Per-job cap on the bootstrap normal matrix; larger inputs are bootstrapped in chunks
+DEFAULT_MAX_BOOTSTRAP_MEM_MB = float(os.getenv("MAX_BOOTSTRAP_MEM_MB", "512"))
+# Largest B accepted by the on-demand subset ranking endpoint
+SUBSET_RANKING_MAX_B = int(os.getenv("SUBSET_RANKING_MAX_B", "5000"))
+# Seconds between status heartbeats on a job event stream without events
+JOB_EVENTS_HEARTBEAT_SEC = float(os.getenv("JOB_EVENTS_HEARTBEAT_SEC", "5"))
+# Seconds an abandoned submission id is remembered for its late POST (well
+# past the agent's 60 s job creation timeout)
+ABANDONED_SUBMISSION_TTL_SEC = float(os.getenv("ABANDONED_SUBMISSION_TTL_SEC", "600"))
 
 os.makedirs(JOBS_DIR, exist_ok=True)
 os.makedirs(AGENT_UPLOADS_DIR, exist_ok=True)
 
+# Finished job results keyed by content hash (data + params + engine version)
+RESULT_CACHE = ResultCache(os.path.join(DATA_DIR, 'result_cache'), int(RESULT_CACHE_MAX_MB * 2**20))
+# Single flight: cache key -> id of the job currently computing it; identical
+# submissions attach to that job instead of starting another run
+INFLIGHT_JOBS: Dict[str, str] = {}
+# Job id -> submissions attached to it (its own and coalesced ones); a DELETE
+# detaches one submission and only the last one cancels the job
+INFLIGHT_SUBMITTERS: Dict[str, int] = {}
+# Client-chosen submission id -> job it was attached to, and the submission ids
+# a client abandoned before the server got to them -> when (time.monotonic();
+# see abandon_ranking_submission)
+SUBMISSION_JOBS: Dict[str, str] = {}
+ABANDONED_SUBMISSIONS: Dict[str, float] = {}
+INFLIGHT_LOCK = threading.Lock()
+# Job states (replaces the per-job status.json files)
+JOB_REGISTRY = get_job_registry()
+
 # OpenAI API configuration from environment variables
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-5-nano")
@@ -69,65 +122,289 @@ class ChatResponse(BaseModel):
     assistant_message: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+def _lookup_cached_result(job_id: str, input_csv_path: str, output_dir: str, params: dict):
+    """
+    Resolve the engine and content hash of a new job and try the result cache
+
+    Returns:
+        tuple (resolved_engine, cache_key, hit); cache_key is None when the
+        upload cannot be parsed (the job then runs and reports the error)
+    """
+    engine = resolve_engine(params['engine'], input_csv_path)
+    try:
+        cache_key = result_cache_key(input_csv_path, params, engine)
+    except Exception as e:
+        logger.warning(f"Could not hash input of job {job_id}: {e}")
+        return engine, None, False
+    return engine, cache_key, RESULT_CACHE.get(cache_key, output_dir, job_id=job_id)
+
+
+def _ranking_job_limits(input_csv_path: str, params: dict) -> dict:
+    """Wall-clock and RSS limits of a ranking job from the size of its upload and its engine (see job_limits)"""
+    try:
+        n_samples, k_methods = csv_dimensions(input_csv_path)
+    except (OSError, csv.Error) as e:
+        # The job fails on the same file soon enough; the floors still apply
+        logger.warning(f"Could not size {input_csv_path} for job limits: {e}")
+        n_samples, k_methods = 0, 0
+    return job_limits(n_samples, k_methods, params['B'], params.get('max_bootstrap_mem_mb'),
+                      engine=params.get('resolved_engine', 'r'))
+
+
+def _release_inflight_locked(job_id: str):
+    for key in [k for k, v in INFLIGHT_JOBS.items() if v == job_id]:
+        del INFLIGHT_JOBS[key]
+    INFLIGHT_SUBMITTERS.pop(job_id, None)
+    for submission_id in [s for s, j in SUBMISSION_JOBS.items() if j == job_id]:
+        del SUBMISSION_JOBS[submission_id]
+
+
+def _release_inflight(job_id: str):
+    """Stop coalescing new submissions into job_id (its status is final)"""
+    with INFLIGHT_LOCK:
+        _release_inflight_locked(job_id)
+
+
+def _detach_submitter(job_id: str, submission_id: Optional[str] = None) -> Optional[int]:
+    """
+    Detach one submission from job_id and return how many remain
+
+    At zero the job is released from single flight as well, so no new
+    submission attaches to a job that is about to be cancelled. With a
+    submission_id, only a submission still attached to job_id is detached;
+    None means it was detached already (a repeated DELETE).
+    """
+    with INFLIGHT_LOCK:
+        if submission_id is not None and SUBMISSION_JOBS.pop(submission_id, None) != job_id:
+            return None
+        remaining = INFLIGHT_SUBMITTERS.get(job_id, 1) - 1
+        if remaining > 0:
+            INFLIGHT_SUBMITTERS[job_id] = remaining
+        else:
+            _release_inflight_locked(job_id)
+    return remaining
+
+
+def _parse_submission_id(submission_id: str) -> str:
+    """Canonical form of a client's submission id (400 unless it is a UUID)"""
+    try:
+        return str(uuid.UUID(submission_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="submission_id must be a UUID")
+
+
+def _attach_submission(submission_id: Optional[str], job_id: str) -> bool:
+    """Record the job a client's submission id was attached to; False if the client abandoned it meanwhile"""
+    if submission_id is None:
+        return True
+    with INFLIGHT_LOCK:
+        if ABANDONED_SUBMISSIONS.pop(submission_id, None) is not None:
+            return False
+        SUBMISSION_JOBS[submission_id] = job_id
+    return True
+
+
 def run_ranking_script(job_id: str):
     job_dir = os.path.join(JOBS_DIR, job_id)
     input_dir = os.path.join(job_dir, 'input')
     output_dir = os.path.join(job_dir, 'output')
     
     params_path = os.path.join(job_dir, 'params.json')
-    status_path = os.path.join(job_dir, 'status.json')
+    guard = get_job_guard(job_id) or register_job_guard(job_id)
+    JOB_REGISTRY.start(job_id)
     
     try:
-        # Validate Rscript and script availability early for clearer errors on Azure
-        if not shutil.which('Rscript'):
-            raise FileNotFoundError("Rscript executable not found. Ensure R is installed in the backend environment.")
-        if not os.path.exists(R_SCRIPT_PATH):
-            raise FileNotFoundError(f"R script not found at {R_SCRIPT_PATH}")
         with open(params_path, 'r') as f:
             params = json.load(f)
         
         input_csv_path = os.path.join(input_dir, 'data.csv')
-
-        cmd = [
-            'Rscript',
-            R_SCRIPT_PATH,
-            '--csv', input_csv_path,
-            '--bigbetter', "1" if params['bigbetter'] else "0",
-            '--B', str(params['B']),
-            '--seed', str(params['seed']),
-            '--out', output_dir,
-        ]
-        
-        logger.info(f"Running command: {' '.join(cmd)}")
-        
-        # Using subprocess.run for simplicity in a background task.
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-
-        if result.returncode == 0:
-            with open(status_path, 'w') as f:
-                json.dump({'status': 'succeeded'}, f)
+        engine = params.get('resolved_engine')
+        if engine is None:
+            engine = resolve_engine(params.get('engine', 'r'), input_csv_path)
+            params['resolved_engine'] = engine
+            with open(params_path, 'w') as f:
+                json.dump(params, f)
+
+        limits = params.get('limits') or _ranking_job_limits(input_csv_path, params)
+        guard.start(limits['wall_limit_sec'], limits['rss_limit_mb'])
+
+        def report_progress(stage, done, total):
+            publish_job_event(job_id, 'progress', {'stage': stage, 'done': done, 'total': total})
+
+        if engine == 'python':
+            logger.info(f"Running job {job_id} on the Python engine")
+            succeeded, error_message = run_python_ranking(
+                input_csv_path, output_dir, params, job_id=job_id,
+                on_progress=report_progress,
+                guard=guard,
+            )
+        else:
+            # Validate Rscript and script availability early for clearer errors on Azure
+            if not shutil.which('Rscript'):
+                raise FileNotFoundError("Rscript executable not found. Ensure R is installed in the backend environment.")
+            if not os.path.exists(R_SCRIPT_PATH):
+                raise FileNotFoundError(f"R script not found at {R_SCRIPT_PATH}")
+
+            args = ranking_cli_args(
+                input_csv_path,
+                bigbetter=params['bigbetter'],
+                B=params['B'],
+                seed=params['seed'],
+                out_dir=output_dir,
+                max_bootstrap_mem_mb=params.get('max_bootstrap_mem_mb'),
+            )
+            
+            logger.info(f"Running R ranking for job {job_id}: {' '.join(args)}")
+            
+            # Blocks this background task until a warm R worker has run the job
+            succeeded, error_message = get_r_pool().run(args, guard=guard, on_progress=report_progress)
+
+        if succeeded:
+            if params.get('cache_key'):
+                try:
+                    RESULT_CACHE.put(params['cache_key'], output_dir)
+                except OSError as e:
+                    logger.warning(f"Could not cache results of job {job_id}: {e}")
+            JOB_REGISTRY.finish(job_id, 'succeeded')
             logger.info(f"Job {job_id} succeeded.")
         else:
-            error_message = result.stderr or result.stdout
-            with open(status_path, 'w') as f:
-                json.dump({'status': 'failed', 'message': error_message}, f)
+            JOB_REGISTRY.finish(job_id, 'failed', message=error_message, error=error_message)
             logger.error(f"Job {job_id} failed: {error_message}")
 
     except Exception as e:
         error_message = str(e)
-        with open(status_path, 'w') as f:
-            json.dump({'status': 'failed', 'message': error_message}, f)
+        JOB_REGISTRY.finish(job_id, 'failed', message=error_message, error=error_message)
         logger.error(f"Job {job_id} failed with exception: {error_message}")
+    finally:
+        # The status is final now, so attached submitters see it through this job
+        release_job_guard(job_id)
+        _release_inflight(job_id)
+
+
+def run_custom_ranking_job(job_id: str, model_name: str, scores: Dict[str, float]):
+    """Scheduler entry point of a custom model ranking (runs the async job on the slot's thread)"""
+    try:
+        asyncio.run(run_custom_ranking_background(job_id, model_name, scores))
+    finally:
+        release_job_guard(job_id)
+
+
+def _job_status(job_id: str, kind: Optional[str]) -> Optional[dict]:
+    """
+    Registry row of a job of the given kind as a status response, or None
+
+    With kind None any job matches and the row keeps its 'kind'.
+
+    Unfinished jobs also carry their scheduler state (queue position, lane,
+    slot) and the latest engine progress, when there is any.
+    """
+    status = JOB_REGISTRY.get(job_id)
+    if status is None or (kind is not None and status['kind'] != kind):
+        return None
+    if kind is not None:
+        del status['kind']
+    if status['status'] == 'running':
+        queue_info = get_job_scheduler().job_info(job_id)
+        if queue_info is not None:
+            status['queue'] = queue_info
+        progress = get_job_events().last_progress(job_id)
+        if progress is not None:
+            status['progress'] = progress
+    return status
+
+
+def _job_results_path(job_id: str, kind: str) -> str:
+    if kind == 'custom':
+        return os.path.join(DATA_DIR, 'temp_ranking_jobs', job_id, 'results.json')
+    return os.path.join(JOBS_DIR, job_id, 'output', 'ranking_results.json')
+
+
+def _load_json(path: str):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _sse(event: str, data) -> str:
+    """One server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _job_event_stream(job_id: str):
+    """
+    Server-sent events of one job until it finishes
+
+    Sends 'status' (the status response) first, on every state change and as a
+    heartbeat; 'progress' and 'queue' as the engine and scheduler report them;
+    and finally 'result' (the results JSON) or 'error' (the failed status).
+    """
+    # Subscribe before reading the status, so no transition falls in between
+    with get_job_events().subscribe(job_id) as events:
+        status = await asyncio.to_thread(_job_status, job_id, None)
+        while status is not None and status['status'] not in FINISHED_STATUSES:
+            yield _sse('status', status)
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(events.get(), timeout=JOB_EVENTS_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    # Heartbeat: re-send the status
+                    break
+                if event == 'state':
+                    break
+                yield _sse(event, data)
+            status = await asyncio.to_thread(_job_status, job_id, None)
+
+    if status is None:
+        yield _sse('error', {'status': 'failed', 'message': 'Job not found'})
+        return
+    yield _sse('status', status)
+    if status['status'] == 'failed':
+        yield _sse('error', status)
+        return
+    try:
+        result = await asyncio.to_thread(_load_json, _job_results_path(job_id, status['kind']))
+    except (OSError, ValueError) as e:
+        yield _sse('error', {'status': 'failed', 'message': f"Could not read the results of the job: {e}"})
+        return
+    yield _sse('result', result)
+
+
+@app.on_event("startup")
+def import_legacy_jobs():
+    """Register jobs that predate the registry and fail the ones a restart interrupted"""
+    JOB_REGISTRY.import_status_files(JOBS_DIR, 'ranking')
+    JOB_REGISTRY.import_status_files(os.path.join(DATA_DIR, 'temp_ranking_jobs'), 'custom')
+    interrupted = JOB_REGISTRY.fail_unfinished()
+    if interrupted:
+        logger.warning(f"Marked {interrupted} jobs interrupted by the last shutdown as failed")
 
 
 @app.post("/api/ranking/jobs")
 async def create_ranking_job(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     bigbetter: bool = Form(...),
     B: int = Form(...),
     seed: int = Form(...),
+    max_bootstrap_mem_mb: Optional[float] = Form(None),
+    engine: str = Form(DEFAULT_RANKING_ENGINE),
+    submission_id: Optional[str] = Form(None),
 ):
+    """
+    Queue a ranking of an uploaded scores CSV and return its job id
+
+    A client that may give up waiting for the response (a timeout) can send a
+    submission_id (a UUID) and abandon it with
+    DELETE /api/ranking/submissions/{submission_id}, even before it knows the
+    job id.
+    """
+    if engine not in RANKING_ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of: {', '.join(RANKING_ENGINES)}")
+    if max_bootstrap_mem_mb is None:
+        max_bootstrap_mem_mb = DEFAULT_MAX_BOOTSTRAP_MEM_MB
+    if max_bootstrap_mem_mb <= 0:
+        raise HTTPException(status_code=400, detail="max_bootstrap_mem_mb must be positive")
+    if submission_id is not None:
+        submission_id = _parse_submission_id(submission_id)
+
     job_id = str(uuid.uuid4())
     job_dir = os.path.join(JOBS_DIR, job_id)
     
@@ -144,47 +421,184 @@ async def create_ranking_job(
         f.write(content)
         
     # Save parameters
-    params = {'bigbetter': bigbetter, 'B': B, 'seed': seed}
+    params = {
+        'bigbetter': bigbetter,
+        'B': B,
+        'seed': seed,
+        'max_bootstrap_mem_mb': max_bootstrap_mem_mb,
+        'engine': engine,
+    }
+    resolved_engine, cache_key, cache_hit = await asyncio.to_thread(
+        _lookup_cached_result, job_id, input_csv_path, output_dir, params
+    )
+    params['resolved_engine'] = resolved_engine
+    params['cache_key'] = cache_key
+    params['limits'] = await asyncio.to_thread(_ranking_job_limits, input_csv_path, params)
     params_path = os.path.join(job_dir, 'params.json')
     with open(params_path, 'w') as f:
         json.dump(params, f)
         
-    # Set initial status
-    status_path = os.path.join(job_dir, 'status.json')
-    with open(status_path, 'w') as f:
-        json.dump({'status': 'running'}, f)
-        
-    # Run R script in the background
-    background_tasks.add_task(run_ranking_script, job_id)
-    
-    return {"job_id": job_id}
+    if cache_hit:
+        # Identical data and params were ranked before: the job is done already
+        await asyncio.to_thread(JOB_REGISTRY.create, job_id, 'ranking', params, status='succeeded',
+                                message='Served from the result cache')
+        logger.info(f"Job {job_id} served from the result cache ({cache_key[:12]})")
+        return {"job_id": job_id}
+
+    if cache_key is not None:
+        with INFLIGHT_LOCK:
+            running_job_id = INFLIGHT_JOBS.get(cache_key)
+            if running_job_id is None:
+                INFLIGHT_JOBS[cache_key] = job_id
+                INFLIGHT_SUBMITTERS[job_id] = 1
+            else:
+                INFLIGHT_SUBMITTERS[running_job_id] = INFLIGHT_SUBMITTERS.get(running_job_id, 1) + 1
+        if running_job_id is not None:
+            # Same computation already running: hand out its job instead
+            shutil.rmtree(job_dir, ignore_errors=True)
+            logger.info(f"Submission coalesced into running job {running_job_id} ({cache_key[:12]})")
+            if not _attach_submission(submission_id, running_job_id):
+                await asyncio.to_thread(_abandon_job, running_job_id)
+                raise HTTPException(status_code=409, detail="Submission was abandoned by the client")
+            # Where the shared job is in the queue (0 once it has started)
+            queue_info = get_job_scheduler().job_info(running_job_id)
+            queue_position = queue_info.get('position', 0) if queue_info is not None else 0
+            return {"job_id": running_job_id, "queue_position": queue_position}
+
+    await asyncio.to_thread(JOB_REGISTRY.create, job_id, 'ranking', params)
+    register_job_guard(job_id)
+
+    # Queue the ranking on a scheduler slot; uploads share the bulk lane
+    queue_position = get_job_scheduler().submit(job_id, run_ranking_script, job_id, lane='bulk')
+    if not _attach_submission(submission_id, job_id):
+        await asyncio.to_thread(_abandon_job, job_id)
+        raise HTTPException(status_code=409, detail="Submission was abandoned by the client")
+
+    return {"job_id": job_id, "queue_position": queue_position}
 
 
 @app.get("/api/ranking/jobs/{job_id}/status")
 async def get_job_status(job_id: str):
-    job_dir = os.path.join(JOBS_DIR, job_id)
-    status_path = os.path.join(job_dir, 'status.json')
-    
-    if not os.path.exists(status_path):
+    status = await asyncio.to_thread(_job_status, job_id, 'ranking')
+    if status is None:
         raise HTTPException(status_code=404, detail="Job not found")
-        
-    with open(status_path, 'r') as f:
-        status = json.load(f)
-        
     return status
 
 
+@app.get("/api/ranking/jobs/{job_id}/events")
+async def get_job_events_stream(job_id: str):
+    """
+    Server-sent event stream of a ranking or custom ranking job
+
+    Replaces polling the status endpoints: state changes, queue positions and
+    engine progress (e.g. bootstrap 1200/4000) are pushed as they happen, and
+    the stream ends with the job's results or its error.
+    """
+    if await asyncio.to_thread(JOB_REGISTRY.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _job_event_stream(job_id),
+        media_type="text/event-stream",
+        # No caching, and no proxy buffering, which would hold events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/api/ranking/jobs/{job_id}")
+async def cancel_ranking_job(job_id: str, submission_id: Optional[str] = None):
+    """
+    Cancel a queued or running ranking or custom ranking job
+
+    A queued job is dropped from the scheduler and fails right away. A running
+    job's engine process group is killed within about JOB_LIMIT_POLL_SEC; the job
+    then fails with "Cancelled by user" (202 until it has).
+
+    Identical submissions share one job (single flight), so while other
+    submissions are still attached to it a DELETE only detaches one of them
+    and the job keeps running; the last one cancels it. Clients that sent a
+    submission_id can pass it, so that repeating the DELETE (or also
+    abandoning the submission) detaches their submission only once.
+    """
+    if submission_id is not None:
+        submission_id = _parse_submission_id(submission_id)
+    return await asyncio.to_thread(_cancel_job, job_id, submission_id)
+
+
+def _cancel_job(job_id: str, submission_id: Optional[str] = None):
+    """Detach one submission from a job and cancel it if that was the last (blocking; see cancel_ranking_job)"""
+    status = JOB_REGISTRY.get(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if status['status'] in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already {status['status']}")
+
+    remaining = _detach_submitter(job_id, submission_id)
+    if remaining is None:
+        return {"job_id": job_id, "status": "running",
+                "message": "Submission was already detached from the job"}
+    if remaining > 0:
+        logger.info(f"Submission detached from job {job_id}; {remaining} still attached")
+        return {"job_id": job_id, "status": "running",
+                "message": f"Detached from the job; it keeps running for {remaining} other submission(s)"}
+
+    if get_job_scheduler().cancel(job_id):
+        JOB_REGISTRY.finish(job_id, 'failed', message=JOB_CANCELLED_MESSAGE, error=JOB_CANCELLED_MESSAGE)
+        release_job_guard(job_id)
+        logger.info(f"Job {job_id} cancelled before it started")
+        return _job_status(job_id, None)
+
+    guard = get_job_guard(job_id)
+    if guard is None:
+        # Finished between the status read and now
+        raise HTTPException(status_code=409, detail="Job is no longer running")
+    guard.cancel()
+    logger.info(f"Cancelling running job {job_id}")
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": "running",
+                                                  "message": "Cancelling..."})
+
+
+def _abandon_job(job_id: str):
+    """Cancel a job for a submission its client abandoned, unless the job has finished already"""
+    try:
+        _cancel_job(job_id)
+    except HTTPException:
+        pass
+
+
+@app.delete("/api/ranking/submissions/{submission_id}")
+async def abandon_ranking_submission(submission_id: str):
+    """
+    Cancel the job of a submission whose response never arrived
+
+    For clients that sent a submission_id to POST /api/ranking/jobs and gave
+    up waiting. If the submission was attached to a job, the job is cancelled
+    as by DELETE /api/ranking/jobs/{job_id}. If the server has not got to the
+    submission yet, it is refused when it does.
+    """
+    submission_id = _parse_submission_id(submission_id)
+    with INFLIGHT_LOCK:
+        job_id = SUBMISSION_JOBS.get(submission_id)
+        if job_id is None:
+            # Ids whose POST never arrived are only kept as long as it plausibly could
+            now = time.monotonic()
+            for expired in [s for s, t in ABANDONED_SUBMISSIONS.items() if now - t > ABANDONED_SUBMISSION_TTL_SEC]:
+                del ABANDONED_SUBMISSIONS[expired]
+            ABANDONED_SUBMISSIONS[submission_id] = now
+    if job_id is None:
+        logger.info(f"Submission {submission_id} abandoned before it was attached to a job")
+        return {"submission_id": submission_id, "status": "abandoned"}
+    logger.info(f"Submission {submission_id} abandoned; cancelling job {job_id}")
+    return await asyncio.to_thread(_cancel_job, job_id, submission_id)
+
+
 @app.get("/api/ranking/jobs/{job_id}/results")
 async def get_job_results(job_id: str):
     job_dir = os.path.join(JOBS_DIR, job_id)
-    status_path = os.path.join(job_dir, 'status.json')
     results_path = os.path.join(job_dir, 'output', 'ranking_results.json')
-    
-    if not os.path.exists(status_path):
+
+    status = await asyncio.to_thread(_job_status, job_id, 'ranking')
+    if status is None:
         raise HTTPException(status_code=404, detail="Job not found")
-        
-    with open(status_path, 'r') as f:
-        status = json.load(f)
 
     if status['status'] == 'running':
         return JSONResponse(status_code=202, content={"status": "running", "message": "Job is still processing."})
@@ -203,9 +617,77 @@ async def get_job_results(job_id: str):
     raise HTTPException(status_code=500, detail=f"Unknown job status: {status.get('status')}")
 
 
+@app.get("/api/ranking/cache/stats")
+async def get_result_cache_stats():
+    """Entries, size and hit/miss/eviction counters of the ranking result cache"""
+    return RESULT_CACHE.stats()
+
+
+@app.get("/api/ranking/jobs")
+async def list_ranking_jobs(kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50,
+                            offset: int = 0):
+    """Registered jobs, newest first, optionally filtered by kind ('ranking', 'custom') and status"""
+    if kind is not None and kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(JOB_KINDS)}")
+    if status is not None and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of: {', '.join(JOB_STATUSES)}")
+    if not 1 <= limit <= 500 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500 and offset non-negative")
+    jobs = await asyncio.to_thread(JOB_REGISTRY.list_jobs, kind=kind, status=status, limit=limit, offset=offset)
+    return {"jobs": jobs}
+
+
+@app.get("/api/ranking/jobs/stats")
+async def get_ranking_job_stats():
+    """Job counts per kind and status and runtime aggregates from the job registry"""
+    return await asyncio.to_thread(JOB_REGISTRY.stats)
+
+
+@app.get("/api/ranking/scheduler/stats")
+async def get_job_scheduler_stats():
+    """Slot usage and per-lane queue lengths of the ranking job scheduler"""
+    return get_job_scheduler().stats()
+
+
+@app.get("/api/ranking/r-pool/health")
+async def get_r_pool_health():
+    """Ping the idle warm R workers (restarting dead ones) and report the pool state"""
+    return await asyncio.to_thread(get_r_pool().check_health)
+
+
+@app.get("/api/rankings/cache/stats")
+async def get_subset_ranking_cache_stats():
+    """Entries and hit/miss/eviction counters of the subset ranking memo"""
+    return subset_cache_stats()
+
+
+@app.get("/api/rankings/{source}")
+async def get_subset_ranking(source: str, benchmarks: Optional[str] = None, B: int = 2000, seed: int = 42):
+    """
+    Spectral ranking and CIs of a source's models on any subset of its benchmarks
+
+    benchmarks is a comma-separated list (default: all benchmarks). Results are
+    computed from precomputed per-benchmark statistics and memoized.
+    """
+    if source not in RANKING_SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown source: {source}. Expected one of {', '.join(RANKING_SOURCES)}")
+    if not 1 <= B <= SUBSET_RANKING_MAX_B:
+        raise HTTPException(status_code=400, detail=f"B must be between 1 and {SUBSET_RANKING_MAX_B}")
+
+    selected = None
+    if benchmarks is not None:
+        selected = [b.strip() for b in benchmarks.split(',') if b.strip()]
+
+    try:
+        return await asyncio.to_thread(rank_benchmark_subset, source, selected, B, seed)
+    except UnknownBenchmarksError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Data for {source} not found: {e}")
+
+
 @app.post("/api/ranking/custom")
 async def create_custom_model_ranking_job(
-    background_tasks: BackgroundTasks,
     model_name: str = Form(...),
     scores: str = Form(...)  # JSON string of scores dict
 ):
@@ -228,15 +710,15 @@ async def create_custom_model_ranking_job(
         with open(params_path, 'w') as f:
             json.dump(params, f)
 
-        # Set initial status
-        status_path = os.path.join(job_dir, 'status.json')
-        with open(status_path, 'w') as f:
-            json.dump({'status': 'running', 'message': 'Initializing custom model ranking...'}, f)
+        await asyncio.to_thread(JOB_REGISTRY.create, job_id, 'custom', params,
+                                message='Initializing custom model ranking...')
+        register_job_guard(job_id)
 
-        # Run the custom ranking function in the background
-        background_tasks.add_task(run_custom_ranking_background, job_id, model_name, scores_dict)
+        # Interactive lane: runs ahead of queued uploads
+        queue_position = get_job_scheduler().submit(job_id, run_custom_ranking_job, job_id, model_name, scores_dict,
+                                                    lane='interactive')
 
-        return {"job_id": job_id}
+        return {"job_id": job_id, "queue_position": queue_position}
 
     except Exception as e:
         logger.error(f"Failed to create custom ranking job: {str(e)}")
@@ -246,15 +728,9 @@ async def create_custom_model_ranking_job(
 @app.get("/api/ranking/custom/{job_id}/status")
 async def get_custom_ranking_job_status(job_id: str):
     """Get the status of a custom model ranking job"""
-    job_dir = os.path.join(DATA_DIR, 'temp_ranking_jobs', job_id)
-    status_path = os.path.join(job_dir, 'status.json')
-
-    if not os.path.exists(status_path):
+    status = await asyncio.to_thread(_job_status, job_id, 'custom')
+    if status is None:
         raise HTTPException(status_code=404, detail="Custom ranking job not found")
-
-    with open(status_path, 'r') as f:
-        status = json.load(f)
-
     return status
 
 
@@ -262,15 +738,12 @@ async def get_custom_ranking_job_status(job_id: str):
 async def get_custom_ranking_job_results(job_id: str):
     """Get the results of a custom model ranking job"""
     job_dir = os.path.join(DATA_DIR, 'temp_ranking_jobs', job_id)
-    status_path = os.path.join(job_dir, 'status.json')
     results_path = os.path.join(job_dir, 'results.json')
 
-    if not os.path.exists(status_path):
+    status = await asyncio.to_thread(_job_status, job_id, 'custom')
+    if status is None:
         raise HTTPException(status_code=404, detail="Custom ranking job not found")
 
-    with open(status_path, 'r') as f:
-        status = json.load(f)
-
     if status['status'] == 'running':
         return JSONResponse(status_code=202, content={"status": "running", "message": "Job is still processing."})
 
@@ -477,18 +950,8 @@ async def tool_estimate_runtime(n_samples: int, k_methods: int, B: int) -> Dict[
                 "note": "Please provide positive values for samples, methods, and B parameter"
             }
 
-        # More sophisticated estimation model
-        # Base computation includes data loading and preprocessing
-        base_time = 2.0
-
-        # Core computation scales with samples, methods, and B iterations
-        # Using logarithmic scaling for B as it's typically used in bootstrap iterations
-        compute_factor = float(n_samples) * float(k_methods) * math.log2(max(2, B))
-
-        # Additional overhead for larger datasets
-        overhead_factor = 1.0 + (n_samples / 100000) * 0.1
-
-        est_seconds = (base_time + 0.0008 * compute_factor) * overhead_factor
+        # Same cost model the per-job wall-clock limits are derived from
+        est_seconds = estimate_runtime_seconds(n_samples, k_methods, B)
 
         # Convert to appropriate time units
         if est_seconds < 60:
@@ -539,6 +1002,8 @@ async def tool_create_job(file_id: str, bigbetter: bool, B: int, seed: int) -> D
 
     url = "http://127.0.0.1:8001/api/ranking/jobs"
     form = aiohttp.FormData()
+    # Lets the job be cancelled if the response does not arrive in time
+    submission_id = str(uuid.uuid4())
 
     try:
         with open(path, "rb") as f:
@@ -546,6 +1011,7 @@ async def tool_create_job(file_id: str, bigbetter: bool, B: int, seed: int) -> D
             form.add_field('bigbetter', 'true' if bigbetter else 'false')
             form.add_field('B', str(B))
             form.add_field('seed', str(seed))
+            form.add_field('submission_id', submission_id)
 
             async with aiohttp.ClientSession() as session:
                 async with session.post(url, data=form, timeout=60) as resp:
@@ -569,11 +1035,25 @@ async def tool_create_job(file_id: str, bigbetter: bool, B: int, seed: int) -> D
                         error_text = await resp.text()
                         return {"error": f"Job creation failed: HTTP {resp.status} - {error_text}"}
     except asyncio.TimeoutError:
-        return {"error": "Job creation timed out. The server may be busy. Please try again."}
+        # The job may still be created (or be running) without anyone to collect it
+        await _abandon_submission(submission_id)
+        return {"error": "Job creation timed out and was cancelled. The server may be busy. Please try again."}
     except Exception as e:
         return {"error": f"Job creation failed: {str(e)}. Please check your connection and try again."}
 
 
+async def _abandon_submission(submission_id: str):
+    """Cancel the job of a submission whose creation request timed out (best effort)"""
+    url = f"http://127.0.0.1:8001/api/ranking/submissions/{submission_id}"
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.delete(url, timeout=10) as resp:
+                if resp.status >= 400:
+                    logger.warning(f"Could not abandon submission {submission_id}: HTTP {resp.status}")
+    except Exception as e:
+        logger.warning(f"Could not abandon submission {submission_id}: {e}")
+
+
 async def tool_poll_status(job_id: str) -> Dict[str, Any]:
     """Enhanced status polling with better error handling and user feedback"""
     if not job_id or not isinstance(job_id, str):
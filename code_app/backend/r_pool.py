@@ -0,0 +1,326 @@
+"""
+Pool of warm R ranking workers
+
+Each worker is a long-lived `Rscript demo_r/ranking_worker.R` process that has
+ranking_cli.R and its packages loaded once, and runs jobs sent as JSON lines
+over its stdin/stdout pipes. A job gives exactly the output of
+`Rscript ranking_cli.R <args>` without paying R startup for every call.
+
+Workers are started lazily, pinged before reuse once they have been idle for
+R_WORKER_HEALTH_INTERVAL seconds, and replaced when they crash, stop
+answering, or exceed a job timeout. Each worker leads its own process group;
+a job run with a JobGuard kills that group as soon as the job is cancelled or
+exceeds its wall-clock or RSS limit (see job_limits), and the worker is
+replaced on next use. Engine progress the worker reports while a job runs
+(stage start/end, bootstrap replicates) is passed to the job's on_progress.
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from code_app.backend.job_limits import JOB_LIMIT_POLL_SEC, JobGuard, JobLimitError, kill_process_group
+
+logger = logging.getLogger(__name__)
+
+R_WORKER_SCRIPT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../demo_r/ranking_worker.R'))
+R_POOL_SIZE = int(os.getenv("R_POOL_SIZE", "2"))
+R_WORKER_STARTUP_TIMEOUT = float(os.getenv("R_WORKER_STARTUP_TIMEOUT", "60"))
+R_WORKER_HEALTH_INTERVAL = float(os.getenv("R_WORKER_HEALTH_INTERVAL", "30"))
+R_WORKER_PING_TIMEOUT = 10.0
+
+
+class RWorkerError(RuntimeError):
+    """An R worker died, broke the protocol or did not answer in time"""
+
+
+def ranking_cli_args(csv_path: str, bigbetter, B: int, seed: int, out_dir: str,
+                     max_bootstrap_mem_mb: Optional[float] = None) -> List[str]:
+    """Command-line arguments of ranking_cli.R for one ranking"""
+    args = [
+        '--csv', csv_path,
+        '--bigbetter', "1" if int(bigbetter) else "0",
+        '--B', str(B),
+        '--seed', str(seed),
+        '--out', out_dir,
+    ]
+    if max_bootstrap_mem_mb:
+        args += ['--max-bootstrap-mem-mb', str(max_bootstrap_mem_mb)]
+    return args
+
+
+class RWorker:
+    """One warm R process speaking the ranking_worker.R line protocol"""
+
+    def __init__(self, script_path: str = R_WORKER_SCRIPT):
+        self.script_path = script_path
+        self.process = None
+        self.last_used = 0.0
+        self.jobs_run = 0
+        self._lines = None
+        self._ids = itertools.count(1)
+
+    def start(self, timeout: float = R_WORKER_STARTUP_TIMEOUT):
+        """Start the R process and wait until it has loaded ranking_cli.R"""
+        self.process = subprocess.Popen(
+            ['Rscript', self.script_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            # Own process group, killed as a whole when a job is cancelled
+            start_new_session=True,
+        )
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_stdout, args=(self.process, self._lines), daemon=True).start()
+
+        response = self._read_response(timeout)
+        if response.get('status') != 'ready':
+            self.stop()
+            raise RWorkerError(f"Unexpected R worker greeting: {response}")
+        self.last_used = time.monotonic()
+        logger.info(f"R worker {self.process.pid} ready")
+
+    @staticmethod
+    def _read_stdout(process, lines):
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)  # the process closed stdout (exited)
+
+    def _read_response(self, timeout: Optional[float], guard: Optional[JobGuard] = None) -> dict:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if guard is not None:
+                remaining = JOB_LIMIT_POLL_SEC if remaining is None else min(remaining, JOB_LIMIT_POLL_SEC)
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise RWorkerError(f"R worker did not answer within {timeout} s")
+                violation = guard.violation(self.process.pid) if guard is not None else None
+                if violation is not None:
+                    raise JobLimitError(violation)
+                continue
+            if line is None:
+                raise RWorkerError(f"R worker exited with code {self.process.wait()}")
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                logger.debug(f"Ignoring non-protocol R worker output: {line.rstrip()}")
+                continue
+            if isinstance(response, dict):
+                return response
+
+    def request(self, payload: dict, timeout: Optional[float] = None, guard: Optional[JobGuard] = None,
+                on_progress: Optional[Callable[[str, int, int], None]] = None) -> dict:
+        """
+        Send one request and wait for its answer (JobLimitError once guard reports a violation)
+
+        Progress messages of the request are passed to on_progress(stage,
+        done, total) and do not extend the timeout.
+        """
+        request_id = next(self._ids)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self.process.stdin.write(json.dumps(dict(payload, id=request_id)) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise RWorkerError(f"R worker pipe closed: {e}")
+
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            response = self._read_response(remaining, guard)
+            # Answers to earlier timed-out requests are skipped
+            if response.get('id') != request_id:
+                continue
+            if response.get('status') == 'progress':
+                if on_progress is not None:
+                    try:
+                        on_progress(response['stage'], int(response['done']), int(response['total']))
+                    except Exception as e:
+                        logger.warning(f"Progress callback failed: {e}")
+                continue
+            self.last_used = time.monotonic()
+            return response
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def ping(self, timeout: float = R_WORKER_PING_TIMEOUT) -> bool:
+        try:
+            return self.request({'type': 'ping'}, timeout).get('status') == 'pong'
+        except RWorkerError:
+            return False
+
+    def stop(self):
+        """Close stdin (the worker exits on EOF), killing it if it does not"""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def kill(self):
+        """SIGKILL the worker's process group (R and anything it started) right away"""
+        if self.process is None:
+            return
+        kill_process_group(self.process.pid)
+        self.process.wait()
+
+
+class RWorkerPool:
+    """Fixed-size pool of RWorker processes; run() is safe to call from many threads"""
+
+    def __init__(self, size: int = R_POOL_SIZE, script_path: str = R_WORKER_SCRIPT,
+                 health_interval: float = R_WORKER_HEALTH_INTERVAL):
+        if size < 1:
+            raise ValueError(f"R pool size must be at least 1, got {size}")
+        self.size = size
+        self.script_path = script_path
+        self.health_interval = health_interval
+        self.restarts = 0
+        # Idle slots; None marks a slot whose worker is not started yet
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _replace(self, worker: Optional[RWorker]) -> RWorker:
+        if worker is not None:
+            logger.warning(f"Restarting R worker {worker.process.pid if worker.process else '?'}")
+            worker.stop()
+            with self._lock:
+                self.restarts += 1
+        new_worker = RWorker(self.script_path)
+        new_worker.start()
+        return new_worker
+
+    def _acquire(self) -> RWorker:
+        if self._closed:
+            raise RWorkerError("R worker pool is shut down")
+        worker = self._idle.get()
+        try:
+            if worker is None or not worker.is_alive():
+                worker = self._replace(worker)
+            elif time.monotonic() - worker.last_used > self.health_interval and not worker.ping():
+                worker = self._replace(worker)
+        except Exception:
+            self._idle.put(None)
+            raise
+        return worker
+
+    def run(self, args: List[str], timeout: Optional[float] = None,
+            guard: Optional[JobGuard] = None,
+            on_progress: Optional[Callable[[str, int, int], None]] = None) -> Tuple[bool, str]:
+        """
+        Run ranking_cli.R with the given command-line arguments on a warm worker
+
+        Blocks until a worker is free and the job is done. A worker that dies
+        or exceeds timeout is stopped and replaced on next use; one whose job
+        is cancelled or exceeds the limits of guard is killed with its process
+        group, and the reason is the error message. Engine progress is passed
+        to on_progress(stage, done, total) as the worker reports it.
+
+        Returns:
+            tuple (succeeded, error_message)
+        """
+        worker = self._acquire()
+        violation = guard.violation() if guard is not None else None
+        if violation is not None:
+            # Cancelled or out of time while waiting for a worker
+            self._idle.put(worker)
+            return False, violation
+        try:
+            response = worker.request({'args': [str(a) for a in args]}, timeout, guard, on_progress)
+        except JobLimitError as e:
+            logger.warning(f"Killing R worker {worker.process.pid}: {e}")
+            worker.kill()
+            with self._lock:
+                self.restarts += 1
+            self._idle.put(None)
+            return False, str(e)
+        except RWorkerError as e:
+            logger.error(f"R worker failed: {e}")
+            worker.stop()
+            with self._lock:
+                self.restarts += 1
+            self._idle.put(None)
+            return False, str(e)
+
+        worker.jobs_run += 1
+        if self._closed:
+            worker.stop()
+        else:
+            self._idle.put(worker)
+        if response.get('status') == 'ok':
+            return True, ""
+        return False, response.get('message') or "R worker reported an error"
+
+    def check_health(self) -> dict:
+        """Ping every idle worker now, restarting unresponsive ones; returns a summary"""
+        checked = []
+        while True:
+            try:
+                checked.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        alive = 0
+        for i, worker in enumerate(checked):
+            if worker is not None and not worker.ping():
+                try:
+                    worker = self._replace(worker)
+                except Exception as e:
+                    logger.error(f"Could not restart R worker: {e}")
+                    worker = None
+            checked[i] = worker
+            alive += worker is not None
+        for worker in checked:
+            self._idle.put(worker)
+
+        return {
+            'size': self.size,
+            'idle': len(checked),
+            'busy': self.size - len(checked),
+            'idle_alive': alive,
+            'restarts': self.restarts,
+        }
+
+    def shutdown(self):
+        """Stop the idle workers; busy ones are stopped when they return"""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_r_pool() -> RWorkerPool:
+    """Process-wide R worker pool (size from R_POOL_SIZE)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RWorkerPool()
+            atexit.register(_pool.shutdown)
+        return _pool
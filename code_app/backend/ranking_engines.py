@@ -0,0 +1,211 @@
+"""
+Ranking engine selection and the Python engine worker process
+
+Jobs can run on the R reference CLI (demo_r/ranking_cli.R) or on the
+vectorized Python engine in code_app.backend.spectral_ranking. The Python
+engine runs in a separate process started from a forkserver that has numpy,
+scipy and the engine preloaded, so a job pays neither R startup nor imports,
+and a crash or runaway job cannot take the API process down. The worker leads
+its own process group, which is killed when the job is cancelled or exceeds
+its limits (see job_limits).
+"""
+import csv
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from typing import Callable, Optional, Tuple
+
+from code_app.backend.job_limits import JOB_LIMIT_POLL_SEC, JobGuard, kill_process_group
+
+logger = logging.getLogger(__name__)
+
+RANKING_ENGINES = ('r', 'python', 'auto')
+# Engine used when a request does not name one
+DEFAULT_RANKING_ENGINE = os.getenv("RANKING_ENGINE", "auto")
+# auto: up to this many pairwise comparisons the R reference engine (on its warm
+# pool) is used; larger inputs go to the Python engine, whose compressed
+# comparisons and chunked bootstrap keep memory bounded where R holds dense
+# L x k matrices
+AUTO_R_MAX_COMPARISONS = int(os.getenv("AUTO_R_MAX_COMPARISONS", "2000000"))
+
+# Thread-count variables honoured by OpenBLAS, MKL, Accelerate and OpenMP (numpy,
+# scipy and R's BLAS); they only take effect in processes started after they are set
+BLAS_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                        'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+# Minimum seconds between engine progress messages of a worker (the last
+# message of every stage is always sent)
+PROGRESS_INTERVAL_SEC = float(os.getenv("RANKING_PROGRESS_INTERVAL_SEC", "0.5"))
+
+_METADATA_COLUMNS = ('case_num', 'model', 'description')
+_mp_context = None
+
+
+def blas_thread_env(threads: int) -> dict:
+    """Environment limiting BLAS/OpenMP to the given number of threads"""
+    return {name: str(max(1, int(threads))) for name in BLAS_THREAD_ENV_VARS}
+
+
+def _get_mp_context():
+    """forkserver context with the engine preloaded (spawn where fork is unavailable)"""
+    global _mp_context
+    if _mp_context is None:
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            _mp_context = multiprocessing.get_context('forkserver')
+            _mp_context.set_forkserver_preload(['code_app.backend.spectral_ranking'])
+        else:
+            _mp_context = multiprocessing.get_context('spawn')
+    return _mp_context
+
+
+def csv_dimensions(csv_path: str) -> Tuple[int, int]:
+    """(rows, method columns) of a scores CSV, counting every non-metadata column as a method"""
+    with open(csv_path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        n_rows = sum(1 for _ in reader)
+    return n_rows, len([c for c in header if c not in _METADATA_COLUMNS])
+
+
+def estimate_comparisons(csv_path: str) -> int:
+    """Upper bound on the pairwise comparisons of a scores CSV (rows x k(k-1)/2)"""
+    n_rows, k = csv_dimensions(csv_path)
+    return n_rows * k * (k - 1) // 2
+
+
+def resolve_engine(engine: str, csv_path: str) -> str:
+    """
+    Map a requested engine ('r', 'python' or 'auto') to 'r' or 'python'
+
+    auto picks the R reference engine for inputs of up to AUTO_R_MAX_COMPARISONS
+    comparisons and the memory-bounded Python engine for larger ones, or for
+    any input when Rscript is not installed or the CSV cannot be sized.
+    """
+    if engine not in RANKING_ENGINES:
+        raise ValueError(f"Unknown engine: {engine}. Expected one of {', '.join(RANKING_ENGINES)}")
+    if engine != 'auto':
+        return engine
+    if not shutil.which('Rscript'):
+        return 'python'
+    try:
+        n_comparisons = estimate_comparisons(csv_path)
+    except (OSError, csv.Error) as e:
+        logger.warning(f"Could not size {csv_path} for engine selection: {e}")
+        return 'python'
+    return 'r' if n_comparisons <= AUTO_R_MAX_COMPARISONS else 'python'
+
+
+def _python_ranking_worker(conn, input_csv_path: str, output_dir: str, params: dict, job_id: Optional[str]):
+    """
+    Worker process body: rank the CSV and report None or an error message on conn
+
+    Stage and engine progress is sent before that as ('progress', stage, done,
+    total) tuples, at most one per PROGRESS_INTERVAL_SEC except stage ends.
+    """
+    if hasattr(os, 'setpgid'):
+        # Own process group, so a cancel kills the worker and anything it starts
+        os.setpgid(0, 0)
+    last_sent = [0.0]
+
+    def send_progress(stage, done, total):
+        now = time.time()
+        if done < total and now - last_sent[0] < PROGRESS_INTERVAL_SEC:
+            return
+        last_sent[0] = now
+        conn.send(('progress', stage, int(done), int(total)))
+
+    try:
+        import pandas as pd
+        from code_app.backend.spectral_ranking import StageTimer, rank, score_columns, write_results
+
+        start_time = time.time()
+        timer = StageTimer(progress=send_progress)
+        with timer.stage('ingest'):
+            df = pd.read_csv(input_csv_path)
+        with timer.stage('process_data'):
+            df = score_columns(df)
+        result = rank(
+            df,
+            bigbetter=bool(params['bigbetter']),
+            B=int(params['B']),
+            seed=int(params['seed']),
+            max_bootstrap_mem_mb=params.get('max_bootstrap_mem_mb'),
+            # Repeated comparisons are counted once, so the bootstrap cost depends on k only
+            compress=True,
+            timer=timer,
+        )
+        result.metadata['engine'] = 'python'
+        result.metadata['random_stream'] = 'numpy'
+        write_results(result, output_dir, job_id=job_id, runtime_sec=time.time() - start_time)
+        conn.send(None)
+    except Exception as e:
+        conn.send(f"{type(e).__name__}: {e}")
+    finally:
+        conn.close()
+
+
+def run_python_ranking(input_csv_path: str, output_dir: str, params: dict, job_id: Optional[str] = None,
+                       on_progress: Optional[Callable[[str, int, int], None]] = None,
+                       guard: Optional[JobGuard] = None) -> Tuple[bool, str]:
+    """
+    Run the Python engine on a scores CSV in a worker process
+
+    Writes ranking_results.json/.csv to output_dir in the same schema as the
+    R CLI. The bootstrap draws from numpy's RandomState(seed) over compressed
+    comparisons, so the CIs agree with the R engine's (R's own random stream)
+    up to Monte Carlo error, not bit for bit; metadata['engine'] and
+    metadata['random_stream'] say which engine produced a result. Blocks
+    until the worker exits; engine progress is passed to
+    on_progress(stage, done, total) as it arrives (see
+    spectral_ranking.vanilla_spectrum_method). With a guard the worker's
+    process group is killed as soon as the job is cancelled or exceeds its
+    wall-clock or RSS limit (checked every JOB_LIMIT_POLL_SEC), and the
+    reason is the error message.
+
+    Returns:
+        tuple (succeeded, error_message)
+    """
+    ctx = _get_mp_context()
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_python_ranking_worker,
+        args=(child_conn, input_csv_path, output_dir, params, job_id),
+        daemon=True,
+    )
+    process.start()
+    child_conn.close()
+
+    error_message = None
+    next_check = time.monotonic()
+    try:
+        while True:
+            if guard is not None and time.monotonic() >= next_check:
+                next_check = time.monotonic() + JOB_LIMIT_POLL_SEC
+                violation = guard.violation(process.pid)
+                if violation is not None:
+                    logger.warning(f"Killing Python ranking worker {process.pid}: {violation}")
+                    kill_process_group(process.pid)
+                    error_message = violation
+                    break
+            if not parent_conn.poll(JOB_LIMIT_POLL_SEC):
+                continue
+            message = parent_conn.recv()
+            if not isinstance(message, tuple):
+                error_message = message
+                break
+            if on_progress is not None:
+                try:
+                    on_progress(*message[1:])
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {e}")
+        succeeded = error_message is None
+    except EOFError:
+        succeeded = False
+    finally:
+        parent_conn.close()
+        process.join()
+
+    if not succeeded and error_message is None:
+        error_message = f"Python ranking worker exited with code {process.exitcode}"
+    return succeeded, error_message or ""
@@ -0,0 +1,204 @@
+"""
+Content-addressed cache of ranking results
+
+A cache key hashes the normalized score matrix of an uploaded CSV (method
+names plus float64 values, after dropping the metadata and non-numeric
+columns) together with the parameters that affect the result and a version of
+the engine source. Re-uploads of the same data with the same settings hit the
+cache whatever the file name, column formatting or job id.
+
+Entries live in <cache_dir>/<key>/ with an on-disk LRU index (index.json)
+that also keeps the hit/miss/eviction counters. The least recently used
+entries are evicted once the cache exceeds its size limit.
+"""
+import functools
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+RESULT_FILES = ('ranking_results.json', 'ranking_results.csv')
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+_ENGINE_SOURCES = {
+    'r': [os.path.join(_PROJECT_ROOT, 'demo_r', 'ranking_cli.R')],
+    'python': sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'spectral_ranking', '*.py'))),
+}
+_METADATA_COLUMNS = ('case_num', 'model', 'description')
+
+
+@functools.lru_cache(maxsize=None)
+def engine_version(engine: str) -> str:
+    """Short hash of the engine's source files, so cached results expire with code changes"""
+    h = hashlib.sha256(engine.encode())
+    for path in _ENGINE_SOURCES[engine]:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def _normalized_scores(csv_path: str):
+    """Method names and float64 score matrix of a CSV, with canonical NaN and zero bit patterns"""
+    # Exact parsing: the default parser can be an ulp off, and differently so
+    # for equal values written with different digits
+    df = pd.read_csv(csv_path, float_precision='round_trip')
+    df = df.drop(columns=[c for c in _METADATA_COLUMNS if c in df.columns])
+    df = df[df.select_dtypes(include=[np.number]).columns]
+
+    values = np.ascontiguousarray(df.to_numpy(dtype=np.float64))
+    # Canonical NaN bit pattern and +0.0, so equal matrices hash equally
+    values = np.where(np.isnan(values), np.nan, values + 0.0)
+    return [str(c) for c in df.columns], values
+
+
+def input_hash(csv_path: str) -> str:
+    """Content hash of the normalized score matrix of a CSV (no parameters)"""
+    columns, values = _normalized_scores(csv_path)
+    h = hashlib.sha256(json.dumps({'columns': columns, 'shape': list(values.shape)}).encode())
+    h.update(values.tobytes())
+    return h.hexdigest()
+
+
+def result_cache_key(csv_path: str, params: dict, engine: str) -> str:
+    """
+    Content hash of a ranking job
+
+    Only parameters that change the output are included (bigbetter, B, seed);
+    memory caps and similar tuning knobs are not.
+    """
+    columns, values = _normalized_scores(csv_path)
+    header = {
+        'columns': columns,
+        'shape': list(values.shape),
+        'bigbetter': bool(params['bigbetter']),
+        'B': int(params['B']),
+        'seed': int(params['seed']),
+        'engine': engine,
+        'engine_version': engine_version(engine),
+    }
+    h = hashlib.sha256(json.dumps(header, sort_keys=True).encode())
+    h.update(values.tobytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """On-disk LRU cache of ranking result files keyed by result_cache_key"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        index = {'entries': {}, 'hits': 0, 'misses': 0, 'evictions': 0}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    index.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable result cache index: {e}")
+        # Drop entries whose files are gone
+        index['entries'] = {
+            key: entry for key, entry in index['entries'].items()
+            if os.path.isdir(os.path.join(self.cache_dir, key))
+        }
+        return index
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _evict(self):
+        entries = self._index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= entries.pop(key)['size']
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            self._index['evictions'] += 1
+            logger.info(f"Evicted cached ranking result {key}")
+
+    def get(self, key: str, output_dir: str, job_id: Optional[str] = None) -> bool:
+        """
+        Copy the cached result files for key into output_dir
+
+        The job_id in the copied JSON is set to job_id. Counts a hit or a miss.
+        """
+        with self._lock:
+            entry = self._index['entries'].get(key)
+            entry_dir = os.path.join(self.cache_dir, key)
+            if entry is None or not os.path.isdir(entry_dir):
+                self._index['entries'].pop(key, None)
+                self._index['misses'] += 1
+                self._save_index()
+                return False
+
+            os.makedirs(output_dir, exist_ok=True)
+            for name in RESULT_FILES:
+                shutil.copyfile(os.path.join(entry_dir, name), os.path.join(output_dir, name))
+            entry['last_access'] = time.time()
+            self._index['hits'] += 1
+            self._save_index()
+
+        if job_id is not None:
+            json_path = os.path.join(output_dir, 'ranking_results.json')
+            with open(json_path, 'r') as f:
+                payload = json.load(f)
+            payload['job_id'] = job_id
+            with open(json_path, 'w') as f:
+                json.dump(payload, f, indent=2)
+        return True
+
+    def put(self, key: str, output_dir: str):
+        """Store the result files of a finished job under key, then evict down to max_bytes"""
+        paths = [os.path.join(output_dir, name) for name in RESULT_FILES]
+        if not all(os.path.exists(p) for p in paths):
+            return
+        size = sum(os.path.getsize(p) for p in paths)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            entry_dir = os.path.join(self.cache_dir, key)
+            tmp_dir = entry_dir + '.tmp'
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            for name, path in zip(RESULT_FILES, paths):
+                shutil.copyfile(path, os.path.join(tmp_dir, name))
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+
+            self._index['entries'][key] = {'size': size, 'last_access': time.time()}
+            self._evict()
+            self._save_index()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._index['entries']
+            lookups = self._index['hits'] + self._index['misses']
+            return {
+                'entries': len(entries),
+                'size_bytes': sum(entry['size'] for entry in entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self._index['hits'],
+                'misses': self._index['misses'],
+                'evictions': self._index['evictions'],
+                'hit_rate': self._index['hits'] / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,58 @@
+"""
+Spectral ranking inference in Python
+
+    from code_app.backend.spectral_ranking import rank
+    result = rank(scores, bigbetter=True, B=2000, seed=42)
+
+demo_r/ranking_cli.py is a thin command-line wrapper over this package.
+"""
+from .api import METADATA_COLUMNS, RankingResult, rank, rank_subset, score_columns, write_results
+from .batch import batch_spectrum_method, rank_batch
+from .bootstrap import BOOTSTRAP_MODES
+from .comparisons import (
+    ComparisonEdges,
+    as_comparison_edges,
+    comparison_edges,
+    compress_comparisons,
+    process_data,
+)
+from .engine import vanilla_spectrum_method
+from .instrument import STAGES, StageTimer
+from .solvers import SOLVERS, stationary_distribution
+from .subsets import gray_code_subsets, warm_start
+from .sufficient import (
+    RowStatistics,
+    counted_edges,
+    load_row_statistics,
+    row_statistics,
+    save_row_statistics,
+)
+
+__all__ = [
+    'BOOTSTRAP_MODES',
+    'ComparisonEdges',
+    'METADATA_COLUMNS',
+    'RankingResult',
+    'RowStatistics',
+    'SOLVERS',
+    'STAGES',
+    'StageTimer',
+    'as_comparison_edges',
+    'batch_spectrum_method',
+    'comparison_edges',
+    'compress_comparisons',
+    'counted_edges',
+    'gray_code_subsets',
+    'load_row_statistics',
+    'process_data',
+    'rank',
+    'rank_batch',
+    'rank_subset',
+    'row_statistics',
+    'save_row_statistics',
+    'score_columns',
+    'stationary_distribution',
+    'vanilla_spectrum_method',
+    'warm_start',
+    'write_results',
+]
@@ -0,0 +1,245 @@
+"""
+In-process spectral ranking API
+
+rank() takes a score matrix (rows x methods) as a NumPy array or DataFrame and
+returns a RankingResult of NumPy arrays, with no CSV/JSON round trip and no
+R name mangling of the method names.
+"""
+import json
+import os
+import time
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .bootstrap import BOOTSTRAP_MODES
+from .comparisons import ComparisonEdges, _comparison_indices, compress_comparisons
+from .engine import vanilla_spectrum_method
+from .instrument import StageTimer, peak_rss_mb
+from .sufficient import RowStatistics
+
+# Non-score columns dropped from uploaded CSVs (as in ranking_cli.R)
+METADATA_COLUMNS = ('case_num', 'model', 'description')
+
+RESULT_DTYPE = np.dtype([
+    ('method', object),
+    ('theta_hat', np.float64),
+    ('rank', np.int64),
+    ('ci_two_left', np.int64),
+    ('ci_two_right', np.int64),
+    ('ci_left', np.int64),
+    ('ci_uniform_left', np.int64),
+])
+
+
+class RankingResult(NamedTuple):
+    """Spectral ranking estimates and rank confidence intervals, one entry per method"""
+    methods: np.ndarray
+    theta_hat: np.ndarray
+    rank: np.ndarray
+    ci_two_sided: np.ndarray  # k x 2 (left, right)
+    ci_left: np.ndarray
+    ci_uniform_left: np.ndarray
+    params: Dict[str, Any]
+    metadata: Dict[str, Any]
+
+    def to_records(self):
+        """Structured array with the columns of ranking_results.csv"""
+        records = np.empty(len(self.methods), dtype=RESULT_DTYPE)
+        records['method'] = self.methods
+        records['theta_hat'] = self.theta_hat
+        records['rank'] = self.rank
+        records['ci_two_left'] = self.ci_two_sided[:, 0]
+        records['ci_two_right'] = self.ci_two_sided[:, 1]
+        records['ci_left'] = self.ci_left
+        records['ci_uniform_left'] = self.ci_uniform_left
+        return records
+
+    def to_frame(self):
+        """DataFrame with the columns of ranking_results.csv"""
+        return pd.DataFrame(self.to_records())
+
+    def to_payload(self, job_id=None):
+        """Dict in the ranking_results.json schema written by the CLIs"""
+        return {
+            "job_id": job_id,
+            "params": dict(self.params),
+            "methods": [
+                {
+                    "name": str(self.methods[i]),
+                    "theta_hat": float(self.theta_hat[i]),
+                    "rank": int(self.rank[i]),
+                    "ci_two_sided": [int(self.ci_two_sided[i, 0]), int(self.ci_two_sided[i, 1])],
+                    "ci_left": int(self.ci_left[i]),
+                    "ci_uniform_left": int(self.ci_uniform_left[i])
+                }
+                for i in range(len(self.methods))
+            ],
+            "metadata": dict(self.metadata)
+        }
+
+
+def write_results(result, out_dir, job_id=None, runtime_sec=None):
+    """
+    Write ranking_results.json and ranking_results.csv to out_dir
+
+    runtime_sec overrides the engine runtime in the metadata (e.g. with the
+    end-to-end time including CSV parsing).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    payload = result.to_payload(job_id=job_id)
+    if runtime_sec is not None:
+        payload["metadata"]["runtime_sec"] = runtime_sec
+
+    with open(os.path.join(out_dir, "ranking_results.json"), 'w') as f:
+        json.dump(payload, f, indent=2)
+    result.to_frame().to_csv(os.path.join(out_dir, "ranking_results.csv"), index=False)
+    return payload
+
+
+def score_columns(df):
+    """
+    Select the method score columns of an uploaded table
+
+    Drops the known metadata columns and any non-numeric column, matching the
+    CSV handling of ranking_cli.R.
+    """
+    df = df.drop(columns=[c for c in METADATA_COLUMNS if c in df.columns])
+    return df[df.select_dtypes(include=[np.number]).columns]
+
+
+def rank(scores, bigbetter=True, B=2000, seed=42, methods: Optional[Sequence[str]] = None,
+         bootstrap='multiplier', max_bootstrap_mem_mb=None, workers=None, chunk_size=None,
+         compress=False, solver='svd', solver_tol=None, solver_maxiter=None, pi0=None, progress=None,
+         timer: Optional[StageTimer] = None):
+    """
+    Rank methods by the vanilla spectral method
+
+    Args:
+        scores: rows x methods array or DataFrame of scores (NaN = missing).
+            float64 arrays and single-dtype float64 frames are used without a
+            copy; DataFrame columns name the methods.
+        bigbetter: whether higher scores are better
+        B: number of bootstrap samples
+        seed: random seed. Without workers the bootstrap uses the legacy
+            np.random stream for this seed, so results match
+            `ranking_cli.py --seed`; with workers it seeds a SeedSequence.
+        methods: method names for array input (default: "0", "1", ...)
+        bootstrap, max_bootstrap_mem_mb, workers, chunk_size, compress,
+            solver, solver_tol, solver_maxiter, pi0, progress, timer: see
+            vanilla_spectrum_method. The per-stage wall time and CPU time
+            (and peak memory, if the timer traces it) end up in
+            metadata['stages'].
+
+    Returns:
+        RankingResult
+    """
+    start_time = time.time()
+    if bootstrap not in BOOTSTRAP_MODES:
+        raise ValueError(f"Unknown bootstrap mode: {bootstrap}")
+    if timer is None:
+        timer = StageTimer(progress=progress)
+
+    with timer.stage('process_data'):
+        if isinstance(scores, pd.DataFrame):
+            if methods is None:
+                methods = scores.columns.tolist()
+            scores = scores.to_numpy(dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.ndim != 2 or scores.shape[1] < 2:
+            raise ValueError("At least two numeric method columns are required")
+        if methods is None:
+            methods = [str(m) for m in range(scores.shape[1])]
+        if len(methods) != scores.shape[1]:
+            raise ValueError(f"Got {len(methods)} method names for {scores.shape[1]} score columns")
+        Idx = np.array(methods, dtype=object)
+
+        i, j, winner = _comparison_indices(scores, bigbetter=bigbetter)
+        edges = ComparisonEdges(i.astype(np.int32), j.astype(np.int32), winner.astype(np.int32), len(Idx))
+        if compress:
+            edges = compress_comparisons(edges)
+
+    return _rank_edges(edges, Idx, scores.shape[0], start_time, bigbetter=bigbetter, B=B, seed=seed,
+                       bootstrap=bootstrap, max_bootstrap_mem_mb=max_bootstrap_mem_mb, workers=workers,
+                       chunk_size=chunk_size, solver=solver, solver_tol=solver_tol,
+                       solver_maxiter=solver_maxiter, pi0=pi0, timer=timer)
+
+
+def rank_subset(stats: RowStatistics, rows: Optional[Sequence[str]] = None, B=2000, seed=42,
+                bootstrap='multiplier', max_bootstrap_mem_mb=None, workers=None, chunk_size=None,
+                solver='svd', solver_tol=None, solver_maxiter=None, pi0=None, progress=None,
+                timer: Optional[StageTimer] = None):
+    """
+    Rank methods on a subset of rows from precomputed RowStatistics
+
+    The comparisons are assembled by summing the rows' win-count matrices,
+    so the result equals rank(scores[rows], bigbetter=stats.bigbetter,
+    compress=True) with the same seed, without touching the scores.
+
+    Args:
+        stats: RowStatistics from row_statistics or load_row_statistics
+        rows: row labels to rank on (default: all rows)
+        B, seed, bootstrap, max_bootstrap_mem_mb, workers, chunk_size, solver,
+            solver_tol, solver_maxiter, pi0, progress, timer: see rank
+
+    Returns:
+        RankingResult
+    """
+    start_time = time.time()
+    if bootstrap not in BOOTSTRAP_MODES:
+        raise ValueError(f"Unknown bootstrap mode: {bootstrap}")
+    if len(stats.methods) < 2:
+        raise ValueError("At least two methods are required")
+    if timer is None:
+        timer = StageTimer(progress=progress)
+
+    with timer.stage('process_data'):
+        edges = stats.comparison_edges(rows)
+    n_samples = len(stats.rows) if rows is None else len(rows)
+    return _rank_edges(edges, stats.methods, n_samples, start_time, bigbetter=stats.bigbetter, B=B,
+                       seed=seed, bootstrap=bootstrap, max_bootstrap_mem_mb=max_bootstrap_mem_mb,
+                       workers=workers, chunk_size=chunk_size, solver=solver, solver_tol=solver_tol,
+                       solver_maxiter=solver_maxiter, pi0=pi0, timer=timer)
+
+
+def _rank_edges(edges, Idx, n_samples, start_time, bigbetter, B, seed, bootstrap, max_bootstrap_mem_mb,
+                workers, chunk_size, solver, solver_tol, solver_maxiter, pi0, timer):
+    """Run the engine on ComparisonEdges and package a RankingResult"""
+    compress = edges.counts is not None
+    random_state = np.random.RandomState(seed) if workers is None else None
+    diagnostics = {}
+    RR2 = vanilla_spectrum_method(edges, None, Idx, B=B, bootstrap=bootstrap,
+                                  max_bootstrap_mem_mb=max_bootstrap_mem_mb, workers=workers,
+                                  seed=seed, chunk_size=chunk_size, random_state=random_state,
+                                  solver=solver, solver_tol=solver_tol, solver_maxiter=solver_maxiter,
+                                  pi0=pi0, diagnostics=diagnostics, timer=timer)
+
+    return RankingResult(
+        methods=Idx,
+        theta_hat=RR2[0, :],
+        rank=RR2[1, :].astype(np.int64),
+        ci_two_sided=RR2[2:4, :].T.astype(np.int64),
+        ci_left=RR2[4, :].astype(np.int64),
+        ci_uniform_left=RR2[5, :].astype(np.int64),
+        params={
+            "bigbetter": bool(bigbetter),
+            "B": B,
+            "seed": seed,
+            "bootstrap": bootstrap,
+            "workers": workers,
+            "chunk_size": chunk_size,
+            "compress": bool(compress),
+            "solver": solver
+        },
+        metadata={
+            "n_samples": n_samples,
+            "k_methods": len(Idx),
+            "n_comparisons": edges.n_comparisons,
+            "n_unique_comparisons": len(edges) if compress else None,
+            "solver": diagnostics['solver'],
+            "stages": diagnostics['stages'],
+            "peak_rss_mb": peak_rss_mb(),
+            "runtime_sec": time.time() - start_time
+        }
+    )
@@ -0,0 +1,328 @@
+"""
+Batched spectral rankings of many small comparison graphs
+
+Ranking every benchmark combination solves C independent k x k problems. On
+the stacked C x k x k win counts (see sufficient.RowStatistics) each stage of
+vanilla_spectrum_method is one NumPy call over the leading batch axis:
+P, the dense SVD of (P - I)(P - I)^T, the variance estimates, the bootstrap
+covariance and its eigen-factor, and the rank CIs.
+
+The bootstrap is the covariance mode with common random numbers: all
+combinations share the two k x B standard normal matrices, drawn from
+np.random.RandomState(seed) in the order bootstrap_draws uses. Combination c
+therefore gets the replicates rank_subset(stats, subset_c,
+bootstrap='covariance', seed=seed) would draw, and every stage rounds like
+the engine, so the results are identical to it.
+
+A problem that cannot be ranked (no comparisons at all, or a matrix LAPACK
+fails on) is set aside with an error message instead of failing the whole
+batch; its output is NaN.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+from scipy.stats import rankdata
+
+from .api import RankingResult
+from .bootstrap import pairwise_max_statistics, rnorm, uniform_max_statistic
+from .instrument import StageTimer, peak_rss_mb
+from .sufficient import RowStatistics
+
+# Working-set size of one batch of combinations (the C x k x B draws dominate)
+BATCH_MEM_MB = 256
+
+
+def batch_size_for(n_methods, B, max_mem_mb=BATCH_MEM_MB):
+    """Number of combinations whose two C x k x B bootstrap draws fit max_mem_mb"""
+    return max(1, int(max_mem_mb * 2 ** 20 // (2 * 8 * n_methods * B)))
+
+
+def _stacked(func, stack2, failed2):
+    """
+    Batched np.linalg routine func over a stack of matrices
+
+    If LAPACK fails on the stack, every matrix is retried alone; the ones that
+    still fail are flagged in failed2 and get func of the identity instead.
+    """
+    try:
+        return func(stack2)
+    except np.linalg.LinAlgError:
+        pass
+    placeholder = func(np.eye(stack2.shape[-1]))
+    outputs = []
+    for c in range(len(stack2)):
+        try:
+            outputs.append(func(stack2[c]))
+        except np.linalg.LinAlgError:
+            failed2[c] = True
+            outputs.append(placeholder)
+    return tuple(np.stack(parts) for parts in zip(*outputs))
+
+
+def batch_spectrum_method(wins, B=2000, random_state=None, batch_size=None, workers=None, diagnostics=None,
+                          timer=None):
+    """
+    Vanilla spectral ranking of a stack of win-count matrices
+
+    Args:
+        wins: C x k x k array, wins[c, a, b] = number of times b beat a in
+            problem c (e.g. RowStatistics.wins summed over a subset of rows)
+        B: number of bootstrap samples
+        random_state: np.random.RandomState for the shared normals (None: the
+            global np.random stream, seeded by the caller)
+        batch_size: problems per vectorized pass (default: batch_size_for)
+        workers: threads for the per-problem bootstrap maxima, the O(C k^2 B)
+            stage (None: sequential)
+        diagnostics: optional dict that receives the stationary distributions
+            ('pihat', C x k), their residuals ('residual', C), the time
+            spent in the batched SVD ('solver_seconds'), the error messages
+            of the problems that could not be ranked ('errors', {c: message})
+            and the stage timings of the whole batch ('stages')
+        timer: StageTimer that measures the stages (default: a new one)
+
+    Returns:
+        C x 6 x k array; entry c is vanilla_spectrum_method's output for
+        problem c with bootstrap='covariance', or NaN if it failed
+    """
+    wins = np.asarray(wins, dtype=np.float64)
+    if wins.ndim != 3 or wins.shape[1] != wins.shape[2]:
+        raise ValueError(f"Expected a C x k x k stack of win counts, got shape {wins.shape}")
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    n_problems, n, _ = wins.shape
+    if batch_size is None:
+        batch_size = batch_size_for(n, B)
+    if timer is None:
+        timer = StageTimer()
+    fA2 = 2.0
+
+    # Shared multipliers, drawn like the two bootstrap_draws calls of the engine
+    W2 = rnorm(n * B, random_state=random_state).reshape((n, B))
+    W2b = rnorm(n * B, random_state=random_state).reshape((n, B))
+
+    RR2 = np.zeros((n_problems, 6, n))
+    pihats2 = np.zeros((n_problems, n))
+    residuals2 = np.zeros(n_problems)
+    failed = np.zeros(n_problems, dtype=bool)
+    errors = {}
+    solver_seconds = 0.0
+    eye2 = np.eye(n, dtype=np.float64)
+    diag_idx = np.arange(n)
+
+    for start in range(0, n_problems, batch_size):
+        stop = min(n_problems, start + batch_size)
+        wins2 = wins[start:stop]
+        failed2 = failed[start:stop]
+
+        # P from the win counts, one dval per problem
+        with timer.stage('build_p'):
+            pairs2 = wins2 + np.swapaxes(wins2, 1, 2)
+            dval2 = 2.0 * np.max(np.sum(pairs2, axis=2), axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                P2 = wins2 / fA2 / dval2[:, np.newaxis, np.newaxis]
+            P2[:, diag_idx, diag_idx] = 1.0 - np.sum(P2, axis=2)
+            # Without comparisons (dval 0) P is 0 / 0; such problems ride
+            # along on the identity and are reported
+            empty2 = ~np.all(np.isfinite(P2), axis=(1, 2))
+            for c in np.flatnonzero(empty2):
+                errors[start + c] = "No valid comparisons"
+            failed2 |= empty2
+            P2[empty2] = eye2
+
+        # Last right singular vector of (P - I)(P - I)^T, as in solvers._svd_solver
+        with timer.stage('eigen_solve'):
+            solve_start = time.time()
+            # Two separate (P - I) operands, as in the reference: numpy switches
+            # to syrk for X @ X.T of one buffer, which rounds differently
+            _, _, Vt2 = _stacked(np.linalg.svd, (P2 - eye2) @ np.swapaxes(P2 - eye2, 1, 2), failed2)
+            pihat2 = np.abs(Vt2[:, -1, :])
+            solver_seconds += time.time() - solve_start
+            pihats2[start:stop] = pihat2
+            residuals2[start:stop] = (np.sum(np.abs(np.einsum('cji,cj->ci', P2, pihat2) - pihat2), axis=1)
+                                      / np.sum(pihat2, axis=1))
+
+            pihat2 = np.maximum(pihat2, np.finfo(np.float64).eps)
+            log_pi2 = np.log(pihat2)
+            thetahat2 = log_pi2 - np.mean(log_pi2, axis=1, keepdims=True)
+
+            RR2[start:stop, 0, :] = thetahat2
+            RR2[start:stop, 1, :] = rankdata(-thetahat2, method='min', axis=1)
+
+        # Variance estimates (see vanilla_spectrum_method): pi_o along rows,
+        # pi_m along columns of the pair counts
+        with timer.stage('variance'):
+            pi_o = pihat2[:, :, np.newaxis]
+            pi_m = pihat2[:, np.newaxis, :]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tau_terms = np.nan_to_num(pairs2 * (1 - pi_o / (pi_o + pi_m)) * pi_o / fA2, nan=0.0)
+                # Running sums add the terms in order like the engine's bincount
+                # (np.sum is pairwise and would round differently)
+                tauhatvec2 = np.cumsum(tau_terms, axis=2)[:, :, -1] / dval2[:, np.newaxis]
+                var_sum2 = np.cumsum(pairs2 * pi_m / fA2 / fA2, axis=2)[:, :, -1]
+                # Unbounded variance without comparisons (tau 0), as in the engine
+                tmp_var2 = np.divide(var_sum2 * pihat2 / (dval2 ** 2)[:, np.newaxis], tauhatvec2 * tauhatvec2,
+                                     out=np.full_like(tauhatvec2, np.inf), where=tauhatvec2 > 0)
+                sdmatrix2 = np.sqrt(tmp_var2[:, np.newaxis, :] + tmp_var2[:, :, np.newaxis])
+
+        with timer.stage('bootstrap', total=2 * B):
+            # Bootstrap covariance (bootstrap.bootstrap_covariance) and its
+            # factor; methods without comparisons (tau 0) keep zero entries
+            weights2 = wins2 * (pihat2 ** 2 / fA2 / fA2)[:, :, np.newaxis]
+            weights2 = weights2 + np.swapaxes(weights2, 1, 2)
+            laplacian2 = -weights2
+            laplacian2[:, diag_idx, diag_idx] = np.sum(weights2, axis=2)
+            tau_outer2 = tauhatvec2[:, :, np.newaxis] * tauhatvec2[:, np.newaxis, :]
+            cov2 = np.divide(laplacian2, tau_outer2, out=np.zeros_like(laplacian2), where=tau_outer2 > 0)
+            cov2[failed2] = 0.0
+            eigvals2, eigvecs2 = _stacked(np.linalg.eigh, cov2, failed2)
+            factor2 = eigvecs2 * np.sqrt(np.clip(eigvals2, 0.0, None))[:, np.newaxis, :]
+
+            tmp_Vtau2 = factor2 @ W2
+            tmp_Vtau2b = factor2 @ W2b
+
+        cutval2 = np.full((stop - start, n), np.nan)
+        cutvalone2 = np.full((stop - start, n), np.nan)
+        cutvaluniform2 = np.full(stop - start, np.nan)
+        ranked = np.flatnonzero(~failed2)
+
+        # The engine's CI kernels, one problem at a time
+        def pairwise_cut_values(c):
+            GMvecmax2, GMvecmaxone2 = pairwise_max_statistics(tmp_Vtau2[c], sdmatrix2[c], dval2[c])
+            cutval2[c] = np.quantile(GMvecmax2, 0.95, axis=1)
+            cutvalone2[c] = np.quantile(GMvecmaxone2, 0.95, axis=1)
+
+        def uniform_cut_value(c):
+            cutvaluniform2[c] = np.quantile(uniform_max_statistic(tmp_Vtau2b[c], sdmatrix2[c], dval2[c]), 0.95)
+
+        with timer.stage('ci'):
+            _map_problems(pairwise_cut_values, ranked, workers)
+            theta_z2 = (thetahat2[:, np.newaxis, :] - thetahat2[:, :, np.newaxis]) / sdmatrix2
+            theta_z2[:, diag_idx, diag_idx] = np.nan
+            RR2[start:stop, 2, :] = 1 + np.sum(theta_z2 > cutval2[:, :, np.newaxis], axis=2)
+            RR2[start:stop, 3, :] = n - np.sum(theta_z2 < -cutval2[:, :, np.newaxis], axis=2)
+            RR2[start:stop, 4, :] = 1 + np.sum(theta_z2 > cutvalone2[:, :, np.newaxis], axis=2)
+
+        with timer.stage('uniform_ci'):
+            _map_problems(uniform_cut_value, ranked, workers)
+            RR2[start:stop, 5, :] = 1 + np.sum(theta_z2 > cutvaluniform2[:, np.newaxis, np.newaxis], axis=2)
+
+        for c in np.flatnonzero(failed2):
+            errors.setdefault(start + c, "Linear algebra did not converge")
+
+    RR2[failed] = np.nan
+    if diagnostics is not None:
+        diagnostics['pihat'] = pihats2
+        diagnostics['residual'] = residuals2
+        diagnostics['solver_seconds'] = solver_seconds
+        diagnostics['errors'] = errors
+        diagnostics['stages'] = timer.summary()
+    return RR2
+
+
+def _map_problems(func, problems, workers):
+    if workers is None:
+        for c in problems:
+            func(c)
+    else:
+        # The elementwise kernels release the GIL
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(func, problems))
+
+
+def rank_batch(stats: RowStatistics, subsets: Sequence[Sequence[str]], B=2000, seed=42,
+               batch_size: Optional[int] = None, workers: Optional[int] = None,
+               errors: Optional[dict] = None) -> List[Optional[RankingResult]]:
+    """
+    Rank methods on many subsets of rows in one batched engine call
+
+    Args:
+        stats: RowStatistics from row_statistics or load_row_statistics
+        subsets: row label subsets, e.g. benchmark combinations
+        B: number of bootstrap samples
+        seed: seed of the np.random.RandomState shared by all subsets
+        batch_size: subsets per vectorized pass (default: batch_size_for)
+        workers: threads for the bootstrap maxima (see batch_spectrum_method)
+        errors: optional dict that receives {subset index: error message} for
+            the subsets that could not be ranked
+
+    Returns:
+        list with one RankingResult per subset, matching rank_subset(stats,
+        subset, B=B, seed=seed, bootstrap='covariance'), or None where the
+        subset failed. Solver seconds, runtime_sec and the stage wall/CPU
+        times are the batch totals divided evenly over the subsets; peak_rss_mb
+        (and stage peak memory, if traced) are those of the batch.
+    """
+    start_time = time.time()
+    if len(stats.methods) < 2:
+        raise ValueError("At least two methods are required")
+    if len(subsets) == 0:
+        return []
+    timer = StageTimer()
+
+    with timer.stage('process_data'):
+        # Subset indicator matrix times the per-row counts sums every subset at once
+        membership = np.zeros((len(subsets), len(stats.rows)))
+        for c, subset in enumerate(subsets):
+            membership[c, stats.row_index(subset)] = 1.0
+        wins = (membership @ stats.wins.reshape(len(stats.rows), -1)).reshape(
+            (len(subsets),) + stats.wins.shape[1:])
+
+    diagnostics = {}
+    RR2 = batch_spectrum_method(wins, B=B, random_state=np.random.RandomState(seed), batch_size=batch_size,
+                                workers=workers, diagnostics=diagnostics, timer=timer)
+    runtime_sec = (time.time() - start_time) / len(subsets)
+    solver_seconds = diagnostics['solver_seconds'] / len(subsets)
+    stages = {
+        name: dict(stage, wall_sec=stage['wall_sec'] / len(subsets), cpu_sec=stage['cpu_sec'] / len(subsets))
+        for name, stage in diagnostics['stages'].items()
+    }
+    rss_mb = peak_rss_mb()
+    if errors is not None:
+        errors.update(diagnostics['errors'])
+
+    results = []
+    for c, subset in enumerate(subsets):
+        if c in diagnostics['errors']:
+            results.append(None)
+            continue
+        results.append(RankingResult(
+            methods=stats.methods,
+            theta_hat=RR2[c, 0, :],
+            rank=RR2[c, 1, :].astype(np.int64),
+            ci_two_sided=RR2[c, 2:4, :].T.astype(np.int64),
+            ci_left=RR2[c, 4, :].astype(np.int64),
+            ci_uniform_left=RR2[c, 5, :].astype(np.int64),
+            params={
+                "bigbetter": bool(stats.bigbetter),
+                "B": B,
+                "seed": seed,
+                "bootstrap": 'covariance',
+                "workers": None,
+                "chunk_size": None,
+                "compress": True,
+                "solver": 'svd'
+            },
+            metadata={
+                "n_samples": len(subset),
+                "k_methods": len(stats.methods),
+                "n_comparisons": int(np.sum(wins[c])),
+                "n_unique_comparisons": int(np.count_nonzero(wins[c])),
+                "solver": {
+                    'solver': 'svd',
+                    'fallback_from': None,
+                    'iterations': None,
+                    'converged': True,
+                    'residual': float(diagnostics['residual'][c]),
+                    'tol': None,
+                    'maxiter': None,
+                    'warm_start': False,
+                    'seconds': solver_seconds,
+                },
+                "stages": stages,
+                "peak_rss_mb": rss_mb,
+                "runtime_sec": runtime_sec
+            }
+        ))
+    return results
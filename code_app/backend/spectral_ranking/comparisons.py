@@ -0,0 +1,195 @@
+"""
+Comparison graph construction
+
+Turns a score matrix (rows x methods) into the pairwise comparisons used by
+the spectral ranking engine, either as a compact edge list or as the dense
+AA/WW matrices of ranking_cli.R.
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+from scipy import sparse
+
+
+def _comparison_indices(scores, bigbetter=False):
+    """
+    Enumerate all valid pairwise comparisons of a score matrix in one pass
+
+    Pairs follow R's combn order within each row and rows are visited in order,
+    so the flattened result matches the row-by-row construction in ranking_cli.R.
+
+    Args:
+        scores: 2-D numpy array (rows x methods)
+        bigbetter: boolean, whether higher values are better
+
+    Returns:
+        tuple (i, j, winner) of flat index arrays, one entry per comparison
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    first, second = np.triu_indices(scores.shape[1], k=1)
+
+    left = scores[:, first]
+    right = scores[:, second]
+    valid_mask = ~(np.isnan(left) | np.isnan(right))
+    condition = left > right
+
+    if bigbetter:
+        # Higher values are better
+        winner = np.where(condition, first, second)
+    else:
+        # Lower values are better (default)
+        winner = np.where(condition, second, first)
+
+    # Row-major boolean indexing keeps row order, then combn order within a row
+    n_rows = scores.shape[0]
+    i = np.broadcast_to(first, (n_rows, len(first)))[valid_mask]
+    j = np.broadcast_to(second, (n_rows, len(second)))[valid_mask]
+    return i, j, winner[valid_mask]
+
+
+class ComparisonEdges(NamedTuple):
+    """
+    Compact comparison list: one (i, j, winner) entry per row of AA/WW
+
+    With counts, each entry stands for counts[l] identical comparisons (see
+    compress_comparisons); len() is always the number of entries.
+    """
+    i: np.ndarray
+    j: np.ndarray
+    winner: np.ndarray
+    n_methods: int
+    counts: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return len(self.i)
+
+    @property
+    def n_comparisons(self):
+        """Number of comparisons represented, counting multiplicities"""
+        return len(self.i) if self.counts is None else int(np.sum(self.counts))
+
+
+def comparison_edges(data, bigbetter=False):
+    """
+    Process data into a compact comparison edge list
+
+    Args:
+        data: pandas DataFrame
+        bigbetter: boolean, whether higher values are better
+
+    Returns:
+        dict with the ComparisonEdges and column indices
+    """
+    Idx = np.array(data.columns.tolist())
+    i, j, winner = _comparison_indices(data.to_numpy(dtype=np.float64), bigbetter=bigbetter)
+
+    return {
+        'edges': ComparisonEdges(i.astype(np.int32), j.astype(np.int32), winner.astype(np.int32), len(Idx)),
+        'idx': Idx
+    }
+
+
+def process_data(data, bigbetter=False):
+    """
+    Process data to create comparison matrices (matching R implementation)
+
+    Args:
+        data: pandas DataFrame
+        bigbetter: boolean, whether higher values are better
+
+    Returns:
+        dict with aa, ww matrices and column indices
+    """
+    Idx = np.array(data.columns.tolist())
+    numidx = len(Idx)
+
+    i, j, winner = _comparison_indices(data.to_numpy(dtype=np.float64), bigbetter=bigbetter)
+    rows = np.arange(len(i))
+
+    xx = np.zeros((len(i), numidx))
+    ww = np.zeros((len(i), numidx))
+    xx[rows, i] = 1
+    xx[rows, j] = 1
+    ww[rows, winner] = 1
+
+    return {
+        'aa': xx,
+        'ww': ww,
+        'idx': Idx
+    }
+
+
+def as_comparison_edges(AA2, WW2=None):
+    """
+    Convert AA/WW comparison matrices (dense or scipy sparse) to ComparisonEdges
+
+    Every row of AA2 must hold exactly two nonzeros (the compared methods) and
+    the matching row of WW2 exactly one (the winner). ComparisonEdges pass through.
+    """
+    if isinstance(AA2, ComparisonEdges):
+        return AA2
+
+    n_methods = AA2.shape[1]
+    if sparse.issparse(AA2):
+        aa = sparse.csr_matrix(AA2)
+        ww = sparse.csr_matrix(WW2)
+        aa.eliminate_zeros()
+        ww.eliminate_zeros()
+        aa.sort_indices()
+        if np.any(np.diff(aa.indptr) != 2) or np.any(np.diff(ww.indptr) != 1):
+            raise ValueError("Each comparison row needs two entries in AA and one in WW")
+        pair_cols = aa.indices.reshape(-1, 2)
+        winner = ww.indices
+    else:
+        aa = np.asarray(AA2)
+        ww = np.asarray(WW2)
+        if np.any(np.count_nonzero(aa, axis=1) != 2) or np.any(np.count_nonzero(ww, axis=1) != 1):
+            raise ValueError("Each comparison row needs two entries in AA and one in WW")
+        pair_cols = np.nonzero(aa)[1].reshape(-1, 2)
+        winner = np.argmax(ww != 0, axis=1)
+
+    return ComparisonEdges(
+        pair_cols[:, 0].astype(np.int32),
+        pair_cols[:, 1].astype(np.int32),
+        np.asarray(winner, dtype=np.int32),
+        n_methods
+    )
+
+
+def compress_comparisons(edges):
+    """
+    Collapse repeated comparisons into unique (i, j, winner) triples with counts
+
+    The result has at most k^2 entries however many rows the scores had.
+    Entries come out sorted by (i, j, winner), not in row order.
+    """
+    if edges.counts is not None:
+        return edges
+
+    n = edges.n_methods
+    code = (edges.i.astype(np.int64) * n + edges.j) * n + edges.winner
+    unique_code, counts = np.unique(code, return_counts=True)
+    winner = unique_code % n
+    pair = unique_code // n
+    return ComparisonEdges(
+        (pair // n).astype(np.int32),
+        (pair % n).astype(np.int32),
+        winner.astype(np.int32),
+        n,
+        counts.astype(np.float64)
+    )
+
+
+def win_count_matrix(edges):
+    """
+    Aggregate comparisons into a sparse n x n win-count matrix
+
+    Entry (a, b) counts the comparisons between a and b that b won, so the
+    pair counts are C + C.T and the method degrees are their row sums.
+    """
+    n = edges.n_methods
+    loser = edges.i + edges.j - edges.winner
+    # A single bincount over the flattened (loser, winner) cell index
+    flat = loser.astype(np.int64) * n + edges.winner
+    counts = np.bincount(flat, weights=edges.counts, minlength=n * n).astype(np.float64).reshape((n, n))
+    return sparse.csr_matrix(counts)
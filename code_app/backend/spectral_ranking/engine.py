@@ -0,0 +1,234 @@
+"""
+Vanilla spectral ranking method (Python port of ranking_cli.R)
+"""
+import numpy as np
+from scipy import sparse
+from scipy.stats import rankdata
+
+from .bootstrap import (
+    BOOTSTRAP_MODES,
+    bootstrap_covariance,
+    bootstrap_draws,
+    covariance_factor,
+    pairwise_max_statistics,
+    parallel_bootstrap_draws,
+    uniform_max_statistic,
+)
+from .comparisons import as_comparison_edges, compress_comparisons, win_count_matrix
+from .instrument import StageTimer
+from .solvers import SOLVERS, stationary_distribution
+
+
+def vanilla_spectrum_method(AA2, WW2, Idx, B=2000, bootstrap='multiplier', max_bootstrap_mem_mb=None,
+                            workers=None, seed=None, chunk_size=None, random_state=None, compress=False,
+                            solver='svd', solver_tol=None, solver_maxiter=None, pi0=None, diagnostics=None,
+                            progress=None, timer=None):
+    """
+    Vanilla spectral ranking method
+
+    The comparisons can be given as dense or scipy sparse AA/WW matrices or as
+    ComparisonEdges (with WW2=None); every stage works on the edge list, so the
+    L x n matrices are never materialized.
+
+    Args:
+        AA2: adjacency matrix, or ComparisonEdges
+        WW2: weight matrix (ignored for ComparisonEdges)
+        Idx: method names
+        B: number of bootstrap samples
+        bootstrap: 'multiplier' (default) or 'covariance'
+        max_bootstrap_mem_mb: cap on the normal matrix held at once by each
+            bootstrap pass (None: generate it in one piece)
+        workers: number of threads for the bootstrap (None: sequential draws
+            from random_state)
+        seed: seed of the numpy SeedSequence used when workers is set
+        chunk_size: replicates per parallel chunk (default: B / workers,
+            shrunk to fit max_bootstrap_mem_mb). Parallel results are
+            reproducible for a given (seed, chunk_size).
+        random_state: np.random.RandomState for the sequential bootstrap
+            (None: the global np.random stream, seeded by the caller)
+        compress: collapse repeated (i, j, winner) comparisons into counted
+            triples first (see below)
+        solver: stationary distribution solver, one of SOLVERS ('svd', the
+            dense reference, or the sparse 'power', 'arpack', 'lobpcg')
+        solver_tol, solver_maxiter: tolerance and iteration cap of the
+            iterative solvers (see solvers.stationary_distribution)
+        pi0: warm start for the iterative solvers, e.g. pi of a related ranking
+        diagnostics: optional dict that receives the solver diagnostics
+            ('solver' entry), the stationary distribution ('pihat') and the
+            per-stage timings ('stages', see instrument.StageTimer)
+        progress: optional callback progress(stage, done, total) for stage
+            start/end events and the bootstrap (replicates drawn out of 2 B:
+            one set for the two-sided/left CIs, one for the uniform CI) and
+            CI progress (see instrument.StageTimer)
+        timer: StageTimer that measures the stages (default: a new one
+            reporting to progress), e.g. one that already timed the ingest
+
+    Bootstrap modes:
+        multiplier draws W ~ N(0, I_L) per replicate and forms (V / tau)^T W,
+        as in ranking_cli.R. Conditionally on the data each replicate is
+        therefore exactly N(0, Sigma) with Sigma = (V / tau)^T (V / tau).
+        covariance forms that k x k Sigma once from the win counts and samples
+        F z with F F^T = Sigma, z ~ N(0, I_k). The replicates have the same
+        distribution, so the CIs agree up to Monte Carlo error. The random
+        stream differs, and the cost is O(k^2 B) instead of O(L B).
+
+    Compression:
+        c identical comparisons contribute c identical rows v to V, and
+        v^T (w_1 + ... + w_c) with i.i.d. standard normals w is distributed
+        as sqrt(c) v^T w. A counted triple therefore enters V once, scaled
+        by sqrt(c), and the multiplier bootstrap stays exact in distribution
+        with L bounded by k^2. Estimates are unchanged; the random stream,
+        and so the CIs up to Monte Carlo error, differ from the uncompressed
+        run. ComparisonEdges that already carry counts are always used as such.
+
+    Returns:
+        numpy array with ranking results
+    """
+    if bootstrap not in BOOTSTRAP_MODES:
+        raise ValueError(f"Unknown bootstrap mode: {bootstrap}")
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+
+    if timer is None:
+        timer = StageTimer(progress=progress)
+
+    # Compute matrix P from the pairwise win counts
+    with timer.stage('build_p'):
+        edges = as_comparison_edges(AA2, WW2)
+        if compress:
+            edges = compress_comparisons(edges)
+        n = edges.n_methods
+        L2 = len(edges)
+        fA2 = 2.0  # weight for vanilla spectral method (same for every comparison)
+
+        wins2 = win_count_matrix(edges)
+        pairs2 = (wins2 + wins2.T).tocoo()
+        degree2 = np.asarray(pairs2.sum(axis=1)).ravel()
+        dval2 = 2.0 * np.max(degree2)
+        if solver == 'svd':
+            P2 = wins2.toarray() / fA2 / dval2
+            P2[np.diag_indices(n)] = 1.0 - np.sum(P2, axis=1)
+        else:
+            # The iterative solvers only need products with P, so it stays sparse
+            # (O(nnz) memory) for large k
+            P2 = (wins2 / fA2 / dval2).tocsr()
+            P2 = (P2 + sparse.diags(1.0 - np.asarray(P2.sum(axis=1)).ravel())).tocsr()
+
+    with timer.stage('eigen_solve'):
+        pihat2, solver_info = stationary_distribution(P2, solver=solver, tol=solver_tol,
+                                                      maxiter=solver_maxiter, x0=pi0)
+        if diagnostics is not None:
+            diagnostics['solver'] = solver_info
+            diagnostics['pihat'] = pihat2
+
+        # Handle potential zero or very small values to avoid -Inf in log
+        pihat2 = np.maximum(pihat2, np.finfo(np.float64).eps)
+
+        thetahat2 = np.log(pihat2) - np.mean(np.log(pihat2))
+
+        # Output matrix
+        RR2 = np.zeros((6, n))
+
+        # Ranking (higher theta = better rank); tied methods share the best of
+        # their positions, so ranks are whole numbers (as in ranking_cli.R)
+        RR2[0, :] = thetahat2
+        RR2[1, :] = rankdata(-thetahat2, method='min')
+
+    # Compute variance estimates: every comparison of method o with m has
+    # pivec = pi_o + pi_m (as in ranking_cli.R), so tau and var only need the
+    # pair counts between o and m
+    with timer.stage('variance'):
+        pi_o = pihat2[pairs2.row]
+        pi_m = pihat2[pairs2.col]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tau_terms = np.nan_to_num(pairs2.data * (1 - pi_o / (pi_o + pi_m)) * pi_o / fA2, nan=0.0)
+        tauhatvec2 = np.bincount(pairs2.row, weights=tau_terms, minlength=n) / dval2
+
+        var_sum2 = np.bincount(pairs2.row, weights=pairs2.data * pi_m / fA2 / fA2, minlength=n)
+        # A method without comparisons has tau = 0: its variance is unbounded,
+        # so no difference to it is significant and its CIs span every rank
+        compared2 = tauhatvec2 > 0
+        tmp_var2 = np.divide(var_sum2 * pihat2 / dval2 / dval2, tauhatvec2 * tauhatvec2,
+                             out=np.full(n, np.inf), where=compared2)
+
+        sigmahatmatrix2 = np.tile(tmp_var2, (n, 1)) + np.tile(tmp_var2, (n, 1)).T
+
+    # Progress of each pass in replicates; the second pass counts from B
+    def draw_progress2(done, total):
+        timer.report('bootstrap', B * done // total, 2 * B)
+
+    def draw_progress2b(done, total):
+        timer.report('bootstrap', B + B * done // total, 2 * B)
+
+    def ci_progress2(done, total):
+        timer.report('ci', done, total)
+
+    with timer.stage('bootstrap', total=2 * B):
+        if bootstrap == 'multiplier':
+            # Vmatrix2 has two nonzeros per comparison row, one for each participant
+            pi_i = pihat2[edges.i]
+            pi_j = pihat2[edges.j]
+            tmp_pivec2 = pi_i + pi_j
+            v_i = ((edges.winner == edges.i) * tmp_pivec2 - pi_i) / fA2
+            v_j = ((edges.winner == edges.j) * tmp_pivec2 - pi_j) / fA2
+            if edges.counts is not None:
+                # Sum of c i.i.d. multipliers on identical rows ~ sqrt(c) times one
+                v_i = v_i * np.sqrt(edges.counts)
+                v_j = v_j * np.sqrt(edges.counts)
+            rows = np.arange(L2)
+            Vmatrix2 = sparse.csr_matrix(
+                (np.concatenate([v_i, v_j]), (np.concatenate([rows, rows]), np.concatenate([edges.i, edges.j]))),
+                shape=(L2, n)
+            )
+            # CSC, so the chunked bootstrap can slice comparison columns cheaply
+            # Without comparisons (tau = 0) the method's column is empty; its draws stay 0
+            inv_tau2 = np.divide(1.0, tauhatvec2, out=np.zeros(n), where=compared2)
+            draw_operator2 = (Vmatrix2 @ sparse.diags(inv_tau2)).T.tocsc()
+        else:
+            draw_operator2 = covariance_factor(bootstrap_covariance(wins2, pihat2, tauhatvec2, fA2))
+
+        # Weighted bootstrap for confidence intervals; the second set of draws
+        # feeds the uniform left-sided CI
+        if workers is None:
+            tmp_Vtau2 = bootstrap_draws(draw_operator2, B, max_mem_mb=max_bootstrap_mem_mb,
+                                        random_state=random_state, progress=draw_progress2)
+            tmp_Vtau2b = bootstrap_draws(draw_operator2, B, max_mem_mb=max_bootstrap_mem_mb,
+                                         random_state=random_state, progress=draw_progress2b)
+        else:
+            seq2, seq2b = np.random.SeedSequence(seed).spawn(2)
+            tmp_Vtau2, _ = parallel_bootstrap_draws(draw_operator2, B, seq2, workers, chunk_size,
+                                                    max_mem_mb=max_bootstrap_mem_mb, progress=draw_progress2)
+            tmp_Vtau2b, _ = parallel_bootstrap_draws(draw_operator2, B, seq2b, workers, chunk_size,
+                                                     max_mem_mb=max_bootstrap_mem_mb, progress=draw_progress2b)
+
+    with timer.stage('ci', total=n):
+        sdmatrix2 = np.sqrt(sigmahatmatrix2)
+        GMvecmax2, GMvecmaxone2 = pairwise_max_statistics(tmp_Vtau2, sdmatrix2, dval2, progress=ci_progress2)
+
+        cutval2 = np.quantile(GMvecmax2, 0.95, axis=1)
+        cutvalone2 = np.quantile(GMvecmaxone2, 0.95, axis=1)
+
+        # Standardized differences theta_m - theta_o, excluding m == o
+        theta_z2 = (thetahat2[np.newaxis, :] - thetahat2[:, np.newaxis]) / sdmatrix2
+        np.fill_diagonal(theta_z2, np.nan)
+
+        R_left_m2 = 1 + np.sum(theta_z2 > cutval2[:, np.newaxis], axis=1)
+        R_right_m2 = n - np.sum(theta_z2 < -cutval2[:, np.newaxis], axis=1)
+        R_left_one_m2 = 1 + np.sum(theta_z2 > cutvalone2[:, np.newaxis], axis=1)
+
+    # Uniform left-sided CI
+    with timer.stage('uniform_ci'):
+        GMmaxone2 = uniform_max_statistic(tmp_Vtau2b, sdmatrix2, dval2)
+        cutvaluniform2 = np.quantile(GMmaxone2, 0.95)
+        R_left_one2 = 1 + np.sum(theta_z2 > cutvaluniform2, axis=1)
+
+    RR2[2, :] = R_left_m2
+    RR2[3, :] = R_right_m2
+    RR2[4, :] = R_left_one_m2
+    RR2[5, :] = R_left_one2
+
+    if diagnostics is not None:
+        diagnostics['stages'] = timer.summary()
+    return RR2
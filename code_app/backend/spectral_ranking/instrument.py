@@ -0,0 +1,123 @@
+"""
+Stage timing and progress events of a ranking run
+
+A StageTimer measures the engine stages
+
+    ingest        reading the scores (CSV) into memory
+    process_data  score columns and pairwise comparisons (plus compression)
+    build_p       comparison edges, win counts and the transition matrix P
+    eigen_solve   stationary distribution, theta and the point ranking
+    variance      tau and the pairwise standard deviations
+    bootstrap     the two sets of B bootstrap replicates
+    ci            bootstrap maxima, two-sided and left-sided CIs
+    uniform_ci    uniform maxima and the uniform left-sided CI
+
+and records wall time and CPU time (time.process_time, so it counts every
+thread of the process) for each. With memory=True (ranking_cli.py
+--progress) it also records peak memory: the highest amount the stage
+allocated on top of what was live when it started, as traced by tracemalloc
+(NumPy buffers included). tracemalloc slows every allocation down and is
+global to the process, so concurrent rankings would overlap their peaks;
+it is off by default and jobs report the process's peak_rss_mb instead.
+summary() is what rank() writes to metadata['stages'] of
+ranking_results.json, next to peak_rss_mb.
+
+The optional progress callback progress(stage, done, total) gets a start
+(done 0) and an end (done == total) event for every stage, and intermediate
+events for the bootstrap (replicates out of 2 B) and the CI stage (methods
+out of k). Stages that run again (e.g. process_data in the caller and in
+rank()) accumulate.
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ('ingest', 'process_data', 'build_p', 'eigen_solve', 'variance', 'bootstrap', 'ci', 'uniform_ci')
+
+# tracemalloc is process-wide: it runs while any StageTimer measures memory
+# (and is left alone if someone else started it)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+def _start_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+def peak_rss_mb():
+    """High-water resident set size of this process in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 2 ** 10
+
+
+class StageTimer:
+    """Per-stage wall time and CPU time (plus peak traced memory with memory=True), and progress events"""
+
+    def __init__(self, progress=None, memory=False):
+        self.progress = progress
+        self.memory = memory
+        self._stages = {}
+        self._last_event = None
+
+    @contextmanager
+    def stage(self, name, total=1):
+        """Measure the enclosed block as stage name (total: units of its progress events)"""
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage: {name}. Expected one of {', '.join(STAGES)}")
+        self.report(name, 0, total)
+        if self.memory:
+            _start_tracing()
+            tracemalloc.reset_peak()
+            traced_start = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield self
+        finally:
+            wall_sec = time.perf_counter() - wall_start
+            cpu_sec = time.process_time() - cpu_start
+            peak_mb = None
+            if self.memory:
+                peak_mb = (tracemalloc.get_traced_memory()[1] - traced_start) / 2 ** 20
+                _stop_tracing()
+            stats = self._stages.setdefault(name, {'wall_sec': 0.0, 'cpu_sec': 0.0, 'peak_mem_mb': None})
+            stats['wall_sec'] += wall_sec
+            stats['cpu_sec'] += cpu_sec
+            if peak_mb is not None:
+                stats['peak_mem_mb'] = max(stats['peak_mem_mb'] or 0.0, peak_mb)
+        self.report(name, total, total)
+
+    def report(self, name, done, total):
+        """Forward a progress event of stage name to the callback (repeats are dropped)"""
+        if self.progress is not None and (name, done, total) != self._last_event:
+            self._last_event = (name, done, total)
+            self.progress(name, done, total)
+
+    def summary(self):
+        """{stage: {'wall_sec', 'cpu_sec', 'peak_mem_mb'}} of the measured stages, in stage order"""
+        return {name: dict(self._stages[name]) for name in STAGES if name in self._stages}
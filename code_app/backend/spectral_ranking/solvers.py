@@ -0,0 +1,189 @@
+"""
+Stationary distribution solvers for the spectral ranking Markov chain
+
+pi solves pi^T P = pi^T for the row-stochastic comparison matrix P. The
+reference (ranking_cli.R) takes the last right singular vector of the dense
+(P - I)(P - I)^T, which costs O(k^3) time and O(k^2) memory and squares the
+condition number. The iterative solvers only need products with a sparse P:
+
+    svd     dense SVD of (P - I)(P - I)^T, as in ranking_cli.R (default)
+    power   power iteration on the half-lazy chain I + alpha (P - I), which
+            shares pi with P
+    arpack  scipy.sparse.linalg.eigs on P^T for the eigenvalue 1
+    lobpcg  scipy.sparse.linalg.lobpcg for the smallest eigenpair of the
+            (never formed) operator (P - I)(P - I)^T, polished by power
+            iteration on P itself
+
+LOBPCG needs a symmetric operator, and P is not reversible in general, so
+(P - I)(P - I)^T is the only symmetric operator it can use with pi as an
+extreme eigenvector; it squares the condition number of the eigenvalue
+problem. Its vector is therefore only a warm start: convergence is judged on
+the unsquared residual ||P^T pi - pi||_1 / ||pi||_1, and if that is above tol
+the power solver finishes the job from there.
+
+The iterative solvers report converged only when that residual is within tol
+(or within rounding of k for very small tol), whatever their own stopping
+rule said. arpack and lobpcg need a handful of methods to iterate at all
+(ARPACK needs k < n - 1, LOBPCG falls back to a dense solver below
+5 vectors); below ITERATIVE_SOLVER_MIN_K methods they use the svd solver and
+say so in the diagnostics ('fallback_from').
+
+All solvers return pi with unit 2-norm and nonnegative entries, the
+normalization of the SVD reference; every downstream quantity is invariant to
+the scale of pi.
+"""
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.linalg import svd
+from scipy.sparse.linalg import ArpackNoConvergence, LinearOperator, eigs, lobpcg
+
+SOLVERS = ('svd', 'power', 'arpack', 'lobpcg')
+DEFAULT_SOLVER_TOL = 1e-12
+DEFAULT_SOLVER_MAXITER = {'power': 100000, 'arpack': None, 'lobpcg': 2000}
+# Fewest methods arpack and lobpcg iterate on (the svd solver is used below)
+ITERATIVE_SOLVER_MIN_K = {'arpack': 3, 'lobpcg': 6}
+
+
+def stationary_residual(P2, pihat2):
+    """Relative residual ||P^T pi - pi||_1 / ||pi||_1"""
+    return float(np.sum(np.abs(P2.T @ pihat2 - pihat2)) / np.sum(np.abs(pihat2)))
+
+
+def _residual_tolerance(tol, n):
+    """Residual the iterative solvers must reach to count as converged"""
+    # A tol below the rounding error of an n-term product cannot be met
+    return max(tol, 16 * n * np.finfo(np.float64).eps)
+
+
+def _svd_solver(P2):
+    n = P2.shape[0]
+    P2 = P2.toarray() if sparse.issparse(P2) else P2
+    # In R: tmp.P2 <- t(t(P2) - diag(n)) %*% (t(P2) - diag(n)),
+    # i.e. (P2 - I) %*% (P2 - I)^T
+    tmp_P2 = (P2 - np.eye(n, dtype=np.float64)) @ (P2 - np.eye(n, dtype=np.float64)).T
+    U, s, Vt = svd(tmp_P2.astype(np.float64))
+    # R's v[, n] (last right singular vector) is the last row of Vt
+    return np.abs(Vt[-1, :]), None, True
+
+
+def _power_solver(P2, tol, maxiter, x0):
+    # I + alpha (P - I) has the same pi for any alpha > 0. P's diagonal is at
+    # least 3/4 by construction, so the chain barely moves per step; alpha
+    # rescales it to the smallest diagonal 1/2, which keeps it aperiodic
+    # and mixes 1 / (2 max(1 - diag)) times faster
+    diag2 = P2.diagonal()
+    alpha2 = 0.5 / max(np.max(1.0 - diag2), np.finfo(np.float64).eps)
+    PT2 = P2.T.tocsr() if sparse.issparse(P2) else P2.T
+    x = np.full(P2.shape[0], 1.0 / P2.shape[0]) if x0 is None else np.abs(x0) / np.sum(np.abs(x0))
+    for iteration in range(1, maxiter + 1):
+        x_next = x + alpha2 * (PT2 @ x - x)
+        x_next /= np.sum(x_next)
+        change = np.sum(np.abs(x_next - x))
+        x = x_next
+        if change < tol:
+            return x, iteration, True
+    return x, maxiter, False
+
+
+def _arpack_solver(P2, tol, maxiter, x0):
+    PT2 = sparse.csr_matrix(P2).T.tocsr()
+    # ARPACK's own start vector is random and its state carries over between
+    # calls; a fixed start keeps results reproducible
+    v0 = np.full(P2.shape[0], 1.0) if x0 is None else np.abs(x0)
+    try:
+        vals, vecs = eigs(PT2, k=1, which='LM', tol=tol, maxiter=maxiter, v0=v0)
+        converged = True
+    except ArpackNoConvergence as e:
+        if len(e.eigenvalues) == 0:
+            raise
+        vals, vecs, converged = e.eigenvalues, e.eigenvectors, False
+    return np.abs(np.real(vecs[:, 0])), None, converged
+
+
+def _lobpcg_solver(P2, tol, maxiter, x0):
+    n = P2.shape[0]
+    P2 = sparse.csr_matrix(P2)
+    PT2 = P2.T.tocsr()
+
+    def matvec(x):
+        # (P - I)(P - I)^T x without forming the product
+        y = PT2 @ x - x
+        return P2 @ y - y
+
+    A2 = LinearOperator((n, n), matvec=matvec, matmat=matvec, dtype=np.float64)
+    X = np.full((n, 1), 1.0) if x0 is None else np.abs(np.asarray(x0, dtype=np.float64)).reshape(n, 1)
+    # (eigenvalues, eigenvectors, residual history); scipy's dense fallback
+    # for small problems returns no history
+    result = lobpcg(A2, X, tol=tol, maxiter=maxiter, largest=False, retResidualNormsHistory=True)
+    pihat2 = np.abs(result[1][:, 0])
+    iterations = len(result[2]) if len(result) > 2 else None
+
+    if stationary_residual(P2, pihat2) > _residual_tolerance(tol, n):
+        # The squared operator left pi short of tol: polish on P itself
+        pihat2, power_iterations, _ = _power_solver(P2, tol, DEFAULT_SOLVER_MAXITER['power'], pihat2)
+        iterations = (iterations or 0) + power_iterations
+    return pihat2, iterations, True
+
+
+def stationary_distribution(P2, solver='svd', tol=None, maxiter=None, x0=None):
+    """
+    Stationary distribution of the Markov matrix P2 (dense or scipy sparse)
+
+    Args:
+        P2: k x k row-stochastic matrix
+        solver: one of SOLVERS
+        tol: convergence tolerance of the iterative solvers
+            (default DEFAULT_SOLVER_TOL)
+        maxiter: iteration cap (default DEFAULT_SOLVER_MAXITER[solver])
+        x0: optional warm start, e.g. pi from a related ranking (ignored by svd)
+
+    Returns:
+        tuple (pihat2, info); info holds the solver diagnostics (solver,
+        fallback_from, iterations, converged, residual, tol, maxiter,
+        warm_start, seconds); residual is ||P^T pi - pi||_1 / ||pi||_1
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}. Expected one of {', '.join(SOLVERS)}")
+    if tol is None:
+        tol = DEFAULT_SOLVER_TOL
+    if maxiter is None:
+        maxiter = DEFAULT_SOLVER_MAXITER.get(solver)
+    if x0 is not None:
+        x0 = np.asarray(x0, dtype=np.float64)
+        if x0.shape != (P2.shape[0],) or not np.all(np.isfinite(x0)) or not np.any(x0):
+            x0 = None
+
+    fallback_from = None
+    if P2.shape[0] < ITERATIVE_SOLVER_MIN_K.get(solver, 0):
+        fallback_from, solver = solver, 'svd'
+
+    start_time = time.time()
+    if solver == 'svd':
+        pihat2, iterations, converged = _svd_solver(P2)
+    elif solver == 'power':
+        pihat2, iterations, converged = _power_solver(P2, tol, maxiter, x0)
+    elif solver == 'arpack':
+        pihat2, iterations, converged = _arpack_solver(P2, tol, maxiter, x0)
+    else:
+        pihat2, iterations, converged = _lobpcg_solver(P2, tol, maxiter, x0)
+    if solver != 'svd':
+        # Singular vectors already have unit norm; leave them bit-identical to R
+        pihat2 = pihat2 / np.linalg.norm(pihat2)
+    residual = stationary_residual(P2, pihat2)
+    if solver != 'svd':
+        converged = converged and residual <= _residual_tolerance(tol, P2.shape[0])
+
+    info = {
+        'solver': solver,
+        'fallback_from': fallback_from,
+        'iterations': iterations,
+        'converged': bool(converged),
+        'residual': residual,
+        'tol': None if solver == 'svd' else tol,
+        'maxiter': None if solver == 'svd' else maxiter,
+        'warm_start': x0 is not None and solver != 'svd',
+        'seconds': time.time() - start_time,
+    }
+    return pihat2, info
@@ -0,0 +1,37 @@
+"""
+Orderings of benchmark subsets for batches of related rankings
+
+Consecutive subsets in reflected Gray-code order differ by a single
+benchmark, so their comparison graphs, and hence their stationary
+distributions, are close. Walking a batch in this order lets each iterative
+solve start from the pi of the previous one (pi0 in rank()).
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def gray_code_subsets(items: Sequence, min_size: int = 1, max_size: Optional[int] = None) -> List[Tuple]:
+    """
+    All subsets of items with min_size <= size <= max_size in Gray-code order
+
+    Each subset keeps the order of items, so it is one of the tuples of
+    itertools.combinations(items, size). Subsets outside the size range are
+    skipped, so neighbours in the result differ by one item where the walk
+    allows and by a few otherwise.
+    """
+    n = len(items)
+    if max_size is None:
+        max_size = n
+    subsets = []
+    for step in range(1 << n):
+        code = step ^ (step >> 1)
+        members = tuple(items[b] for b in range(n) if code >> b & 1)
+        if min_size <= len(members) <= max_size:
+            subsets.append(members)
+    return subsets
+
+
+def warm_start(result) -> np.ndarray:
+    """pi0 for rank() from a RankingResult of the same methods (pi is proportional to exp(theta))"""
+    return np.exp(np.asarray(result.theta_hat, dtype=np.float64))
@@ -0,0 +1,134 @@
+"""
+Per-row sufficient statistics of the spectral ranking
+
+Row r of a score matrix (one benchmark) enters the ranking only through its
+k x k win-count matrix C_r, where C_r[a, b] = 1 if a and b were compared in
+row r and b won (see win_count_matrix). For any subset S of rows
+
+    C_S = sum of C_r over r in S
+
+determines everything the engine uses: the pair counts and degrees are
+C_S + C_S^T, P is built from C_S, and the counted (i, j, winner) triples of
+compress_comparisons, which drive both bootstrap modes, are the nonzero
+cells of C_S. A subset is therefore ranked from O(|S| k^2) additions, without
+re-reading or re-comparing the scores, and the result is identical to
+rank(scores[S], compress=True).
+"""
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .comparisons import ComparisonEdges, _comparison_indices
+
+
+class RowStatistics(NamedTuple):
+    """Win-count matrices of every row of a score matrix"""
+    methods: np.ndarray  # k method names
+    rows: np.ndarray  # R row labels (e.g. benchmark names)
+    wins: np.ndarray  # R x k x k, wins[r, a, b]: b beat a in row r
+    bigbetter: bool
+
+    def row_index(self, rows: Sequence) -> np.ndarray:
+        """Positions of the given row labels"""
+        positions = {str(label): r for r, label in enumerate(self.rows)}
+        missing = [str(label) for label in rows if str(label) not in positions]
+        if missing:
+            raise KeyError(f"Unknown rows: {', '.join(missing)}")
+        return np.array([positions[str(label)] for label in rows], dtype=np.int64)
+
+    def win_counts(self, rows: Optional[Sequence] = None) -> np.ndarray:
+        """k x k win counts summed over the given rows (default: all rows)"""
+        if rows is None:
+            return self.wins.sum(axis=0, dtype=np.int64)
+        return self.wins[self.row_index(rows)].sum(axis=0, dtype=np.int64)
+
+    def comparison_edges(self, rows: Optional[Sequence] = None) -> ComparisonEdges:
+        """Counted comparisons of the given rows, as compress_comparisons would produce them"""
+        return counted_edges(self.win_counts(rows))
+
+
+def counted_edges(wins) -> ComparisonEdges:
+    """
+    Counted ComparisonEdges from a k x k win-count matrix
+
+    Entries are sorted by (i, j, winner) like compress_comparisons, so the
+    bootstrap consumes the random stream in the same order.
+    """
+    n = wins.shape[0]
+    loser, winner = np.nonzero(wins)
+    i = np.minimum(loser, winner)
+    j = np.maximum(loser, winner)
+    order = np.argsort((i.astype(np.int64) * n + j) * n + winner, kind='stable')
+    return ComparisonEdges(
+        i[order].astype(np.int32),
+        j[order].astype(np.int32),
+        winner[order].astype(np.int32),
+        n,
+        wins[loser[order], winner[order]].astype(np.float64)
+    )
+
+
+def row_statistics(scores, bigbetter=True, methods: Optional[Sequence[str]] = None,
+                   rows: Optional[Sequence[str]] = None) -> RowStatistics:
+    """
+    Precompute the per-row win-count matrices of a score matrix
+
+    Args:
+        scores: rows x methods array or DataFrame (NaN = missing); DataFrame
+            columns name the methods and its index labels the rows
+        bigbetter: whether higher scores are better
+        methods: method names for array input (default: "0", "1", ...)
+        rows: row labels (default: the DataFrame index, or "0", "1", ...)
+
+    Returns:
+        RowStatistics; wins is stored as uint8 since a row compares each
+        pair at most once
+    """
+    if hasattr(scores, 'columns'):
+        if methods is None:
+            methods = scores.columns.tolist()
+        if rows is None:
+            rows = scores.index.tolist()
+        scores = scores.to_numpy(dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    n_rows, n = scores.shape
+    if methods is None:
+        methods = [str(m) for m in range(n)]
+    if rows is None:
+        rows = [str(r) for r in range(n_rows)]
+    if len(methods) != n or len(rows) != n_rows:
+        raise ValueError(f"Got {len(methods)} method and {len(rows)} row names for a {n_rows} x {n} matrix")
+
+    wins = np.zeros((n_rows, n, n), dtype=np.uint8)
+    for r in range(n_rows):
+        i, j, winner = _comparison_indices(scores[r:r + 1], bigbetter=bigbetter)
+        wins[r, i + j - winner, winner] = 1
+
+    return RowStatistics(
+        np.array(methods, dtype=object),
+        np.array([str(label) for label in rows], dtype=object),
+        wins,
+        bool(bigbetter)
+    )
+
+
+def save_row_statistics(stats: RowStatistics, path):
+    """Write RowStatistics to a compressed .npz file"""
+    np.savez_compressed(
+        path,
+        methods=np.array(stats.methods, dtype=str),
+        rows=np.array(stats.rows, dtype=str),
+        wins=stats.wins,
+        bigbetter=np.array(stats.bigbetter)
+    )
+
+
+def load_row_statistics(path) -> RowStatistics:
+    """Read RowStatistics written by save_row_statistics"""
+    with np.load(path, allow_pickle=False) as data:
+        return RowStatistics(
+            data['methods'].astype(object),
+            data['rows'].astype(object),
+            data['wins'],
+            bool(data['bigbetter'])
+        )
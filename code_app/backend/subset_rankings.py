@@ -0,0 +1,172 @@
+"""
+On-demand spectral rankings of benchmark subsets
+
+Serves GET /api/rankings/{source}?benchmarks=a,b,c for any subset of a
+source's benchmarks instead of only the combinations precomputed by
+arena_ranking_single.py / huggingface_ranking_single.py. Each source's
+per-benchmark win-count matrices (spectral_ranking.RowStatistics) are loaded
+once, from the .npz written by the combination runner when it is newer than
+the processed CSV, or built from the CSV otherwise (in memory only: serving
+requests never writes to the data tree). A subset is then ranked
+from their sum (rank_subset), and results are memoized in an in-process LRU.
+
+The bootstrap uses the covariance mode: its cost is O(k^2 B) whatever the
+number of comparisons, and its replicates have the same distribution as the
+multiplier bootstrap of ranking_cli.R, so the CIs agree up to Monte Carlo
+error.
+"""
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from code_app.backend.spectral_ranking import (
+    RowStatistics,
+    load_row_statistics,
+    rank_subset,
+    row_statistics,
+)
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# source -> (processed CSV with one benchmark per row, row statistics file of the combination runner)
+RANKING_SOURCES = {
+    'arena': (
+        os.path.join(_PROJECT_ROOT, 'data_llm', 'data_arena', 'data_processing', 'arena_ranking_full.csv'),
+        os.path.join(_PROJECT_ROOT, 'data_llm', 'data_arena', 'data_ranking', 'current', 'arena_row_statistics.npz'),
+    ),
+    'huggingface': (
+        os.path.join(_PROJECT_ROOT, 'data_llm', 'data_huggingface', 'data_processing', 'huggingface_processed_top100.csv'),
+        os.path.join(_PROJECT_ROOT, 'data_llm', 'data_huggingface', 'data_ranking', 'current', 'huggingface_row_statistics.npz'),
+    ),
+}
+SUBSET_RANKING_CACHE_SIZE = int(os.getenv("SUBSET_RANKING_CACHE_SIZE", "256"))
+SUBSET_RANKING_BOOTSTRAP = 'covariance'
+
+
+class UnknownBenchmarksError(ValueError):
+    """A requested benchmark is not a row of the source's data"""
+
+
+_stats: Dict[str, Tuple[float, RowStatistics]] = {}
+_stats_lock = threading.Lock()
+_results: "OrderedDict[tuple, dict]" = OrderedDict()
+_results_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _build_statistics(source: str) -> RowStatistics:
+    csv_path, stats_path = RANKING_SOURCES[source]
+    if os.path.exists(stats_path) and os.path.getmtime(stats_path) >= os.path.getmtime(csv_path):
+        stats = load_row_statistics(stats_path)
+        if stats.bigbetter:
+            return stats
+
+    logger.info(f"Building row statistics for {source} from {csv_path}")
+    df = pd.read_csv(csv_path)
+    # First column holds the benchmark names, the rest are model scores
+    return row_statistics(df.set_index(df.columns[0]), bigbetter=True)
+
+
+def get_source_statistics(source: str) -> Tuple[float, RowStatistics]:
+    """
+    (version, RowStatistics) of a source, reloaded when its processed CSV changes
+
+    Raises:
+        KeyError: unknown source
+        FileNotFoundError: the processed CSV is missing
+    """
+    if source not in RANKING_SOURCES:
+        raise KeyError(source)
+    csv_path = RANKING_SOURCES[source][0]
+    version = os.path.getmtime(csv_path)
+    with _stats_lock:
+        cached = _stats.get(source)
+        if cached is None or cached[0] != version:
+            cached = (version, _build_statistics(source))
+            _stats[source] = cached
+        return cached
+
+
+def source_benchmarks(source: str) -> List[str]:
+    """Benchmark names of a source in CSV order"""
+    return [str(b) for b in get_source_statistics(source)[1].rows]
+
+
+def rank_benchmark_subset(source: str, benchmarks: Optional[Sequence[str]] = None,
+                          B: int = 2000, seed: int = 42) -> dict:
+    """
+    Spectral ranking and CIs of a source's models on a subset of its benchmarks
+
+    Args:
+        source: key of RANKING_SOURCES
+        benchmarks: benchmark names (any order, default: all)
+        B: number of bootstrap samples
+        seed: random seed
+
+    Returns:
+        dict in the ranking_results.json schema plus 'source' and
+        'benchmarks' (the subset in CSV order)
+
+    Raises:
+        KeyError: unknown source
+        UnknownBenchmarksError: a benchmark is not in the source
+    """
+    version, stats = get_source_statistics(source)
+    all_benchmarks = [str(b) for b in stats.rows]
+    if benchmarks is None:
+        selected = all_benchmarks
+    else:
+        requested = set(str(b) for b in benchmarks)
+        unknown = sorted(requested - set(all_benchmarks))
+        if unknown:
+            raise UnknownBenchmarksError(f"Unknown benchmarks for {source}: {', '.join(unknown)}")
+        # Canonical order, so permutations of a subset share a cache entry
+        selected = [b for b in all_benchmarks if b in requested]
+    if not selected:
+        raise UnknownBenchmarksError("At least one benchmark is required")
+
+    key = (source, version, tuple(selected), int(B), int(seed))
+    with _results_lock:
+        payload = _results.get(key)
+        if payload is not None:
+            _results.move_to_end(key)
+            _counters['hits'] += 1
+            return copy.deepcopy(payload)
+        _counters['misses'] += 1
+
+    start_time = time.time()
+    result = rank_subset(stats, selected, B=B, seed=seed, bootstrap=SUBSET_RANKING_BOOTSTRAP)
+    payload = result.to_payload()
+    payload['metadata']['runtime_sec'] = time.time() - start_time
+    payload['source'] = source
+    payload['benchmarks'] = selected
+
+    with _results_lock:
+        _results[key] = payload
+        _results.move_to_end(key)
+        while len(_results) > SUBSET_RANKING_CACHE_SIZE:
+            _results.popitem(last=False)
+            _counters['evictions'] += 1
+    return copy.deepcopy(payload)
+
+
+def subset_cache_stats() -> dict:
+    """Entries and hit/miss/eviction counters of the subset ranking memo"""
+    with _results_lock:
+        lookups = _counters['hits'] + _counters['misses']
+        return {
+            'entries': len(_results),
+            'max_entries': SUBSET_RANKING_CACHE_SIZE,
+            'hits': _counters['hits'],
+            'misses': _counters['misses'],
+            'evictions': _counters['evictions'],
+            'hit_rate': _counters['hits'] / lookups if lookups else 0.0,
+        }
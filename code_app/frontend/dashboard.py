@@ -1150,6 +1150,20 @@ def _load_huggingface_benchmark_matrix():
 
     return benchmarks, model_names, scores
 
+async def _fetch_subset_ranking(source: str, benchmark_keys: list) -> dict:
+    """Rank a benchmark subset on demand via the backend (GET /api/rankings/{source})."""
+    url = f'{API_BASE_URL}/api/rankings/{source}'
+    not_available = f'Combination results not available for {",".join(benchmark_keys)}'
+    try:
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(url, params={'benchmarks': ','.join(benchmark_keys)}) as resp:
+                if resp.status != 200:
+                    raise FileNotFoundError(f'{not_available}: HTTP {resp.status} - {await resp.text()}')
+                return await resp.json()
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        raise FileNotFoundError(f'{not_available}: {e}')
+
 def _fuzzy_find_model_index(model_name: str, model_names: list) -> int:
     """Find model index in model_names with simple fuzzy rules used elsewhere in this file."""
     if model_name in model_names:
@@ -1187,7 +1201,7 @@ def _fuzzy_find_model_index(model_name: str, model_names: list) -> int:
                 return i
     return -1
 
-def load_arena_combination_spectral_results(selected_virtual_keys: list, base_spectral_results: dict = None) -> dict:
+async def load_arena_combination_spectral_results(selected_virtual_keys: list, base_spectral_results: dict = None) -> dict:
     """Load spectral results for a selected Arena combination (2-6). If 7, return full results.
 
     - selected_virtual_keys: list of virtual benchmark keys (e.g., 'creative_writing_bt_prob').
@@ -1234,11 +1248,12 @@ def load_arena_combination_spectral_results(selected_virtual_keys: list, base_sp
         raise FileNotFoundError('Unrecognized benchmark keys in selection.')
     combination_name = "_".join(virtual_in_order)
     result_path = os.path.join(ALL_COMBINATIONS_DIR, combination_name, 'ranking_results.json')
-    if not os.path.exists(result_path):
-        raise FileNotFoundError(f'Combination results not found: {combination_name}')
-
-    with open(result_path, 'r') as f:
-        spectral_results = json.load(f)
+    if os.path.exists(result_path):
+        with open(result_path, 'r') as f:
+            spectral_results = json.load(f)
+    else:
+        # Not precomputed: rank the subset on demand
+        spectral_results = await _fetch_subset_ranking('arena', virtual_in_order)
 
     # Attach benchmark_scores (all 7 fields) and average for selected set
     vkey_to_idx = {v: i for i, v in enumerate(benchmarks_virtual)}
@@ -1269,7 +1284,7 @@ def load_arena_combination_spectral_results(selected_virtual_keys: list, base_sp
     spectral_results['methods'] = updated_methods
     return spectral_results
 
-def load_huggingface_combination_spectral_results(selected_benchmark_keys: list, base_spectral_results: dict = None) -> dict:
+async def load_huggingface_combination_spectral_results(selected_benchmark_keys: list, base_spectral_results: dict = None) -> dict:
     """Load spectral results for a selected Hugging Face combination (2-6). If 6, return full results.
 
     - selected_benchmark_keys: list of benchmark keys (e.g., 'ifeval', 'bbh').
@@ -1316,11 +1331,12 @@ def load_huggingface_combination_spectral_results(selected_benchmark_keys: list,
         raise FileNotFoundError('Unrecognized benchmark keys in selection.')
     combination_name = "_".join(bench_in_order)
     result_path = os.path.join(HF_ALL_COMBINATIONS_DIR, combination_name, 'ranking_results.json')
-    if not os.path.exists(result_path):
-        raise FileNotFoundError(f'Combination results not found: {combination_name}')
-
-    with open(result_path, 'r') as f:
-        spectral_results = json.load(f)
+    if os.path.exists(result_path):
+        with open(result_path, 'r') as f:
+            spectral_results = json.load(f)
+    else:
+        # Not precomputed: rank the subset on demand
+        spectral_results = await _fetch_subset_ranking('huggingface', bench_in_order)
 
     # Attach benchmark_scores (all 6 fields + average_score) and average for selected set
     bench_to_idx = {b: i for i, b in enumerate(benchmarks)}
@@ -1520,26 +1536,30 @@ def create_ranking_table(data, highlight_model: str = None):
                         ui.html('<div class="benchmark-selection-title">Select Benchmarks</div>')
                         ui.html('<div class="benchmark-selection-subtitle">Choose which virtual benchmarks to include in your spectral ranking analysis. You must select between 2 and 7 benchmarks.</div>')
 
-                def on_confirm_click():
+                async def on_confirm_click():
                     try:
                         selected_labels = [lbl for lbl, cb in checkbox_elements.items() if cb.value]
                         # Build selected virtual keys in CSV order
                         selected_virtual = [ARENA_DISPLAY_TO_VIRTUAL[lbl] for lbl in selected_labels]
 
-                        ranking_content_container.clear()
-                        with ranking_content_container:
-                            if len(selected_virtual) < 2:
-                                ui.html('<div style="padding:1rem; border:1px dashed #e2e8f0; border-radius:8px; color:#b91c1c; background:#fef2f2;">Please select at least two benchmarks.</div>')
-                                return
-
+                        # Load before touching the page: subsets that are not
+                        # precomputed are ranked by the backend meanwhile
+                        combo_results = None
+                        if len(selected_virtual) >= 2:
                             # Load base full results to enrich URLs if available
                             base_results = load_spectral_results(arena=True)
                             try:
-                                combo_results = load_arena_combination_spectral_results(selected_virtual, base_spectral_results=base_results)
+                                combo_results = await load_arena_combination_spectral_results(selected_virtual, base_spectral_results=base_results)
                             except Exception as e:
                                 ui.notify(f'Failed to load combination results: {e}', type='negative')
                                 return
 
+                        ranking_content_container.clear()
+                        with ranking_content_container:
+                            if combo_results is None:
+                                ui.html('<div style="padding:1rem; border:1px dashed #e2e8f0; border-radius:8px; color:#b91c1c; background:#fef2f2;">Please select at least two benchmarks.</div>')
+                                return
+
                             # Render table for the selected combination
                             try:
                                 create_spectral_ranking_table(data, combo_results, highlight_model=highlight_model, selected_benchmarks=selected_labels)
@@ -1568,7 +1588,7 @@ def create_ranking_table(data, highlight_model: str = None):
                             ui.html('<div class="benchmark-selection-title">Select Benchmarks</div>')
                             ui.html('<div class="benchmark-selection-subtitle">Choose which benchmarks to include in your spectral ranking analysis. You must select between 2 and 6 benchmarks.</div>')
 
-                    def hf_on_confirm_click():
+                    async def hf_on_confirm_click():
                         try:
                             selected_labels = [lbl for lbl, cb in hf_checkbox_elements.items() if cb.value]
                             # Convert display labels to benchmark keys
@@ -1582,20 +1602,23 @@ def create_ranking_table(data, highlight_model: str = None):
                             }
                             selected_keys = [hf_display_to_key[lbl] for lbl in selected_labels]
 
-                            ranking_content_container.clear()
-                            with ranking_content_container:
-                                if len(selected_keys) < 2:
-                                    ui.html('<div style="padding:1rem; border:1px dashed #e2e8f0; border-radius:8px; color:#b91c1c; background:#fef2f2;">Please select at least two benchmarks.</div>')
-                                    return
-
+                            # Load before touching the page (see on_confirm_click)
+                            combo_results = None
+                            if len(selected_keys) >= 2:
                                 # Load base full results to enrich URLs if available
                                 base_results = load_spectral_results(arena=False)
                                 try:
-                                    combo_results = load_huggingface_combination_spectral_results(selected_keys, base_spectral_results=base_results)
+                                    combo_results = await load_huggingface_combination_spectral_results(selected_keys, base_spectral_results=base_results)
                                 except Exception as e:
                                     ui.notify(f'Failed to load combination results: {e}', type='negative')
                                     return
 
+                            ranking_content_container.clear()
+                            with ranking_content_container:
+                                if combo_results is None:
+                                    ui.html('<div style="padding:1rem; border:1px dashed #e2e8f0; border-radius:8px; color:#b91c1c; background:#fef2f2;">Please select at least two benchmarks.</div>')
+                                    return
+
                                 # Render table for the selected combination
                                 try:
                                     create_spectral_ranking_table(data, combo_results, highlight_model=highlight_model, selected_benchmarks=selected_labels)
@@ -2882,8 +2905,82 @@ def create_huggingface_content(data):
                     </div>
                 ''')
 
+# Display names of the engine stages reported in job progress events
+JOB_STAGE_LABELS = {
+    'ingest': 'Reading data',
+    'process_data': 'Processing comparisons',
+    'build_p': 'Building the comparison matrix',
+    'eigen_solve': 'Solving for the scores',
+    'variance': 'Estimating variances',
+    'bootstrap': 'Bootstrap',
+    'ci': 'CI stage',
+    'uniform_ci': 'Uniform CI stage',
+}
+
+
+class JobEventStreamError(Exception):
+    """The job event stream could not be opened (http_status holds the response code)"""
+
+    def __init__(self, http_status: int, message: str):
+        super().__init__(message)
+        self.http_status = http_status
+
+
+async def stream_job_events(job_id: str, timeout_sec: float = 600):
+    """
+    Follow the server-sent events of a ranking or custom ranking job
+
+    Yields (event, data) tuples from /api/ranking/jobs/{job_id}/events:
+    'status', 'queue' and 'progress' while the job runs, then 'result' (the
+    results JSON) or 'error'. Raises JobEventStreamError when the stream is
+    refused (e.g. 404 for an unknown job) and asyncio.TimeoutError after
+    timeout_sec.
+    """
+    url = f'{API_BASE_URL}/api/ranking/jobs/{job_id}/events'
+    timeout = aiohttp.ClientTimeout(total=timeout_sec)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.get(url, headers={'Accept': 'text/event-stream'}) as resp:
+            if resp.status != 200:
+                raise JobEventStreamError(resp.status, f"Event stream failed: HTTP {resp.status} - {await resp.text()}")
+            # Read raw chunks: a result event can be longer than aiohttp's line limit
+            buffer = b''
+            event, data_lines = 'message', []
+            async for chunk in resp.content.iter_any():
+                # Split bytes before decoding, so a chunk may end inside a UTF-8 character
+                *lines, buffer = (buffer + chunk).split(b'\n')
+                for line in lines:
+                    line = line.decode('utf-8').rstrip('\r')
+                    if line.startswith('event:'):
+                        event = line[len('event:'):].strip()
+                    elif line.startswith('data:'):
+                        data_lines.append(line[len('data:'):].lstrip())
+                    elif not line and data_lines:
+                        yield event, json.loads('\n'.join(data_lines))
+                        event, data_lines = 'message', []
+
+
+def describe_job_event(event: str, data: dict):
+    """Short progress text for a job event (None when there is nothing to show)"""
+    if event == 'progress':
+        label = JOB_STAGE_LABELS.get(data.get('stage'), str(data.get('stage', '')).capitalize())
+        if data.get('total', 0) <= 1:
+            # Stage start/end events carry no count
+            return label
+        return f"{label} {data.get('done', 0)}/{data.get('total', 0)}"
+    if event == 'queue':
+        return f"Waiting in queue (position {data.get('position', 0) + 1})"
+    if event == 'status':
+        queue = data.get('queue') or {}
+        if queue.get('state') == 'queued':
+            return describe_job_event('queue', queue)
+        if data.get('progress'):
+            return describe_job_event('progress', data['progress'])
+        return data.get('message')
+    return None
+
+
 async def handle_custom_ranking(model_name_input, score_inputs, result_container, original_data):
-    """Handle the custom model ranking request with polling."""
+    """Handle the custom model ranking request, following the job's event stream."""
     # Collect data
     model_name = model_name_input.value
     scores = {key: input_el.value for key, input_el in score_inputs.items()}
@@ -2934,79 +3031,51 @@ async def handle_custom_ranking(model_name_input, score_inputs, result_container
                     error_text = await resp.text()
                     raise Exception(f"Job creation failed: HTTP {resp.status} - {error_text}")
 
-        # Step 2: Poll for status and results
-        max_attempts = 60  # 60 * 5 seconds = 5 minutes timeout
-        attempt = 0
-        start_poll_time = asyncio.get_event_loop().time()
+        # Step 2: Follow the job's event stream until it ends with the results
+        start_time = asyncio.get_event_loop().time()
         estimated_total_time = 40.0  # 40 seconds estimated total time
-
-        while attempt < max_attempts:
-            attempt += 1
-            current_time = asyncio.get_event_loop().time()
-            elapsed_time = current_time - start_poll_time
-
-            # Calculate progress (0-100%)
-            progress_percent = min(95, (elapsed_time / estimated_total_time) * 100)
+        new_ranking_data = None
+        detail = 'Running spectral ranking algorithm...'
+        engine_percent = 0.0
+
+        # The stream ends after the 'result' (or 'error') event
+        async for event, data in stream_job_events(job_id, timeout_sec=300):
+            if event == 'result':
+                new_ranking_data = data
+                continue
+            if event == 'error':
+                raise Exception(f"Analysis failed: {data.get('message', 'Unknown error')}")
+            detail = describe_job_event(event, data) or detail
+            if event == 'progress' and data.get('total'):
+                engine_percent = 100 * data['done'] / data['total']
+
+            # Engine progress when the job reports it, otherwise the elapsed share of the estimate
+            elapsed_time = asyncio.get_event_loop().time() - start_time
+            progress_percent = min(95, max(engine_percent, (elapsed_time / estimated_total_time) * 100))
             remaining_time = max(0, estimated_total_time - elapsed_time)
 
-            try:
-                # Update loading message with progress
-                with result_container:
-                    result_container.clear()
-                    with ui.element('div').classes('enhanced-loading-container'):
-                        with ui.element('div').classes('enhanced-loading-card'):
-                            with ui.element('div').classes('enhanced-loading-icon-container'):
-                                ui.html('<span class="material-symbols-outlined enhanced-loading-icon">analytics</span>')
-                                ui.html('<div class="enhanced-loading-dots"><span></span><span></span><span></span></div>')
-
-                            with ui.element('div').classes('enhanced-loading-text-container'):
-                                ui.html('<div class="enhanced-loading-title">Analyzing Your Model</div>')
-                                ui.html('<div class="enhanced-loading-subtitle">Running spectral ranking algorithm...</div>')
-                                ui.html('<div class="enhanced-loading-note">This may take up to a minute</div>')
-                                ui.html(f'<div class="enhanced-loading-note" style="font-size: 0.8rem; margin-top: 0.5rem;">Progress: {progress_percent:.1f}% complete • ~{remaining_time:.0f}s remaining</div>')
-
-                            # Enhanced progress bar with percentage
-                            with ui.element('div').classes('enhanced-loading-progress-container').props('key=progress-container'):
-                                with ui.element('div').classes('enhanced-loading-progress-bar-bg'):
-                                    ui.element('div').classes('enhanced-loading-progress-bar-fill').style(f'width: {progress_percent}%')
-                                ui.element('div').classes('enhanced-loading-progress-text').props(f'text="{progress_percent:.1f}%"')
-
-                # Check status
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(f'{API_BASE_URL}/api/ranking/custom/{job_id}/status', timeout=10) as resp:
-                        if resp.status == 200:
-                            status_data = await resp.json()
-                            status = status_data.get('status')
-                            message = status_data.get('message', '')
-
-                            if status == 'succeeded':
-                                # Job completed, get results
-                                async with session.get(f'{API_BASE_URL}/api/ranking/custom/{job_id}/results', timeout=30) as results_resp:
-                                    if results_resp.status == 200:
-                                        new_ranking_data = await results_resp.json()
-                                        break  # Exit polling loop
-                                    else:
-                                        error_text = await results_resp.text()
-                                        raise Exception(f"Failed to get results: HTTP {results_resp.status} - {error_text}")
-                            elif status == 'failed':
-                                raise Exception(f"Analysis failed: {message}")
-                            elif status == 'running':
-                                # Continue polling
-                                pass
-                            else:
-                                raise Exception(f"Unknown status: {status}")
-                        else:
-                            error_text = await resp.text()
-                            raise Exception(f"Status check failed: HTTP {resp.status} - {error_text}")
-
-                # Wait before next poll (5 seconds)
-                await asyncio.sleep(5)
-
-            except Exception as poll_error:
-                logger.warning(f"Polling attempt {attempt} failed: {poll_error}")
-                if attempt >= max_attempts:
-                    raise poll_error
-                await asyncio.sleep(5)
+            with result_container:
+                result_container.clear()
+                with ui.element('div').classes('enhanced-loading-container'):
+                    with ui.element('div').classes('enhanced-loading-card'):
+                        with ui.element('div').classes('enhanced-loading-icon-container'):
+                            ui.html('<span class="material-symbols-outlined enhanced-loading-icon">analytics</span>')
+                            ui.html('<div class="enhanced-loading-dots"><span></span><span></span><span></span></div>')
+
+                        with ui.element('div').classes('enhanced-loading-text-container'):
+                            ui.html('<div class="enhanced-loading-title">Analyzing Your Model</div>')
+                            ui.html(f'<div class="enhanced-loading-subtitle">{detail}</div>')
+                            ui.html('<div class="enhanced-loading-note">This may take up to a minute</div>')
+                            ui.html(f'<div class="enhanced-loading-note" style="font-size: 0.8rem; margin-top: 0.5rem;">Progress: {progress_percent:.1f}% complete • ~{remaining_time:.0f}s remaining</div>')
+
+                        # Enhanced progress bar with percentage
+                        with ui.element('div').classes('enhanced-loading-progress-container').props('key=progress-container'):
+                            with ui.element('div').classes('enhanced-loading-progress-bar-bg'):
+                                ui.element('div').classes('enhanced-loading-progress-bar-fill').style(f'width: {progress_percent}%')
+                            ui.element('div').classes('enhanced-loading-progress-text').props(f'text="{progress_percent:.1f}%"')
+
+        if new_ranking_data is None:
+            raise Exception("Analysis did not finish in time")
 
         # Display results
         with result_container:
@@ -10,7 +10,7 @@ import os
 
 # Add the current directory to the path to import dashboard
 sys.path.append(os.path.dirname(__file__))
-from dashboard import create_dashboard
+from dashboard import create_dashboard, describe_job_event, stream_job_events, JobEventStreamError
 
 # API configuration - use environment variable for production
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://127.0.0.1:8001')
@@ -2617,24 +2617,43 @@ async def create_job_async(file_name: str, file_bytes: bytes, bigbetter: bool, B
     except Exception as e:
         return None, f'Connection error: {str(e)}'
 
-async def poll_status_async(job_id: str, timeout_sec: int = 600, interval_sec: float = 1.5):
-    """Poll job status until completion or timeout."""
-    url = f'{API_BASE}/jobs/{job_id}/status'
-    logger.info(f"Polling status for job: {job_id}")
-    start = asyncio.get_event_loop().time()
+async def wait_for_job_async(job_id: str, timeout_sec: int = 600, on_event=None):
+    """
+    Follow the job's event stream until it finishes
+
+    Returns the final status; a succeeded job's results are in its 'result'
+    entry. on_event(event, data) is called for every event on the way.
+    """
+    logger.info(f"Following events of job: {job_id}")
+    status = {'job_id': job_id, 'status': 'running'}
     try:
-        async with aiohttp.ClientSession() as session:
-            while True:
-                async with session.get(url, timeout=30) as resp:
-                    data = await resp.json()
-                    status = data.get('status')
-                    if status in ('succeeded', 'failed'):
-                        return data
-                await asyncio.sleep(interval_sec)
-                if asyncio.get_event_loop().time() - start > timeout_sec:
-                    return {'job_id': job_id, 'status': 'failed', 'message': 'Timeout waiting for job'}
+        async for event, data in stream_job_events(job_id, timeout_sec=timeout_sec):
+            if on_event is not None:
+                on_event(event, data)
+            if event == 'status':
+                status = data
+            elif event == 'result':
+                status = dict(status, result=data)
+            elif event == 'error':
+                status = dict(status, status='failed', message=data.get('message', 'Unknown error'))
+    except asyncio.TimeoutError:
+        return {'job_id': job_id, 'status': 'failed', 'message': 'Timeout waiting for job'}
     except Exception as e:
-        return {'job_id': job_id, 'status': 'failed', 'message': f'Polling error: {str(e)}'}
+        return {'job_id': job_id, 'status': 'failed', 'message': f'Event stream error: {str(e)}'}
+    if status.get('status') not in ('succeeded', 'failed'):
+        return {'job_id': job_id, 'status': 'failed', 'message': 'Event stream ended before the job finished'}
+    return status
+
+def job_progress_label(container):
+    """Add a label to container and return an on_event callback that shows the job's progress in it"""
+    with container:
+        label = ui.label('').style('text-align: center; color: var(--gray-600); font-size: 0.85rem; margin-top: 0.5rem;')
+
+    def on_event(event, data):
+        text = describe_job_event(event, data)
+        if text:
+            label.set_text(text)
+    return on_event
 
 async def fetch_results_async(job_id: str):
     """Fetch results JSON for a finished job."""
@@ -3620,8 +3639,8 @@ async def direct_agent_analysis(file_id: str, messages_container):
                     ''')
             return
 
-        # Poll status
-        status = await poll_status_async(job_id)
+        # Follow the job's progress until it finishes
+        status = await wait_for_job_async(job_id, on_event=job_progress_label(status_container_ref))
         if status.get('status') != 'succeeded':
             status_container_ref.clear()
             with status_container_ref:
@@ -3644,8 +3663,10 @@ async def direct_agent_analysis(file_id: str, messages_container):
                     ''')
             return
 
-        # Fetch results
-        result, err = await fetch_results_async(job_id)
+        # The stream carries the results; fetch them only if it did not
+        result, err = status.get('result'), None
+        if result is None:
+            result, err = await fetch_results_async(job_id)
         if err or not result:
             status_container_ref.clear()
             with status_container_ref:
@@ -3878,93 +3899,57 @@ def reset_manual_upload_state():
     pass
 
 async def check_agent_job_status(messages_container, job_id):
-    """Enhanced job status checking with better progress feedback"""
+    """Follow the job's event stream, posting chat updates when its stage changes and the report at the end"""
+    last_update = None
     try:
-        async with aiohttp.ClientSession() as session:
-            # Check status
-            async with session.get(f'{API_BASE_URL}/api/ranking/jobs/{job_id}/status', timeout=30) as resp:
-                if resp.status == 200:
-                    status_data = await resp.json()
-                    status = status_data.get('status', 'unknown')
-                    user_message = status_data.get('status_message', '')
-
-                    if status == 'succeeded':
-                        # Show progress message
-                        add_message_to_chat(messages_container, 'assistant', '📊 Analysis completed! Retrieving results...')
-
-                        # Get results with retry logic
-                        max_retries = 3
-                        for attempt in range(max_retries):
-                            async with session.get(f'{API_BASE_URL}/api/ranking/jobs/{job_id}/results', timeout=60) as results_resp:
-                                if results_resp.status == 200:
-                                    results = await results_resp.json()
-
-                                    # Add success message with summary
-                                    summary_msg = '✅ **Analysis Complete!** Your spectral ranking analysis has finished successfully. '
-                                    if 'methods' in results:
-                                        num_rankings = len(results.get('methods', []))
-                                        summary_msg += f'Generated {num_rankings} ranking results. '
-
-                                    summary_msg += 'Displaying the complete analysis report now.'
-                                    add_message_to_chat(messages_container, 'assistant', summary_msg)
-
-                                    # Scroll to bottom
-                                    ui.run_javascript('document.querySelector(".chat-messages").scrollTop = document.querySelector(".chat-messages").scrollHeight;')
-
-                                    # Show report using the same mechanism as manual mode
-                                    ui.timer(1.0, lambda: show_main_report(results), once=True)
-                                    break
-
-                                elif results_resp.status == 404:
-                                    if attempt < max_retries - 1:
-                                        # Wait and retry
-                                        await asyncio.sleep(2)
-                                        continue
-                                    else:
-                                        add_message_to_chat(messages_container, 'assistant', '❌ Results not found. The analysis may have been deleted.')
-                                        break
-
-                                else:
-                                    if attempt < max_retries - 1:
-                                        await asyncio.sleep(1)
-                                        continue
-                                    else:
-                                        add_message_to_chat(messages_container, 'assistant', f'❌ Failed to retrieve results after {max_retries} attempts.')
-                                        break
-
-                    elif status == 'failed':
-                        error_msg = status_data.get("message", "Unknown error")
-                        if "timeout" in error_msg.lower():
-                            add_message_to_chat(messages_container, 'assistant', '⏰ Analysis timed out. Please try again with different parameters or a smaller dataset.')
-                        elif "memory" in error_msg.lower():
-                            add_message_to_chat(messages_container, 'assistant', '💾 Analysis failed due to memory constraints. Please try with a smaller dataset or fewer bootstrap iterations.')
-                        else:
-                            add_message_to_chat(messages_container, 'assistant', f'❌ Analysis failed: {error_msg}')
+        async for event, data in stream_job_events(job_id, timeout_sec=1800):
+            if event == 'result':
+                # Add success message with summary
+                summary_msg = '✅ **Analysis Complete!** Your spectral ranking analysis has finished successfully. '
+                if 'methods' in data:
+                    num_rankings = len(data.get('methods', []))
+                    summary_msg += f'Generated {num_rankings} ranking results. '
+
+                summary_msg += 'Displaying the complete analysis report now.'
+                add_message_to_chat(messages_container, 'assistant', summary_msg)
+
+                # Scroll to bottom
+                ui.run_javascript('document.querySelector(".chat-messages").scrollTop = document.querySelector(".chat-messages").scrollHeight;')
+
+                # Show report using the same mechanism as manual mode
+                ui.timer(1.0, lambda: show_main_report(data), once=True)
+                return
+
+            if event == 'error':
+                error_msg = data.get("message") or "Unknown error"
+                if "timeout" in error_msg.lower():
+                    add_message_to_chat(messages_container, 'assistant', '⏰ Analysis timed out. Please try again with different parameters or a smaller dataset.')
+                elif "memory" in error_msg.lower():
+                    add_message_to_chat(messages_container, 'assistant', '💾 Analysis failed due to memory constraints. Please try with a smaller dataset or fewer bootstrap iterations.')
+                else:
+                    add_message_to_chat(messages_container, 'assistant', f'❌ Analysis failed: {error_msg}')
+                return
 
-                    elif status == 'running':
-                        # Show progress with encouraging message
-                        progress_msg = user_message or '🔄 Analysis is still running...'
-                        if 'progress' in status_data:
-                            progress = status_data.get('progress', 0)
-                            progress_msg = f'🔄 Analysis in progress ({progress}% complete)...'
+            if event == 'status' and data.get('status') == 'succeeded':
+                add_message_to_chat(messages_container, 'assistant', '📊 Analysis completed! Retrieving results...')
+                continue
 
-                        add_message_to_chat(messages_container, 'assistant', progress_msg)
-                        # Check again in a shorter interval for running jobs
-                        ui.timer(2.0, lambda: check_agent_job_status(messages_container, job_id), once=True)
+            # Post a chat update only when the stage changes (not on every bootstrap step)
+            text = describe_job_event(event, data)
+            update = data.get('stage') if event == 'progress' else text
+            if text and update != last_update:
+                last_update = update
+                add_message_to_chat(messages_container, 'assistant', f'🔄 {text}...')
 
-                    else:
-                        add_message_to_chat(messages_container, 'assistant', f'⚠️ Unknown job status: {status}')
-
-                elif resp.status == 404:
-                    add_message_to_chat(messages_container, 'assistant', '❌ Job not found. The analysis may have expired or been deleted.')
-                elif resp.status == 429:
-                    add_message_to_chat(messages_container, 'assistant', '⚡ Server is busy. Retrying in a moment...')
-                    ui.timer(5.0, lambda: check_agent_job_status(messages_container, job_id), once=True)
-                else:
-                    add_message_to_chat(messages_container, 'assistant', f'❌ Status check failed (HTTP {resp.status}). Retrying...')
+        add_message_to_chat(messages_container, 'assistant', '⚠️ The analysis stream ended without a result. Retrying...')
+        ui.timer(3.0, lambda: check_agent_job_status(messages_container, job_id), once=True)
 
-                    # Retry on other errors
-                    ui.timer(3.0, lambda: check_agent_job_status(messages_container, job_id), once=True)
+    except JobEventStreamError as ex:
+        if ex.http_status == 404:
+            add_message_to_chat(messages_container, 'assistant', '❌ Job not found. The analysis may have expired or been deleted.')
+        else:
+            add_message_to_chat(messages_container, 'assistant', f'❌ Status check failed (HTTP {ex.http_status}). Retrying...')
+            ui.timer(3.0, lambda: check_agent_job_status(messages_container, job_id), once=True)
 
     except asyncio.TimeoutError:
         add_message_to_chat(messages_container, 'assistant', '⏰ Status check timed out. Retrying...')
@@ -5053,14 +5038,16 @@ with ui.element('div').style('min-height: 100vh; width: 100vw; display: flex; fl
                             ''')
                     return
 
-                # Poll status
-                status = await poll_status_async(job_id)
+                # Follow the job's progress until it finishes
+                status = await wait_for_job_async(job_id, on_event=job_progress_label(status_container))
                 if status.get('status') != 'succeeded':
                     ui.notify(f'🚨 Analysis Failed: {status.get("message","Unknown error")}', type='negative')
                     return
 
-                # Fetch results
-                result, err = await fetch_results_async(job_id)
+                # The stream carries the results; fetch them only if it did not
+                result, err = status.get('result'), None
+                if result is None:
+                    result, err = await fetch_results_async(job_id)
                 if err or not result:
                     ui.notify(f'🚨 Fetch Results Failed: {err}', type='negative')
                     return
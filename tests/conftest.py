@@ -0,0 +1,29 @@
+"""Shared fixtures; makes the code_app package importable from the repository root and keeps API data in a temporary directory"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Keep the API's jobs, uploads and registry out of the repository's data directory
+TEST_DATA_DIR = tempfile.mkdtemp(prefix='ranking-tests-')
+os.environ.setdefault('DATA_DIR', TEST_DATA_DIR)
+
+
+def make_scores(n_rows, k, seed=0, missing=0.0):
+    """Random score matrix with a trend across methods, optionally with NaNs"""
+    rng = np.random.default_rng(seed)
+    scores = rng.random((n_rows, k)) + np.linspace(0.0, 0.5, k)
+    if missing:
+        scores[rng.random(scores.shape) < missing] = np.nan
+    return scores
+
+
+@pytest.fixture
+def scores():
+    return make_scores(40, 6)
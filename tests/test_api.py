@@ -0,0 +1,73 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code_app.backend.spectral_ranking import rank, score_columns, write_results
+
+from conftest import make_scores
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(make_scores(40, 5, seed=8), columns=[f"model{m}" for m in range(5)])
+
+
+def test_rank_names_methods_and_orders_the_trend(frame):
+    result = rank(frame, B=200)
+    np.testing.assert_array_equal(result.methods, frame.columns)
+    assert sorted(result.rank) == [1, 2, 3, 4, 5]
+    # make_scores adds an increasing trend across the methods
+    assert result.rank[-1] < result.rank[0]
+    assert np.all(result.ci_two_sided[:, 0] <= result.rank)
+    assert np.all(result.rank <= result.ci_two_sided[:, 1])
+    assert np.all(result.ci_uniform_left <= result.ci_left)
+
+    # Without ties, lower-is-better is the same ranking as negated scores
+    lower_better = rank(frame, bigbetter=False, B=200)
+    np.testing.assert_array_equal(lower_better.theta_hat, rank(-frame, B=200).theta_hat)
+    assert lower_better.rank[-1] > lower_better.rank[0]
+
+
+def test_array_input_matches_frame_input(frame):
+    from_frame = rank(frame, B=100)
+    from_array = rank(frame.to_numpy(), B=100, methods=list(frame.columns))
+    np.testing.assert_array_equal(from_array.to_frame().drop(columns='method'),
+                                  from_frame.to_frame().drop(columns='method'))
+    assert list(rank(frame.to_numpy(), B=10).methods) == ['0', '1', '2', '3', '4']
+    with pytest.raises(ValueError):
+        rank(frame.to_numpy()[:, :1], B=10)
+    with pytest.raises(ValueError):
+        rank(frame.to_numpy(), B=10, methods=['a'])
+
+
+def test_results_are_written_in_the_cli_schema(frame, tmp_path):
+    result = rank(frame, B=100, seed=3)
+    payload = write_results(result, str(tmp_path), job_id='job', runtime_sec=1.5)
+    with open(os.path.join(tmp_path, 'ranking_results.json')) as f:
+        assert json.load(f) == payload
+    assert payload['job_id'] == 'job'
+    assert payload['params']['seed'] == 3
+    assert payload['metadata']['runtime_sec'] == 1.5
+    assert set(payload['methods'][0]) == {'name', 'theta_hat', 'rank', 'ci_two_sided', 'ci_left', 'ci_uniform_left'}
+
+    table = pd.read_csv(os.path.join(tmp_path, 'ranking_results.csv'))
+    assert list(table.columns) == ['method', 'theta_hat', 'rank', 'ci_two_left', 'ci_two_right', 'ci_left',
+                                   'ci_uniform_left']
+    np.testing.assert_array_equal(table['rank'], result.rank)
+
+
+def test_score_columns_drops_metadata_and_text(frame):
+    upload = frame.assign(case_num=range(len(frame)), model='x', description='y', note='text')
+    assert list(score_columns(upload).columns) == list(frame.columns)
+
+
+def test_tied_methods_share_the_best_whole_rank(tmp_path):
+    # Theta of methods 0, 1 and 3 is exactly 0; average ranks would give all three rank 2
+    result = rank(np.array([[1, 2, 3, 4.], [4, 3, 2, 1.]]), B=50)
+    assert list(result.rank) == [1, 1, 4, 1]
+    write_results(result, str(tmp_path))
+    with open(tmp_path / 'ranking_results.json') as f:
+        assert [m['rank'] for m in json.load(f)['methods']] == [1, 1, 4, 1]
@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from code_app.backend import main
+from code_app.backend.job_registry import JobRegistry
+from code_app.backend.job_scheduler import JobScheduler
+from code_app.backend.result_cache import ResultCache
+
+from conftest import make_scores
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Client on a fresh registry, result cache and one-slot scheduler; the slot is held until unblock() is called"""
+    scheduler = JobScheduler(slots=1, reserved_slots=0)
+    monkeypatch.setattr(main, 'JOBS_DIR', str(tmp_path / 'jobs'))
+    monkeypatch.setattr(main, 'JOB_REGISTRY', JobRegistry(str(tmp_path / 'jobs.sqlite3')))
+    monkeypatch.setattr(main, 'RESULT_CACHE', ResultCache(str(tmp_path / 'cache'), 2 ** 20))
+    monkeypatch.setattr(main, 'INFLIGHT_JOBS', {})
+    monkeypatch.setattr(main, 'INFLIGHT_SUBMITTERS', {})
+    monkeypatch.setattr(main, 'SUBMISSION_JOBS', {})
+    monkeypatch.setattr(main, 'ABANDONED_SUBMISSIONS', {})
+    monkeypatch.setattr(main, 'get_job_scheduler', lambda: scheduler)
+    blocker = threading.Event()
+    scheduler.submit('blocker', blocker.wait, 30)
+    client = TestClient(main.app)
+    client.unblock = blocker.set
+    yield client
+    blocker.set()
+    scheduler.shutdown()
+
+
+def scores_csv(seed=0):
+    df = pd.DataFrame(make_scores(20, 4, seed=seed), columns=[f"model{m}" for m in range(4)])
+    return df.to_csv(index=False).encode()
+
+
+def post_job(client, seed=0, B=50, **form):
+    return client.post('/api/ranking/jobs', files={'file': ('data.csv', scores_csv(seed), 'text/csv')},
+                       data={'bigbetter': 'true', 'B': str(B), 'seed': '1', 'engine': 'python', **form})
+
+
+def submit(client, seed=0, B=50, **form):
+    response = post_job(client, seed, B, **form)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_identical_submissions_share_one_job(api):
+    first = submit(api)
+    second = submit(api)
+    assert second['job_id'] == first['job_id']
+    assert second['queue_position'] == first['queue_position'] == 0
+    assert submit(api, seed=1)['job_id'] != first['job_id']
+
+
+def test_cancel_detaches_until_the_last_submission(api):
+    job_id = submit(api)['job_id']
+    submit(api)
+
+    response = api.delete(f'/api/ranking/jobs/{job_id}')
+    assert response.status_code == 200
+    assert response.json()['status'] == 'running'
+    assert api.get(f'/api/ranking/jobs/{job_id}/status').json()['queue']['state'] == 'queued'
+
+    response = api.delete(f'/api/ranking/jobs/{job_id}')
+    assert response.status_code == 200
+    assert response.json()['status'] == 'failed'
+    assert response.json()['error'] == main.JOB_CANCELLED_MESSAGE
+    assert api.delete(f'/api/ranking/jobs/{job_id}').status_code == 409
+    assert api.delete('/api/ranking/jobs/unknown').status_code == 404
+
+    # A new identical submission starts a new job rather than joining the cancelled one
+    assert submit(api)['job_id'] != job_id
+
+
+def test_abandoned_submission_is_refused(api):
+    submission_id = str(uuid.uuid4())
+    response = api.delete(f'/api/ranking/submissions/{submission_id}')
+    assert response.json()['status'] == 'abandoned'
+    assert post_job(api, submission_id=submission_id).status_code == 409
+    assert main.get_job_scheduler().stats()['queued']['bulk'] == 0
+
+
+def test_abandoning_a_submission_cancels_its_job(api):
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    job_id = submit(api, submission_id=first)['job_id']
+    assert submit(api, submission_id=second)['job_id'] == job_id
+
+    assert api.delete(f'/api/ranking/submissions/{second}').json()['status'] == 'running'
+    response = api.delete(f'/api/ranking/submissions/{first}')
+    assert response.json()['status'] == 'failed'
+    assert post_job(api, submission_id='not-a-uuid').status_code == 400
+
+
+def test_a_submission_is_detached_only_once(api):
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    job_id = submit(api, submission_id=first)['job_id']
+    submit(api, submission_id=second)
+
+    assert api.delete(f'/api/ranking/jobs/{job_id}', params={'submission_id': second}).json()['status'] == 'running'
+    repeated = api.delete(f'/api/ranking/jobs/{job_id}', params={'submission_id': second}).json()
+    assert repeated['message'] == "Submission was already detached from the job"
+    assert api.delete(f'/api/ranking/submissions/{second}').json()['status'] == 'abandoned'
+    assert api.get(f'/api/ranking/jobs/{job_id}/status').json()['status'] == 'running'
+    assert api.delete(f'/api/ranking/jobs/{job_id}', params={'submission_id': 'nope'}).status_code == 400
+
+    assert api.delete(f'/api/ranking/submissions/{first}').json()['status'] == 'failed'
+
+
+def test_abandoned_submission_ids_expire(api, monkeypatch):
+    monkeypatch.setattr(main, 'ABANDONED_SUBMISSION_TTL_SEC', 0.0)
+    stale, fresh = str(uuid.uuid4()), str(uuid.uuid4())
+    api.delete(f'/api/ranking/submissions/{stale}')
+    time.sleep(0.01)
+    api.delete(f'/api/ranking/submissions/{fresh}')
+    assert list(main.ABANDONED_SUBMISSIONS) == [fresh]
+    assert submit(api, submission_id=stale)['job_id']
+
+
+def test_coalesced_submission_reports_the_shared_job_position(api):
+    submit(api, seed=1)
+    job_id = submit(api)['job_id']
+    assert submit(api) == {'job_id': job_id, 'queue_position': 1}
+
+
+def test_finished_results_are_served_from_the_cache(api):
+    job_id = submit(api)['job_id']
+    api.unblock()
+    deadline = time.monotonic() + 60
+    while api.get(f'/api/ranking/jobs/{job_id}/status').json()['status'] == 'running':
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.1)
+    first = api.get(f'/api/ranking/jobs/{job_id}/results').json()
+    assert first['metadata']['engine'] == 'python'
+
+    cached_id = submit(api)['job_id']
+    assert cached_id != job_id
+    status = api.get(f'/api/ranking/jobs/{cached_id}/status').json()
+    assert (status['status'], status['message']) == ('succeeded', 'Served from the result cache')
+    cached = api.get(f'/api/ranking/jobs/{cached_id}/results').json()
+    assert cached['job_id'] == cached_id
+    assert cached['methods'] == first['methods']
+    assert main.RESULT_CACHE.stats()['hits'] == 1
+
+
+def read_events(client, job_id):
+    """(event, data) pairs of a job's event stream, up to its end"""
+    events = []
+    with client.stream('GET', f'/api/ranking/jobs/{job_id}/events') as response:
+        assert response.headers['content-type'].startswith('text/event-stream')
+        event = None
+        for line in response.iter_lines():
+            if line.startswith('event: '):
+                event = line[len('event: '):]
+            elif line.startswith('data: '):
+                events.append((event, json.loads(line[len('data: '):])))
+    return events
+
+
+def test_event_stream_ends_with_the_results(api, monkeypatch):
+    monkeypatch.setattr(main, 'JOB_EVENTS_HEARTBEAT_SEC', 0.2)
+    job_id = submit(api)['job_id']
+    threading.Timer(0.5, api.unblock).start()
+    events = read_events(api, job_id)
+
+    assert events[0][0] == 'status' and events[0][1]['status'] == 'running'
+    assert events[-2][0] == 'status' and events[-2][1]['status'] == 'succeeded'
+    assert events[-1][0] == 'result' and events[-1][1]['job_id'] == job_id
+    assert api.get('/api/ranking/jobs/unknown/events').status_code == 404
+
+
+def test_event_stream_of_a_cancelled_job_ends_with_the_error(api, monkeypatch):
+    monkeypatch.setattr(main, 'JOB_EVENTS_HEARTBEAT_SEC', 0.2)
+    job_id = submit(api)['job_id']
+    threading.Timer(0.5, api.delete, args=(f'/api/ranking/jobs/{job_id}',)).start()
+    events = read_events(api, job_id)
+
+    assert events[0][0] == 'status' and events[0][1]['queue']['state'] == 'queued'
+    assert events[-1][0] == 'error' and events[-1][1]['error'] == main.JOB_CANCELLED_MESSAGE
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from code_app.backend.spectral_ranking import gray_code_subsets, rank, rank_batch, rank_subset, row_statistics
+from code_app.backend.spectral_ranking.batch import _stacked
+
+from conftest import make_scores
+
+
+def benchmark_stats(missing=0.0):
+    scores = make_scores(5, 7, seed=4, missing=missing)
+    df = pd.DataFrame(scores, columns=[f"model{m}" for m in range(7)], index=[f"bench{b}" for b in range(5)])
+    return df, row_statistics(df)
+
+
+def result_values(result):
+    return result.to_frame().drop(columns='method').to_numpy()
+
+
+@pytest.mark.parametrize('missing', [0.0, 0.3])
+def test_batch_matches_rank_subset(missing):
+    _, stats = benchmark_stats(missing)
+    subsets = gray_code_subsets(list(stats.rows), 1)
+    results = rank_batch(stats, subsets, B=100, seed=3, batch_size=7)
+    for subset, result in zip(subsets, results):
+        reference = rank_subset(stats, subset, B=100, seed=3, bootstrap='covariance')
+        np.testing.assert_array_equal(result_values(result), result_values(reference))
+
+
+def test_method_without_comparisons_does_not_fail_the_batch():
+    df, _ = benchmark_stats()
+    df.iloc[:, 2] = np.nan
+    stats = row_statistics(df)
+    subsets = gray_code_subsets(list(stats.rows), 1)
+    errors = {}
+    results = rank_batch(stats, subsets, B=100, seed=3, errors=errors)
+    assert errors == {}
+    for subset, result in zip(subsets, results):
+        reference = rank_subset(stats, subset, B=100, seed=3, bootstrap='covariance')
+        np.testing.assert_array_equal(result_values(result), result_values(reference))
+
+
+def test_subset_without_comparisons_is_reported_per_subset():
+    df, _ = benchmark_stats()
+    df.iloc[0, 1:] = np.nan
+    stats = row_statistics(df)
+    subsets = [['bench0'], ['bench1', 'bench2'], ['bench0', 'bench3']]
+    errors = {}
+    results = rank_batch(stats, subsets, B=100, seed=3, errors=errors)
+    assert results[0] is None
+    assert errors == {0: "No valid comparisons"}
+    for subset, result in zip(subsets[1:], results[1:]):
+        reference = rank_subset(stats, subset, B=100, seed=3, bootstrap='covariance')
+        np.testing.assert_array_equal(result_values(result), result_values(reference))
+
+
+def test_stacked_retries_problems_one_by_one():
+    stack = np.stack([np.eye(3) * 2, np.full((3, 3), np.nan), np.eye(3) * 3])
+
+    def inverse(matrix):
+        if not np.all(np.isfinite(matrix)):
+            raise np.linalg.LinAlgError("not finite")
+        return (np.linalg.inv(matrix),)
+
+    failed = np.zeros(3, dtype=bool)
+    (inverses,) = _stacked(inverse, stack, failed)
+    np.testing.assert_array_equal(failed, [False, True, False])
+    np.testing.assert_allclose(inverses[0], np.eye(3) / 2)
+    np.testing.assert_allclose(inverses[1], np.eye(3))
+
+
+def test_batch_metadata_matches_rank():
+    df, stats = benchmark_stats()
+    result = rank_batch(stats, [['bench0', 'bench1']], B=50)[0]
+    reference = rank(df.loc[['bench0', 'bench1']], B=50, compress=True)
+    assert set(result.metadata) == set(reference.metadata)
+    assert set(result.metadata['solver']) == set(reference.metadata['solver'])
+    assert set(result.metadata['stages']) == set(reference.metadata['stages'])
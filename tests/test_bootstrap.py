@@ -0,0 +1,127 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code_app.backend.spectral_ranking import comparison_edges, rank
+from code_app.backend.spectral_ranking.bootstrap import (
+    bootstrap_covariance,
+    bootstrap_draws,
+    covariance_factor,
+    pairwise_max_statistics,
+    parallel_bootstrap_draws,
+    uniform_max_statistic,
+)
+from code_app.backend.spectral_ranking.comparisons import win_count_matrix
+
+from conftest import make_scores
+
+
+def multiplier_operator(edges, pihat2, tauhatvec2, fA2=2.0):
+    """Dense (V / tau)^T of the multiplier bootstrap, built row by row as in ranking_cli.R"""
+    V = np.zeros((len(edges), edges.n_methods))
+    for row, (i, j, winner) in enumerate(zip(edges.i, edges.j, edges.winner)):
+        pivec = pihat2[i] + pihat2[j]
+        V[row, i] = ((winner == i) * pivec - pihat2[i]) / fA2
+        V[row, j] = ((winner == j) * pivec - pihat2[j]) / fA2
+    with np.errstate(divide='ignore'):
+        scale = np.where(tauhatvec2 > 0, 1.0 / tauhatvec2, 0.0)
+    return (V * scale).T
+
+
+def test_covariance_matches_multiplier_operator():
+    edges = comparison_edges(pd.DataFrame(make_scores(30, 5)), bigbetter=True)['edges']
+    rng = np.random.default_rng(1)
+    pihat2 = rng.random(5) + 0.1
+    tauhatvec2 = rng.random(5) + 0.5
+    operator2 = multiplier_operator(edges, pihat2, tauhatvec2)
+
+    cov2 = bootstrap_covariance(win_count_matrix(edges), pihat2, tauhatvec2)
+    np.testing.assert_allclose(cov2, operator2 @ operator2.T, rtol=1e-10, atol=1e-14)
+
+    factor2 = covariance_factor(cov2)
+    np.testing.assert_allclose(factor2 @ factor2.T, cov2, rtol=1e-8, atol=1e-12)
+
+
+def test_covariance_with_a_method_without_comparisons():
+    scores = make_scores(30, 5)
+    scores[:, 2] = np.nan
+    multiplier = rank(scores, B=200)
+    covariance = rank(scores, B=200, bootstrap='covariance')
+    np.testing.assert_array_equal(covariance.theta_hat, multiplier.theta_hat)
+    assert np.all((covariance.ci_two_sided >= 1) & (covariance.ci_two_sided <= 5))
+
+    edges = comparison_edges(pd.DataFrame(scores), bigbetter=False)['edges']
+    cov2 = bootstrap_covariance(win_count_matrix(edges), np.full(5, 0.2), np.array([1.0, 1.0, 0.0, 1.0, 1.0]))
+    assert np.all(np.isfinite(cov2))
+    assert not np.any(cov2[2]) and not np.any(cov2[:, 2])
+
+
+@pytest.mark.parametrize('max_mem_mb', [None, 0.001, 0.01])
+def test_chunked_draws_preserve_the_stream(max_mem_mb):
+    operator2 = np.random.default_rng(2).random((4, 300))
+    reference = operator2 @ np.random.RandomState(7).normal(size=(300, 50))
+    chunked = bootstrap_draws(operator2, 50, max_mem_mb=max_mem_mb, random_state=np.random.RandomState(7))
+    np.testing.assert_allclose(chunked, reference, rtol=1e-12)
+
+
+def test_memory_cap_does_not_change_the_ranking():
+    scores = make_scores(60, 6)
+    reference = rank(scores, B=200)
+    capped = rank(scores, B=200, max_bootstrap_mem_mb=0.05)
+    np.testing.assert_array_equal(capped.ci_two_sided, reference.ci_two_sided)
+    np.testing.assert_array_equal(capped.ci_uniform_left, reference.ci_uniform_left)
+
+
+def test_max_statistics_match_the_reference_loop():
+    rng = np.random.default_rng(3)
+    k, B, dval2 = 6, 40, 3.0
+    draws2, draws2b = rng.standard_normal((k, B)), rng.standard_normal((k, B))
+    sd2 = rng.random((k, k)) + 0.5
+
+    GMvecmax2 = np.empty((k, B))
+    GMvecmaxone2 = np.empty((k, B))
+    GMmaxone2 = np.full(B, -np.inf)
+    for o in range(k):
+        diff2 = (draws2[o] - draws2) / sd2[o, :, np.newaxis] / dval2
+        GMvecmax2[o] = np.max(np.abs(diff2), axis=0)
+        GMvecmaxone2[o] = np.max(diff2, axis=0)
+        GMmaxone2 = np.maximum(GMmaxone2, np.max((draws2b[o] - draws2b) / sd2[o, :, np.newaxis] / dval2, axis=0))
+
+    for block_mem_mb in (16, 1e-4):
+        pairwise = pairwise_max_statistics(draws2, sd2, dval2, block_mem_mb=block_mem_mb)
+        np.testing.assert_allclose(pairwise[0], GMvecmax2)
+        np.testing.assert_allclose(pairwise[1], GMvecmaxone2)
+        np.testing.assert_allclose(uniform_max_statistic(draws2b, sd2, dval2, block_mem_mb=block_mem_mb), GMmaxone2)
+
+
+def test_parallel_draws_do_not_depend_on_the_worker_count():
+    operator2 = np.random.default_rng(2).random((4, 300))
+    draws = [parallel_bootstrap_draws(operator2, 90, np.random.SeedSequence(5), workers, chunk_size=20)[0]
+             for workers in (1, 3, 8)]
+    np.testing.assert_array_equal(draws[1], draws[0])
+    np.testing.assert_array_equal(draws[2], draws[0])
+    other_chunks = parallel_bootstrap_draws(operator2, 90, np.random.SeedSequence(5), 3, chunk_size=30)[0]
+    assert not np.array_equal(other_chunks, draws[0])
+
+
+def test_parallel_bootstrap_is_reproducible():
+    scores = make_scores(60, 6)
+    first = rank(scores, B=300, workers=3, chunk_size=50)
+    second = rank(scores, B=300, workers=2, chunk_size=50)
+    np.testing.assert_array_equal(first.ci_two_sided, second.ci_two_sided)
+    np.testing.assert_array_equal(first.ci_uniform_left, second.ci_uniform_left)
+    np.testing.assert_array_equal(first.theta_hat, rank(scores, B=300).theta_hat)
+
+
+def test_method_without_comparisons_warns_nothing_and_spans_every_rank():
+    scores = make_scores(30, 5)
+    scores[:, 2] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', RuntimeWarning)
+        results = [rank(scores, B=200, bootstrap=mode) for mode in ('multiplier', 'covariance')]
+    for result in results:
+        assert list(result.ci_two_sided[2]) == [1, 5]
+        # The other methods still get informative intervals
+        assert any(list(ci) != [1, 5] for ci in np.delete(result.ci_two_sided, 2, axis=0))
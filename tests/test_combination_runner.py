@@ -0,0 +1,84 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code_app.backend.data_ranking.huggingface_ranking_single import (
+    MANIFEST_FILE,
+    HuggingFaceAllCombinationsRankingUpdater,
+)
+
+from conftest import make_scores
+
+
+@pytest.fixture
+def updater(tmp_path):
+    """An updater over 5 benchmarks x 8 models (25 combinations) writing under tmp_path"""
+    df = pd.DataFrame(make_scores(5, 8, seed=17), columns=[f"model{m}" for m in range(8)])
+    df.insert(0, 'benchmark', [f"bench{b}" for b in range(5)])
+    updater = HuggingFaceAllCombinationsRankingUpdater()
+    updater.input_file = str(tmp_path / 'processed.csv')
+    updater.data_ranking_dir = str(tmp_path / 'ranking')
+    df.to_csv(updater.input_file, index=False)
+    return updater
+
+
+def combination_dir(updater, name):
+    return os.path.join(updater.data_ranking_dir, 'current', 'all_combinations', name)
+
+
+def theta(results):
+    return {name: [m['theta_hat'] for m in combination['methods']] for name, combination in results.items()}
+
+
+def test_parallel_workers_match_the_sequential_run(updater, tmp_path):
+    sequential = updater.run_all_combinations(B=50, engine='python')
+    assert len(sequential) == 25
+
+    updater.data_ranking_dir = str(tmp_path / 'parallel')
+    parallel = updater.run_all_combinations(B=50, engine='python', workers=2, blas_threads=1)
+    assert list(parallel) == list(sequential)
+    for name, values in theta(sequential).items():
+        np.testing.assert_allclose(theta(parallel)[name], values, atol=1e-8)
+        assert os.path.exists(os.path.join(combination_dir(updater, name), MANIFEST_FILE))
+
+
+def test_unchanged_combinations_are_reused(updater):
+    first = updater.run_all_combinations(B=50, engine='python', max_combinations=4)
+    name = next(iter(first))
+    results_file = os.path.join(combination_dir(updater, name), 'ranking_results.json')
+    with open(os.path.join(combination_dir(updater, name), MANIFEST_FILE)) as f:
+        completed_at = json.load(f)['completed_at']
+    mtime = os.path.getmtime(results_file)
+
+    assert theta(updater.run_all_combinations(B=50, engine='python', max_combinations=4)) == theta(first)
+    assert os.path.getmtime(results_file) == mtime
+
+    updater.run_all_combinations(B=50, engine='python', max_combinations=4, force=True)
+    with open(os.path.join(combination_dir(updater, name), MANIFEST_FILE)) as f:
+        assert json.load(f)['completed_at'] != completed_at
+
+    # New parameters or new scores invalidate the manifest
+    different_seed = updater.run_all_combinations(B=50, seed=7, engine='python', max_combinations=4)
+    with open(os.path.join(combination_dir(updater, name), MANIFEST_FILE)) as f:
+        assert json.load(f)['params']['seed'] == 7
+    df = pd.read_csv(updater.input_file)
+    df.iloc[:, 1:] = -df.iloc[:, 1:]
+    df.to_csv(updater.input_file, index=False)
+    flipped = updater.run_all_combinations(B=50, seed=7, engine='python', max_combinations=4)
+    assert [m['name'] for m in flipped[name]['methods']] != [m['name'] for m in different_seed[name]['methods']]
+
+
+def test_failed_rerun_leaves_no_manifest(updater, monkeypatch):
+    updater.run_all_combinations(B=50, engine='python', max_combinations=1)
+    name = "_".join(updater.generate_all_combinations(updater.get_benchmarks(updater.load_full_data()))[0])
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("solver failed")
+
+    monkeypatch.setattr(updater, 'run_python_ranking', fail)
+    with pytest.raises(RuntimeError):
+        updater.run_all_combinations(B=50, seed=7, engine='python', max_combinations=1)
+    assert not os.path.exists(os.path.join(combination_dir(updater, name), MANIFEST_FILE))
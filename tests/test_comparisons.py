@@ -0,0 +1,118 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from code_app.backend.spectral_ranking import (
+    as_comparison_edges,
+    comparison_edges,
+    compress_comparisons,
+    process_data,
+    rank,
+    vanilla_spectrum_method,
+)
+from code_app.backend.spectral_ranking.comparisons import win_count_matrix
+
+from conftest import make_scores
+
+
+def reference_process_data(scores, bigbetter):
+    """AA/WW built row by row and pair by pair, as the loop in ranking_cli.R"""
+    aa_rows, ww_rows = [], []
+    k = scores.shape[1]
+    for row in scores:
+        for a, b in itertools.combinations(range(k), 2):
+            if np.isnan(row[a]) or np.isnan(row[b]):
+                continue
+            aa, ww = np.zeros(k), np.zeros(k)
+            aa[[a, b]] = 1
+            if bigbetter:
+                ww[a if row[a] > row[b] else b] = 1
+            else:
+                ww[b if row[a] > row[b] else a] = 1
+            aa_rows.append(aa)
+            ww_rows.append(ww)
+    return np.array(aa_rows).reshape(-1, k), np.array(ww_rows).reshape(-1, k)
+
+
+@pytest.mark.parametrize('bigbetter', [True, False])
+@pytest.mark.parametrize('missing', [0.0, 0.3])
+def test_process_data_matches_the_row_loop(bigbetter, missing):
+    scores = make_scores(25, 6, seed=5, missing=missing)
+    # Ties go to the second method when bigger is better and to the first otherwise
+    scores[3, 1] = scores[3, 4]
+    df = pd.DataFrame(scores, columns=[f"model{m}" for m in range(6)])
+    result = process_data(df, bigbetter=bigbetter)
+    aa, ww = reference_process_data(scores, bigbetter)
+    np.testing.assert_array_equal(result['aa'], aa)
+    np.testing.assert_array_equal(result['ww'], ww)
+    np.testing.assert_array_equal(result['idx'], df.columns)
+
+
+def test_edge_list_matches_the_dense_matrices():
+    df = pd.DataFrame(make_scores(25, 6, seed=6, missing=0.2))
+    result = process_data(df, bigbetter=True)
+    edges = comparison_edges(df, bigbetter=True)['edges']
+    for aa, ww in ((result['aa'], result['ww']),
+                   (sparse.csr_matrix(result['aa']), sparse.csr_matrix(result['ww']))):
+        converted = as_comparison_edges(aa, ww)
+        for field in ('i', 'j', 'winner'):
+            np.testing.assert_array_equal(getattr(converted, field), getattr(edges, field))
+    assert as_comparison_edges(edges) is edges
+    with pytest.raises(ValueError):
+        as_comparison_edges(np.ones((2, 6)), np.eye(2, 6))
+
+
+def test_engine_gives_the_same_results_on_edges_and_dense_matrices():
+    df = pd.DataFrame(make_scores(25, 6, seed=6, missing=0.2))
+    result = process_data(df, bigbetter=True)
+    edges = comparison_edges(df, bigbetter=True)['edges']
+    dense = vanilla_spectrum_method(result['aa'], result['ww'], result['idx'], B=100,
+                                    random_state=np.random.RandomState(1))
+    from_edges = vanilla_spectrum_method(edges, None, result['idx'], B=100, random_state=np.random.RandomState(1))
+    np.testing.assert_array_equal(from_edges, dense)
+
+
+def test_win_counts_give_the_r_transition_matrix():
+    df = pd.DataFrame(make_scores(25, 6, seed=7, missing=0.2))
+    result = process_data(df, bigbetter=False)
+    aa, ww = result['aa'], result['ww']
+    # ranking_cli.R: P2 <- crossprod(AA2, WW2 / fAvec2) / dval2 with the diagonal reset
+    dval = 2 * np.max(aa.sum(axis=0))
+    reference = aa.T @ (ww / 2) / dval
+    np.fill_diagonal(reference, 0)
+    np.fill_diagonal(reference, 1 - reference.sum(axis=1))
+
+    edges = comparison_edges(df, bigbetter=False)['edges']
+    P = win_count_matrix(edges).toarray() / 2 / dval
+    np.fill_diagonal(P, 1 - P.sum(axis=1))
+    np.testing.assert_allclose(P, reference, rtol=1e-12, atol=1e-15)
+
+    # pihat2 <- abs(svd((P2 - I) %*% t(P2 - I))$v[, n]), up to normalization
+    pihat = np.abs(np.linalg.svd((reference - np.eye(6)) @ (reference - np.eye(6)).T)[2][-1])
+    diagnostics = {}
+    vanilla_spectrum_method(edges, None, result['idx'], B=10, random_state=np.random.RandomState(1),
+                            diagnostics=diagnostics)
+    np.testing.assert_allclose(diagnostics['pihat'] / diagnostics['pihat'].sum(), pihat / pihat.sum(), rtol=1e-10)
+
+
+def test_compressed_comparisons_keep_the_win_counts():
+    # Few distinct score levels, so most comparisons repeat
+    scores = np.round(make_scores(200, 5, seed=10, missing=0.1) * 3)
+    edges = comparison_edges(pd.DataFrame(scores), bigbetter=True)['edges']
+    compressed = compress_comparisons(edges)
+    assert len(compressed) <= 5 * 4
+    assert compressed.n_comparisons == len(edges)
+    assert compress_comparisons(compressed) is compressed
+    np.testing.assert_array_equal(win_count_matrix(compressed).toarray(), win_count_matrix(edges).toarray())
+
+    full = rank(scores, B=200)
+    packed = rank(scores, B=200, compress=True)
+    np.testing.assert_allclose(packed.theta_hat, full.theta_hat, rtol=1e-12, atol=1e-12)
+    assert (packed.metadata['n_comparisons'], packed.metadata['n_unique_comparisons']) == (len(edges),
+                                                                                          len(compressed))
+    # The covariance bootstrap only sees the win counts, so compression changes nothing
+    np.testing.assert_array_equal(rank(scores, B=200, bootstrap='covariance', compress=True).ci_two_sided,
+                                  rank(scores, B=200, bootstrap='covariance').ci_two_sided)
@@ -0,0 +1,58 @@
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from code_app.backend.spectral_ranking import STAGES, StageTimer, instrument, rank
+
+
+def test_rank_reports_every_stage(scores):
+    events = []
+    result = rank(scores, B=100, seed=1, progress=lambda *event: events.append(event))
+
+    stages = result.metadata['stages']
+    assert list(stages) == [name for name in STAGES if name != 'ingest']
+    for stats in stages.values():
+        assert stats['wall_sec'] >= 0 and stats['cpu_sec'] >= 0 and stats['peak_mem_mb'] is None
+    assert result.metadata['peak_rss_mb'] > 0
+
+    for name in stages:
+        stage_events = [(done, total) for stage, done, total in events if stage == name]
+        assert stage_events[0][0] == 0 and stage_events[-1][0] == stage_events[-1][1]
+    bootstrap = [done for stage, done, total in events if stage == 'bootstrap']
+    assert bootstrap == sorted(bootstrap) and len(bootstrap) > 2 and bootstrap[-1] == 200
+
+
+def test_stage_timer_accumulates_and_drops_repeats():
+    events = []
+    timer = StageTimer(progress=lambda *event: events.append(event), memory=False)
+    with timer.stage('ingest'):
+        pass
+    with timer.stage('ingest', total=4) as stage:
+        stage.report('ingest', 2, 4)
+        stage.report('ingest', 2, 4)
+        np.ones(10).sum()
+    assert events == [('ingest', 0, 1), ('ingest', 1, 1), ('ingest', 0, 4), ('ingest', 2, 4), ('ingest', 4, 4)]
+    summary = timer.summary()
+    assert list(summary) == ['ingest'] and summary['ingest']['peak_mem_mb'] is None
+    with pytest.raises(ValueError):
+        with timer.stage('unknown'):
+            pass
+
+
+def test_memory_tracing_is_opt_in():
+    timer = StageTimer(memory=True)
+    with timer.stage('bootstrap'):
+        buffer = np.ones(2 ** 20)
+    assert timer.summary()['bootstrap']['peak_mem_mb'] >= 7
+    del buffer
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.skipif(instrument.resource is None, reason="no resource module")
+@pytest.mark.parametrize('platform, maxrss', [('linux', 512 * 2 ** 10), ('darwin', 512 * 2 ** 20)])
+def test_peak_rss_units_follow_the_platform(monkeypatch, platform, maxrss):
+    monkeypatch.setattr(instrument.sys, 'platform', platform)
+    monkeypatch.setattr(instrument.resource, 'getrusage', lambda who: SimpleNamespace(ru_maxrss=maxrss))
+    assert instrument.peak_rss_mb() == 512
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+
+from code_app.backend.job_events import JobEventBus
+
+
+def test_events_from_other_threads_reach_subscribers():
+    bus = JobEventBus()
+
+    async def consume():
+        with bus.subscribe('job') as events:
+            assert bus.stats()['subscribers'] == 1
+            thread = threading.Thread(target=lambda: [
+                bus.publish('job', 'progress', {'stage': 'bootstrap', 'done': 1, 'total': 2}),
+                bus.publish('other', 'progress', {'stage': 'bootstrap', 'done': 1, 'total': 2}),
+                bus.publish('job', 'state', {'status': 'succeeded'}),
+            ])
+            thread.start()
+            received = [await asyncio.wait_for(events.get(), timeout=5) for _ in range(2)]
+            thread.join()
+            return received
+
+    assert asyncio.run(consume()) == [('progress', {'stage': 'bootstrap', 'done': 1, 'total': 2}),
+                                      ('state', {'status': 'succeeded'})]
+    assert bus.stats() == {'jobs_watched': 0, 'subscribers': 0, 'jobs_with_progress': 1}
+
+
+def test_latest_progress_is_kept_until_the_job_finishes():
+    bus = JobEventBus()
+    assert bus.last_progress('job') is None
+    bus.publish('job', 'progress', {'done': 1})
+    bus.publish('job', 'progress', {'done': 2})
+    bus.publish('job', 'state', {'status': 'running'})
+    assert bus.last_progress('job') == {'done': 2}
+    bus.publish('job', 'state', {'status': 'failed'})
+    assert bus.last_progress('job') is None
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from code_app.backend import job_limits as limits_module
+from code_app.backend.job_limits import (
+    JOB_CANCELLED_MESSAGE,
+    JobGuard,
+    get_job_guard,
+    job_limits,
+    kill_process_group,
+    process_group_rss_mb,
+    register_job_guard,
+    release_job_guard,
+)
+
+
+def test_r_budget_grows_with_the_number_of_methods():
+    for k in (5, 50):
+        python = job_limits(100000, k, 200, max_bootstrap_mem_mb=64, engine='python')
+        r = job_limits(100000, k, 200, max_bootstrap_mem_mb=64, engine='r')
+        n_comparisons = 100000 * k * (k - 1) / 2
+        extra_mb = n_comparisons * limits_module.JOB_RSS_R_BYTES_PER_COMPARISON_METHOD * k / 2 ** 20
+        expected = min(limits_module.JOB_MAX_RSS_MB, python['rss_limit_mb'] + extra_mb)
+        assert r['rss_limit_mb'] == pytest.approx(expected, abs=1)
+        assert r['wall_limit_sec'] == python['wall_limit_sec']
+
+
+def test_limits_are_clamped():
+    small = job_limits(0, 0, 2000)
+    assert small['wall_limit_sec'] == limits_module.JOB_MIN_WALL_LIMIT_SEC
+    assert small['rss_limit_mb'] == limits_module.JOB_RSS_BASE_MB
+    large = job_limits(10 ** 7, 100, 2000, engine='r')
+    assert large['wall_limit_sec'] == limits_module.JOB_MAX_WALL_LIMIT_SEC
+    assert large['rss_limit_mb'] == limits_module.JOB_MAX_RSS_MB
+
+
+def test_guard_reports_cancel_and_wall_clock():
+    guard = JobGuard('job')
+    assert guard.violation() is None
+    guard.start(wall_limit_sec=0.01)
+    time.sleep(0.02)
+    assert guard.violation().startswith("Exceeded wall-clock limit")
+    guard.cancel()
+    assert guard.violation() == JOB_CANCELLED_MESSAGE
+
+
+def test_guard_registry():
+    guard = register_job_guard('registered')
+    assert get_job_guard('registered') is guard
+    release_job_guard('registered')
+    assert get_job_guard('registered') is None
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc') or not hasattr(os, 'killpg'), reason="needs /proc and process groups")
+def test_process_group_is_measured_and_killed():
+    process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'], start_new_session=True)
+    try:
+        assert process_group_rss_mb(process.pid) > 0
+        guard = JobGuard('job')
+        guard.start(rss_limit_mb=0.001)
+        assert guard.violation(process.pid).startswith("Exceeded memory limit")
+        kill_process_group(process.pid)
+        assert process.wait(timeout=5) == -9
+    finally:
+        if process.poll() is None:
+            process.kill()
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+
+import pytest
+
+from code_app.backend.job_registry import JobRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return JobRegistry(str(tmp_path / 'jobs.sqlite3'))
+
+
+def test_job_lifecycle(registry):
+    registry.create('a', 'ranking', {'B': 10})
+    registry.create('b', 'custom', status='succeeded', message='Served from the result cache')
+    assert registry.get('a')['status'] == 'running'
+    assert registry.get('missing') is None
+    assert registry.stats()['queued'] == 1
+
+    registry.start('a')
+    registry.finish('a', 'failed', message='boom', error='boom')
+    job = registry.get('a')
+    assert (job['status'], job['error']) == ('failed', 'boom')
+    assert job['runtime_sec'] >= 0
+    assert [job['job_id'] for job in registry.list_jobs(status='failed')] == ['a']
+    assert registry.stats()['counts']['custom']['succeeded'] == 1
+    with pytest.raises(ValueError):
+        registry.finish('a', 'running')
+
+
+def test_legacy_status_files_are_imported_once(registry, tmp_path):
+    jobs_dir = tmp_path / 'legacy'
+    for job_id, status in (('done', 'succeeded'), ('died', 'running'), ('broken', None)):
+        os.makedirs(jobs_dir / job_id)
+        with open(jobs_dir / job_id / 'status.json', 'w') as f:
+            f.write(json.dumps({'status': status, 'message': 'old'}) if status else '{not json')
+    registry.create('done', 'ranking')
+
+    assert registry.import_status_files(str(jobs_dir), 'ranking') == 1
+    assert registry.import_status_files(str(jobs_dir), 'ranking') == 0
+    assert registry.get('done')['status'] == 'running'
+    assert registry.get('died')['status'] == 'failed'
+    assert registry.get('died')['error'] == 'Interrupted by a server restart'
+    assert registry.get('broken') is None
+
+    assert registry.fail_unfinished() == 1
+    assert registry.get('done')['status'] == 'failed'
+
+
+def test_registry_is_shared_across_threads(registry):
+    def create(i):
+        registry.create(f'job{i}', 'ranking')
+
+    threads = [threading.Thread(target=create, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(registry.list_jobs(limit=100)) == 8
+
+
+@pytest.mark.skipif('JOB_REGISTRY_PATH' in os.environ, reason="registry path set explicitly")
+def test_default_path_follows_the_data_dir():
+    from code_app.backend import job_registry, main
+    assert job_registry.JOB_REGISTRY_PATH == os.path.join(main.DATA_DIR, 'jobs.sqlite3')
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from code_app.backend.job_scheduler import JobScheduler
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(slots, **kwargs):
+        scheduler = JobScheduler(slots=slots, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_uploads_use_every_slot_by_default(make_scheduler):
+    scheduler = make_scheduler(2)
+    assert scheduler.reserved_slots == 0
+    release = threading.Event()
+    for job_id in ('a', 'b'):
+        scheduler.submit(job_id, release.wait, 5, lane='bulk')
+    wait_for(lambda: scheduler.stats()['running'] == 2)
+    release.set()
+
+
+def test_reserved_slot_only_runs_interactive_jobs(make_scheduler):
+    scheduler = make_scheduler(2, reserved_slots=1)
+    release = threading.Event()
+    scheduler.submit('bulk1', release.wait, 5, lane='bulk')
+    scheduler.submit('bulk2', release.wait, 5, lane='bulk')
+    wait_for(lambda: scheduler.stats()['running'] == 1)
+    assert scheduler.job_info('bulk2')['state'] == 'queued'
+
+    ran = threading.Event()
+    scheduler.submit('custom', ran.set, lane='interactive')
+    assert ran.wait(5)
+    release.set()
+
+
+def test_interactive_jobs_are_queued_first_and_cancel_drops_jobs(make_scheduler):
+    scheduler = make_scheduler(1)
+    release = threading.Event()
+    order = []
+    scheduler.submit('blocker', release.wait, 5)
+    wait_for(lambda: scheduler.stats()['running'] == 1)
+    assert scheduler.submit('bulk', order.append, 'bulk') == 0
+    assert scheduler.submit('cancelled', order.append, 'cancelled') == 1
+    assert scheduler.submit('custom', order.append, 'custom', lane='interactive') == 0
+    assert scheduler.job_info('bulk')['position'] == 1
+
+    assert scheduler.cancel('cancelled')
+    assert not scheduler.cancel('cancelled')
+    assert not scheduler.cancel('blocker')
+    release.set()
+    wait_for(lambda: scheduler.stats()['completed'] == 3)
+    assert order == ['custom', 'bulk']
+    assert scheduler.stats()['cancelled'] == 1
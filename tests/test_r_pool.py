@@ -0,0 +1,94 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from code_app.backend.job_limits import JOB_CANCELLED_MESSAGE, JobGuard
+from code_app.backend.r_pool import RWorkerPool, ranking_cli_args
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="the fake Rscript needs a shebang")
+
+# Speaks the ranking_worker.R protocol; the job arguments pick its behaviour
+FAKE_RSCRIPT = '''#!{python}
+import json, os, sys, time
+print(json.dumps({{"status": "ready"}}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    if request.get('type') == 'ping':
+        print(json.dumps({{"id": request['id'], "status": "pong"}}), flush=True)
+        continue
+    args = request['args']
+    if 'crash' in args:
+        os._exit(3)
+    if 'sleep' in args:
+        time.sleep(3)
+    if 'progress' in args:
+        for done in (0, 50, 100):
+            print(json.dumps({{"id": request['id'], "status": "progress", "stage": "bootstrap",
+                              "done": done, "total": 100}}), flush=True)
+    if 'fail' in args:
+        print(json.dumps({{"id": request['id'], "status": "error", "message": "bad input"}}), flush=True)
+        continue
+    print("R chatter that is not part of the protocol", flush=True)
+    print(json.dumps({{"id": request['id'], "status": "ok", "pid": os.getpid()}}), flush=True)
+'''
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    rscript = bin_dir / 'Rscript'
+    rscript.write_text(FAKE_RSCRIPT.format(python=sys.executable))
+    rscript.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    pool = RWorkerPool(size=1, script_path='ranking_worker.R')
+    yield pool
+    pool.shutdown()
+
+
+def test_workers_are_reused(pool):
+    assert pool.run(['ok']) == (True, "")
+    assert pool.run(['fail']) == (False, "bad input")
+    assert pool.run(['ok']) == (True, "")
+    assert pool.restarts == 0
+    assert pool.check_health()['idle_alive'] == 1
+
+
+def test_crashed_and_timed_out_workers_are_replaced(pool):
+    succeeded, message = pool.run(['crash'])
+    assert not succeeded and 'exited with code 3' in message
+    succeeded, message = pool.run(['sleep'], timeout=0.5)
+    assert not succeeded and 'did not answer' in message
+    assert pool.run(['ok']) == (True, "")
+    assert pool.restarts == 2
+
+
+def test_cancel_kills_the_running_job(pool):
+    guard = JobGuard('job')
+    guard.start()
+    threading.Timer(0.3, guard.cancel).start()
+    started = time.monotonic()
+    assert pool.run(['sleep'], guard=guard) == (False, JOB_CANCELLED_MESSAGE)
+    assert time.monotonic() - started < 10
+    assert pool.run(['ok']) == (True, "")
+
+    cancelled = JobGuard('queued')
+    cancelled.cancel()
+    assert pool.run(['ok'], guard=cancelled) == (False, JOB_CANCELLED_MESSAGE)
+
+
+def test_progress_is_relayed(pool):
+    events = []
+    assert pool.run(['progress'], timeout=5, on_progress=lambda *event: events.append(event)) == (True, "")
+    assert events == [('bootstrap', 0, 100), ('bootstrap', 50, 100), ('bootstrap', 100, 100)]
+    assert pool.run(['progress']) == (True, "")
+
+
+def test_cli_args():
+    args = ranking_cli_args('data.csv', True, 100, 7, 'out', max_bootstrap_mem_mb=64)
+    assert args == ['--csv', 'data.csv', '--bigbetter', '1', '--B', '100', '--seed', '7', '--out', 'out',
+                    '--max-bootstrap-mem-mb', '64']
+    assert '--max-bootstrap-mem-mb' not in ranking_cli_args('data.csv', 0, 100, 7, 'out')
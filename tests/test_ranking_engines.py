@@ -0,0 +1,69 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from code_app.backend import ranking_engines
+from code_app.backend.ranking_engines import resolve_engine, run_python_ranking
+
+from conftest import make_scores
+
+
+@pytest.fixture
+def scores_csv(tmp_path):
+    path = tmp_path / "scores.csv"
+    scores = make_scores(20, 5, seed=2)
+    pd.DataFrame(scores, columns=[f"model{m}" for m in range(5)]).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def with_rscript(monkeypatch):
+    monkeypatch.setattr(ranking_engines.shutil, 'which', lambda name: '/usr/bin/Rscript')
+
+
+def test_explicit_engine_is_kept(scores_csv):
+    assert resolve_engine('r', scores_csv) == 'r'
+    assert resolve_engine('python', scores_csv) == 'python'
+    with pytest.raises(ValueError):
+        resolve_engine('julia', scores_csv)
+
+
+def test_auto_uses_python_without_rscript(monkeypatch, scores_csv):
+    monkeypatch.setattr(ranking_engines.shutil, 'which', lambda name: None)
+    assert resolve_engine('auto', scores_csv) == 'python'
+
+
+def test_auto_sends_large_inputs_to_python(monkeypatch, with_rscript, scores_csv):
+    # 20 rows x 5 methods: 200 comparisons
+    monkeypatch.setattr(ranking_engines, 'AUTO_R_MAX_COMPARISONS', 200)
+    assert resolve_engine('auto', scores_csv) == 'r'
+    monkeypatch.setattr(ranking_engines, 'AUTO_R_MAX_COMPARISONS', 199)
+    assert resolve_engine('auto', scores_csv) == 'python'
+
+
+def test_auto_uses_python_when_the_csv_cannot_be_sized(with_rscript, tmp_path):
+    assert resolve_engine('auto', str(tmp_path / "missing.csv")) == 'python'
+
+
+def test_python_results_name_their_engine(scores_csv, tmp_path):
+    params = {'bigbetter': 1, 'B': 50, 'seed': 1}
+    succeeded, error = run_python_ranking(scores_csv, str(tmp_path), params, job_id='job')
+    assert succeeded, error
+    with open(os.path.join(tmp_path, 'ranking_results.json')) as f:
+        metadata = json.load(f)['metadata']
+    assert metadata['engine'] == 'python'
+    assert metadata['random_stream'] == 'numpy'
+
+
+def test_python_worker_relays_stage_progress(scores_csv, tmp_path):
+    events = []
+    params = {'bigbetter': 1, 'B': 50, 'seed': 1}
+    succeeded, error = run_python_ranking(scores_csv, str(tmp_path), params, job_id='job',
+                                          on_progress=lambda *event: events.append(event))
+    assert succeeded, error
+    assert events[0] == ('ingest', 0, 1)
+    assert events[-1][0] == 'uniform_ci' and events[-1][1] == events[-1][2]
+    with open(os.path.join(tmp_path, 'ranking_results.json')) as f:
+        assert 'ingest' in json.load(f)['metadata']['stages']
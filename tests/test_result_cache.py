@@ -0,0 +1,78 @@
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from code_app.backend.result_cache import ResultCache, result_cache_key
+
+from conftest import make_scores
+
+PARAMS = {'bigbetter': True, 'B': 100, 'seed': 1}
+
+
+@pytest.fixture
+def scores_frame():
+    return pd.DataFrame(make_scores(10, 4, seed=9, missing=0.1), columns=[f"model{m}" for m in range(4)])
+
+
+def write_output(output_dir, job_id, size=100):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'ranking_results.json'), 'w') as f:
+        json.dump({'job_id': job_id, 'padding': 'x' * size}, f)
+    with open(os.path.join(output_dir, 'ranking_results.csv'), 'w') as f:
+        f.write('method,rank\n')
+
+
+def test_key_ignores_formatting_but_not_content(scores_frame, tmp_path):
+    plain = tmp_path / 'plain.csv'
+    scores_frame.to_csv(plain, index=False)
+    formatted = tmp_path / 'formatted.csv'
+    scores_frame.assign(model='m', description='d').to_csv(formatted, index=False, float_format='%.17g')
+    key = result_cache_key(str(plain), PARAMS, 'python')
+    assert result_cache_key(str(formatted), PARAMS, 'python') == key
+    # Memory caps and other tuning knobs do not change the result
+    assert result_cache_key(str(plain), dict(PARAMS, max_bootstrap_mem_mb=1), 'python') == key
+
+    assert result_cache_key(str(plain), dict(PARAMS, seed=2), 'python') != key
+    assert result_cache_key(str(plain), PARAMS, 'r') != key
+    scores_frame.iloc[0, 0] += 1
+    scores_frame.to_csv(plain, index=False)
+    assert result_cache_key(str(plain), PARAMS, 'python') != key
+
+
+def test_hit_copies_the_results_with_the_new_job_id(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), 2 ** 20)
+    assert not cache.get('key', str(tmp_path / 'miss'))
+    write_output(str(tmp_path / 'first'), 'first')
+    cache.put('key', str(tmp_path / 'first'))
+
+    assert cache.get('key', str(tmp_path / 'second'), job_id='second')
+    with open(tmp_path / 'second' / 'ranking_results.json') as f:
+        assert json.load(f)['job_id'] == 'second'
+    stats = cache.stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (1, 1, 1)
+
+    # The index survives a restart
+    assert ResultCache(str(tmp_path / 'cache'), 2 ** 20).get('key', str(tmp_path / 'third'))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), 2500)
+    for key in ('a', 'b'):
+        write_output(str(tmp_path / key), key, size=1000)
+        cache.put(key, str(tmp_path / key))
+        time.sleep(0.01)
+    assert cache.get('a', str(tmp_path / 'out'))
+    time.sleep(0.01)
+    write_output(str(tmp_path / 'c'), 'c', size=1000)
+    cache.put('c', str(tmp_path / 'c'))
+
+    assert cache.stats()['evictions'] == 1
+    assert not os.path.exists(tmp_path / 'cache' / 'b')
+    assert cache.get('a', str(tmp_path / 'out')) and cache.get('c', str(tmp_path / 'out'))
+
+    write_output(str(tmp_path / 'huge'), 'huge', size=5000)
+    cache.put('huge', str(tmp_path / 'huge'))
+    assert not cache.get('huge', str(tmp_path / 'out'))
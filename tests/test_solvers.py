@@ -0,0 +1,51 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from code_app.backend.spectral_ranking import rank
+from code_app.backend.spectral_ranking.solvers import ITERATIVE_SOLVER_MIN_K, stationary_distribution
+
+from conftest import make_scores
+
+ITERATIVE_SOLVERS = ('power', 'arpack', 'lobpcg')
+
+
+@pytest.fixture(autouse=True)
+def quiet_lobpcg():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        yield
+
+
+@pytest.mark.parametrize('solver', ITERATIVE_SOLVERS)
+@pytest.mark.parametrize('k', [2, 3, 4, 5, 6, 7, 30])
+def test_iterative_solvers_match_svd(solver, k):
+    scores = make_scores(40, k, seed=k)
+    reference = rank(scores, B=50, compress=True)
+    result = rank(scores, B=50, compress=True, solver=solver)
+
+    np.testing.assert_allclose(result.theta_hat, reference.theta_hat, atol=1e-9)
+    np.testing.assert_array_equal(result.rank, reference.rank)
+    info = result.metadata['solver']
+    assert info['converged']
+    assert info['residual'] <= 1e-10
+
+
+@pytest.mark.parametrize('solver', ['arpack', 'lobpcg'])
+def test_small_k_falls_back_to_svd(solver):
+    scores = make_scores(20, ITERATIVE_SOLVER_MIN_K[solver] - 1)
+    info = rank(scores, B=20, solver=solver).metadata['solver']
+    assert info['solver'] == 'svd'
+    assert info['fallback_from'] == solver
+
+
+def test_residual_decides_convergence():
+    P = np.array([[0.8, 0.2, 0.0], [0.1, 0.7, 0.2], [0.3, 0.0, 0.7]])
+    pi, info = stationary_distribution(P, solver='power', tol=1e-12, maxiter=2)
+    assert not info['converged']
+    assert info['residual'] > 1e-12
+
+    pi, info = stationary_distribution(P, solver='power', tol=1e-12)
+    assert info['converged']
+    np.testing.assert_allclose(P.T @ pi, pi, atol=1e-11)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from code_app.backend import main, subset_rankings
+from code_app.backend.spectral_ranking import rank_subset, row_statistics, save_row_statistics
+from code_app.backend.subset_rankings import UnknownBenchmarksError, rank_benchmark_subset, subset_cache_stats
+
+from conftest import make_scores
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    """A 'test' source of 5 benchmarks x 6 models, with empty statistics and result memos"""
+    df = pd.DataFrame(make_scores(5, 6, seed=13), columns=[f"model{m}" for m in range(6)])
+    df.insert(0, 'benchmark', [f"bench{b}" for b in range(5)])
+    csv_path = tmp_path / 'processed.csv'
+    df.to_csv(csv_path, index=False)
+    monkeypatch.setitem(subset_rankings.RANKING_SOURCES, 'test',
+                        (str(csv_path), str(tmp_path / 'ranking' / 'row_statistics.npz')))
+    monkeypatch.setattr(subset_rankings, '_stats', {})
+    monkeypatch.setattr(subset_rankings, '_results', subset_rankings.OrderedDict())
+    monkeypatch.setattr(subset_rankings, '_counters', {'hits': 0, 'misses': 0, 'evictions': 0})
+    return df
+
+
+def test_subset_ranking_matches_rank_subset_and_is_memoized(source):
+    payload = rank_benchmark_subset('test', ['bench3', 'bench1'], B=100, seed=2)
+    assert payload['benchmarks'] == ['bench1', 'bench3']
+    reference = rank_subset(row_statistics(source.set_index('benchmark')), ['bench1', 'bench3'], B=100, seed=2,
+                            bootstrap='covariance')
+    assert [m['rank'] for m in payload['methods']] == list(reference.rank)
+    np.testing.assert_allclose([m['theta_hat'] for m in payload['methods']], reference.theta_hat)
+
+    assert rank_benchmark_subset('test', ['bench1', 'bench3'], B=100, seed=2)['methods'] == payload['methods']
+    stats = subset_cache_stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    with pytest.raises(UnknownBenchmarksError):
+        rank_benchmark_subset('test', ['bench9'])
+    with pytest.raises(UnknownBenchmarksError):
+        rank_benchmark_subset('test', [])
+
+
+def test_statistics_are_not_written_and_follow_the_data(source):
+    csv_path, stats_path = subset_rankings.RANKING_SOURCES['test']
+    first = rank_benchmark_subset('test', B=50)
+    assert not os.path.exists(stats_path)
+
+    source.iloc[:, 1:] = -source.iloc[:, 1:]
+    source.to_csv(csv_path, index=False)
+    mtime = os.path.getmtime(csv_path) + 10
+    os.utime(csv_path, (mtime, mtime))
+    second = rank_benchmark_subset('test', B=50)
+    assert [m['rank'] for m in second['methods']] != [m['rank'] for m in first['methods']]
+    assert not os.path.exists(stats_path)
+
+
+def test_runner_statistics_are_used_when_newer(source):
+    csv_path, stats_path = subset_rankings.RANKING_SOURCES['test']
+    os.makedirs(os.path.dirname(stats_path))
+    save_row_statistics(row_statistics(source.iloc[:3].set_index('benchmark')), stats_path)
+    assert subset_rankings.source_benchmarks('test') == ['bench0', 'bench1', 'bench2']
+
+
+def test_endpoint_validates_the_request(source):
+    client = TestClient(main.app)
+    response = client.get('/api/rankings/test', params={'benchmarks': 'bench0, bench2', 'B': 50})
+    assert response.status_code == 200
+    assert response.json()['benchmarks'] == ['bench0', 'bench2']
+    assert client.get('/api/rankings/test', params={'benchmarks': 'nope'}).status_code == 400
+    assert client.get('/api/rankings/test', params={'B': 0}).status_code == 400
+    assert client.get('/api/rankings/unknown').status_code == 404
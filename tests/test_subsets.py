@@ -0,0 +1,36 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from code_app.backend.spectral_ranking import gray_code_subsets, rank_subset, row_statistics, warm_start
+
+from conftest import make_scores
+
+
+def test_gray_code_order_covers_every_subset_once():
+    items = ['a', 'b', 'c', 'd', 'e']
+    subsets = gray_code_subsets(items)
+    expected = {c for size in range(1, 6) for c in itertools.combinations(items, size)}
+    assert len(subsets) == len(expected) and set(subsets) == expected
+    for previous, current in zip(subsets, subsets[1:]):
+        assert len(set(previous) ^ set(current)) == 1
+
+    sized = gray_code_subsets(items, min_size=2, max_size=4)
+    assert all(2 <= len(subset) <= 4 for subset in sized)
+    assert len(sized) == len(expected) - 5 - 1
+
+
+def test_warm_start_converges_to_the_same_ranking_faster():
+    df = pd.DataFrame(make_scores(8, 30, seed=11), columns=[f"model{m}" for m in range(30)],
+                      index=[f"bench{b}" for b in range(8)])
+    stats = row_statistics(df)
+    subsets = gray_code_subsets(list(stats.rows), min_size=6)
+    previous = rank_subset(stats, subsets[0], B=20, solver='power')
+    for subset in subsets[1:4]:
+        cold = rank_subset(stats, subset, B=20, solver='power')
+        warm = rank_subset(stats, subset, B=20, solver='power', pi0=warm_start(previous))
+        np.testing.assert_allclose(warm.theta_hat, cold.theta_hat, atol=1e-8)
+        assert warm.metadata['solver']['warm_start']
+        assert warm.metadata['solver']['iterations'] < cold.metadata['solver']['iterations']
+        previous = warm
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from code_app.backend.spectral_ranking import (
+    load_row_statistics,
+    rank,
+    rank_subset,
+    row_statistics,
+    save_row_statistics,
+)
+
+from conftest import make_scores
+
+
+@pytest.fixture
+def benchmarks():
+    return pd.DataFrame(make_scores(6, 5, seed=12, missing=0.2), columns=[f"model{m}" for m in range(5)],
+                        index=[f"bench{b}" for b in range(6)])
+
+
+@pytest.mark.parametrize('bigbetter', [True, False])
+def test_subset_matches_compressed_rank_on_the_rows(benchmarks, bigbetter):
+    stats = row_statistics(benchmarks, bigbetter=bigbetter)
+    for rows in (['bench1', 'bench4'], ['bench0', 'bench2', 'bench3', 'bench5'], None):
+        subset = rank_subset(stats, rows, B=200, seed=5)
+        scores = benchmarks if rows is None else benchmarks.loc[rows]
+        reference = rank(scores, bigbetter=bigbetter, B=200, seed=5, compress=True)
+        np.testing.assert_array_equal(subset.to_frame().drop(columns='method'),
+                                      reference.to_frame().drop(columns='method'))
+        assert subset.metadata['n_samples'] == len(scores)
+
+
+def test_statistics_round_trip(benchmarks, tmp_path):
+    stats = row_statistics(benchmarks)
+    path = tmp_path / 'stats.npz'
+    save_row_statistics(stats, path)
+    loaded = load_row_statistics(path)
+    np.testing.assert_array_equal(loaded.wins, stats.wins)
+    assert list(loaded.methods) == list(stats.methods) and list(loaded.rows) == list(stats.rows)
+    assert loaded.bigbetter == stats.bigbetter
+    with pytest.raises(KeyError):
+        stats.win_counts(['bench9'])